@@ -0,0 +1,119 @@
+"""
+Chat WebSocket: ``ws(s)://<host>/ws/chat/?token=<JWT access token>``
+
+Once connected the client receives every chat event addressed to the user
+(see ``chat.events``) as JSON, replacing polling of the chat detail and
+unread-count endpoints. The client may send:
+
+* ``{"type": "typing", "chat_id": ...}`` - forwarded to the other participant
+* ``{"type": "read", "chat_id": ...}`` - marks the chat read, like ``mark-read/``
+* ``{"type": "ping"}`` - answered with ``{"type": "pong"}``
+
+Messages are still sent through the REST endpoint, which handles
+attachments and validation.
+"""
+
+import asyncio
+import contextlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from common.events import get_event_layer, user_group
+from common.websocket import WebSocketDisconnect
+from users.authentication import get_user_for_token
+
+from . import events
+from .inbox import mark_chat_read
+from .models import Chat
+
+User = get_user_model()
+
+# Close codes sent before accepting the connection
+UNAUTHORIZED = 4401
+
+# Minimum seconds between forwarded typing events per chat
+TYPING_INTERVAL = 2
+
+
+@sync_to_async
+def get_chat_for_user(chat_id, user):
+    try:
+        return Chat.objects.only('id', 'client_id', 'freelancer_id').get(
+            Q(client=user) | Q(freelancer=user), id=chat_id
+        )
+    except (Chat.DoesNotExist, ValidationError):
+        return None
+
+
+class ChatConnection:
+    """State of one authenticated chat socket"""
+
+    def __init__(self, socket, user):
+        self.socket = socket
+        self.user = user
+        self.chats = {}
+        self.last_typing = {}
+
+    async def get_chat(self, chat_id):
+        chat_id = str(chat_id)
+        if chat_id not in self.chats:
+            self.chats[chat_id] = await get_chat_for_user(chat_id, self.user)
+        return self.chats[chat_id]
+
+    async def forward_events(self, subscription):
+        async for event in subscription:
+            await self.socket.send_json(event)
+
+    async def handle(self, data):
+        if not isinstance(data, dict):
+            await self.socket.send_json({'type': 'error', 'error': 'Invalid message'})
+            return
+        kind = data.get('type')
+        if kind == 'ping':
+            await self.socket.send_json({'type': 'pong'})
+            return
+        if kind not in ('typing', 'read'):
+            await self.socket.send_json({'type': 'error', 'error': f'Unknown message type: {kind}'})
+            return
+
+        chat = await self.get_chat(data.get('chat_id'))
+        if chat is None:
+            await self.socket.send_json({
+                'type': 'error', 'error': 'Chat not found', 'chat_id': data.get('chat_id')
+            })
+            return
+
+        if kind == 'typing':
+            now = time.monotonic()
+            if now - self.last_typing.get(chat.id, 0) >= TYPING_INTERVAL:
+                self.last_typing[chat.id] = now
+                await sync_to_async(events.typing, thread_sensitive=False)(chat, self.user)
+        else:
+            await sync_to_async(mark_chat_read)(chat, self.user)
+
+
+async def chat_socket(socket):
+    """ASGI WebSocket handler for ``/ws/chat/``"""
+    user = await sync_to_async(get_user_for_token)(socket.query_params.get('token'))
+    if user is None:
+        await socket.close(code=UNAUTHORIZED)
+        return
+    await socket.accept()
+
+    connection = ChatConnection(socket, user)
+    async with await get_event_layer().subscribe([user_group(user.id)]) as subscription:
+        forwarder = asyncio.create_task(connection.forward_events(subscription))
+        try:
+            while True:
+                await connection.handle(await socket.receive_json())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            # Wait for the forwarder to stop before leaving the subscription
+            forwarder.cancel()
+            with contextlib.suppress(asyncio.CancelledError, WebSocketDisconnect):
+                await forwarder
@@ -0,0 +1,61 @@
+"""
+Real-time chat events.
+
+Published to both participants' ``user:<id>`` groups on the event layer
+(see ``common.events``) once the triggering transaction commits, and
+delivered to clients by the chat WebSocket (``chat.consumers``):
+
+* ``chat.message``: a new message, serialized like the send endpoint's response
+* ``chat.read``: ``user_id`` has read the chat up to ``last_seen_message_id``
+* ``chat.typing``: ``user_id`` is typing (never persisted)
+* ``chat.offer``: an offer made in the chat was accepted, rejected or withdrawn
+"""
+
+from django.utils import timezone
+
+from common.events import publish, publish_on_commit, user_group
+
+
+def participant_groups(chat):
+    return [user_group(chat.client_id), user_group(chat.freelancer_id)]
+
+
+def other_participant_id(chat, user_id):
+    return chat.freelancer_id if str(chat.client_id) == str(user_id) else chat.client_id
+
+
+def message_created(chat, message_data):
+    publish_on_commit(participant_groups(chat), {
+        'type': 'chat.message',
+        'chat_id': str(chat.id),
+        'message': message_data,
+    })
+
+
+def messages_read(chat, user, last_seen_message_id):
+    publish_on_commit(participant_groups(chat), {
+        'type': 'chat.read',
+        'chat_id': str(chat.id),
+        'user_id': str(user.id),
+        'last_seen_message_id': str(last_seen_message_id) if last_seen_message_id else None,
+        'read_at': timezone.now(),
+    })
+
+
+def offer_updated(chat, offer):
+    publish_on_commit(participant_groups(chat), {
+        'type': 'chat.offer',
+        'chat_id': str(chat.id),
+        'offer_id': str(offer.id),
+        'job_id': str(offer.job_id),
+        'status': offer.status,
+    })
+
+
+def typing(chat, user):
+    publish(user_group(other_participant_id(chat, user.id)), {
+        'type': 'chat.typing',
+        'chat_id': str(chat.id),
+        'user_id': str(user.id),
+        'user_name': user.name,
+    })
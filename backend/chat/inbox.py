@@ -0,0 +1,106 @@
+"""
+Denormalized chat inbox state.
+
+Each chat keeps a snapshot of its latest message and each participant keeps
+an unread counter, so the inbox is served without touching ``messages``.
+Both are updated in the same transaction as the message write or read
+marking they reflect.
+"""
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from . import events
+from .models import PREVIEW_LENGTH, Chat, ChatParticipant, Message
+
+
+def ensure_participants(chat):
+    """Create the participant rows for both sides of a chat if missing"""
+    ChatParticipant.objects.bulk_create(
+        [
+            ChatParticipant(chat=chat, user_id=chat.client_id),
+            ChatParticipant(chat=chat, user_id=chat.freelancer_id),
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def preview(content):
+    content = ' '.join((content or '').split())
+    if len(content) > PREVIEW_LENGTH:
+        content = content[:PREVIEW_LENGTH - 3] + '...'
+    return content
+
+
+def record_message(chat, message):
+    """Update the chat snapshot and the other participant's unread counter
+
+    Call inside the transaction that created ``message``.
+    """
+    now = timezone.now()
+    Chat.objects.filter(pk=chat.pk).update(
+        last_message=message,
+        last_message_preview=preview(message.content),
+        last_message_sender_name=message.sender.name,
+        last_message_at=message.created_at,
+        updated_at=now,
+    )
+    ChatParticipant.objects.filter(chat=chat).exclude(user_id=message.sender_id).update(
+        unread_count=F('unread_count') + 1,
+        updated_at=now,
+    )
+    ChatParticipant.objects.filter(chat=chat, user_id=message.sender_id).update(
+        last_seen_message=message,
+        updated_at=now,
+    )
+
+    chat.last_message = message
+    chat.last_message_preview = preview(message.content)
+    chat.last_message_sender_name = message.sender.name
+    chat.last_message_at = message.created_at
+    chat.updated_at = now
+
+
+def mark_chat_read(chat, user):
+    """Mark the other side's messages as read for ``user``; returns how many changed
+    
+    Publishes a ``chat.read`` receipt when anything was unread.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Locking the participant row first serializes this with senders, who
+        # update it after inserting their message: a message is either
+        # visible here and marked read, or counted after we reset
+        participant = (
+            ChatParticipant.objects.select_for_update()
+            .filter(chat=chat, user=user)
+            .first()
+        )
+        updated = Message.objects.filter(
+            chat=chat,
+            is_read=False
+        ).exclude(sender=user).update(is_read=True, read_at=now)
+
+        if participant is None:
+            ensure_participants(chat)
+        latest_id = (
+            Message.objects.filter(chat=chat)
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        ChatParticipant.objects.filter(chat=chat, user=user).update(
+            unread_count=0,
+            last_seen_message_id=latest_id,
+            updated_at=now,
+        )
+        if updated or (participant is not None and participant.unread_count):
+            events.messages_read(chat, user, latest_id)
+    return updated
+
+
+def with_unread_counts(queryset, user):
+    """Annotate chats with ``user_unread_count`` from the participant rows"""
+    unread = ChatParticipant.objects.filter(chat=OuterRef('pk'), user=user).values('unread_count')[:1]
+    return queryset.annotate(user_unread_count=Subquery(unread))
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import threading
+import time
+import uuid
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.events import get_event_layer, user_group
+from users.models import User
+
+LAYERS = {
+    'memory': ('common.events.InMemoryEventLayer', ''),
+    'redis-local': ('common.events.RedisEventLayer', 'local://benchmark'),
+}
+
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _Client:
+    """In-process WebSocket client speaking raw ASGI to the application"""
+
+    def __init__(self, token, latencies):
+        self.scope = {
+            'type': 'websocket',
+            'path': '/ws/chat/',
+            'query_string': f'token={token}'.encode(),
+            'headers': [],
+        }
+        self.incoming = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.latencies = latencies
+        self.incoming.put_nowait({'type': 'websocket.connect'})
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        if message['type'] == 'websocket.accept':
+            self.accepted.set()
+        elif message['type'] == 'websocket.send':
+            event = json.loads(message['text'])
+            if event.get('type') == 'benchmark':
+                self.latencies.append((time.perf_counter() - event['sent']) * 1000)
+        elif message['type'] == 'websocket.close':
+            self.accepted.set()
+
+    def disconnect(self):
+        self.incoming.put_nowait({'type': 'websocket.disconnect', 'code': 1000})
+
+
+class Command(BaseCommand):
+    help = (
+        'Hold many chat WebSocket connections against the ASGI application in '
+        'one process and measure connect time, memory per connection and '
+        'event delivery latency. Benchmark users are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', default='100,1000,5000',
+                            help='Comma separated connection counts')
+        parser.add_argument('--users', type=int, default=500,
+                            help='Distinct users the connections are spread over')
+        parser.add_argument('--events', type=int, default=2000,
+                            help='Events published per connection count')
+        parser.add_argument('--layer', choices=sorted(LAYERS), default='memory')
+
+    def handle(self, *args, **options):
+        from workvix_project.asgi import application
+
+        tag = uuid.uuid4().hex[:8]
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(email=f'ws-bench-{tag}-{i}@example.com', name=f'Bench {i}',
+                 role=User.FREELANCER, password=password)
+            for i in range(options['users'])
+        ], batch_size=1000)
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+
+        layer, url = LAYERS[options['layer']]
+        try:
+            with override_settings(EVENT_LAYER=layer, EVENT_LAYER_URL=url):
+                get_event_layer.cache_clear()
+                self.stdout.write(f"{'connections':>11} {'connect s':>10} {'RSS MB':>8} "
+                                  f"{'KB/conn':>8} {'p50 ms':>8} {'p99 ms':>8} {'events/s':>9}")
+                for size in [int(size) for size in options['connections'].split(',')]:
+                    asyncio.run(self._run(application, users, tokens, size, options['events']))
+        finally:
+            get_event_layer.cache_clear()
+            User.objects.filter(email__startswith=f'ws-bench-{tag}-').delete()
+
+    async def _run(self, application, users, tokens, size, event_count):
+        # Each run has its own event loop, like a freshly started worker
+        get_event_layer.cache_clear()
+        latencies = []
+        baseline = _rss_mb()
+
+        start = time.perf_counter()
+        clients = [_Client(tokens[i % len(tokens)], latencies) for i in range(size)]
+        tasks = [asyncio.create_task(application(c.scope, c.receive, c.send)) for c in clients]
+        await asyncio.gather(*(c.accepted.wait() for c in clients))
+        connect_time = time.perf_counter() - start
+        rss = _rss_mb()
+
+        # Publish from a worker thread, as a Django view would
+        groups = [user_group(user.id) for user in users[:min(size, len(users))]]
+        targets = [random.randrange(len(groups)) for _ in range(event_count)]
+        per_user = [size // len(users) + (1 if i < size % len(users) else 0) for i in range(len(users))]
+        expected = sum(per_user[i] for i in targets)
+
+        def publish_all():
+            layer = get_event_layer()
+            for index in targets:
+                layer.publish(groups[index], {'type': 'benchmark', 'sent': time.perf_counter()})
+
+        start = time.perf_counter()
+        publisher = threading.Thread(target=publish_all)
+        publisher.start()
+        while len(latencies) < expected and time.perf_counter() - start < 60:
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - start
+        publisher.join()
+
+        for client in clients:
+            client.disconnect()
+        await asyncio.gather(*tasks)
+
+        latencies.sort()
+        p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)] if latencies else 0
+        self.stdout.write(
+            f'{size:>11} {connect_time:>10.2f} {rss:>8.1f} {(rss - baseline) * 1024 / size:>8.1f} '
+            f'{statistics.median(latencies) if latencies else 0:>8.2f} {p99:>8.2f} '
+            f'{len(latencies) / elapsed:>9.0f}'
+        )
+        if len(latencies) < expected:
+            self.stdout.write(self.style.WARNING(f'  only {len(latencies)} of {expected} events delivered'))
@@ -0,0 +1,68 @@
+# Generated by Django 6.0 on 2026-10-17 17:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q
+
+PREVIEW_LENGTH = 255
+
+
+def build_inbox_state(apps, schema_editor):
+    """Fill the last-message snapshot and participant unread counters"""
+    Chat = apps.get_model('chat', 'Chat')
+    ChatParticipant = apps.get_model('chat', 'ChatParticipant')
+    Message = apps.get_model('chat', 'Message')
+
+    for chat in Chat.objects.iterator():
+        messages = Message.objects.filter(chat=chat).order_by('-created_at')
+        last = messages.select_related('sender').first()
+        if last is not None:
+            content = ' '.join(last.content.split())
+            if len(content) > PREVIEW_LENGTH:
+                content = content[:PREVIEW_LENGTH - 3] + '...'
+            Chat.objects.filter(pk=chat.pk).update(
+                last_message=last,
+                last_message_preview=content,
+                last_message_sender_name=last.sender.name,
+                last_message_at=last.created_at,
+            )
+
+        for user_id in (chat.client_id, chat.freelancer_id):
+            unread = messages.filter(is_read=False).exclude(sender_id=user_id).count()
+            last_seen = messages.filter(Q(sender_id=user_id) | Q(is_read=True)).first()
+            ChatParticipant.objects.update_or_create(
+                chat=chat,
+                user_id=user_id,
+                defaults={'unread_count': unread, 'last_seen_message': last_seen},
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message'),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='chat',
+            name='last_message_sender_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(build_inbox_state, migrations.RunPython.noop),
+    ]
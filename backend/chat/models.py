@@ -4,6 +4,8 @@ from common.models import BaseModel
 
 User = get_user_model()
 
+PREVIEW_LENGTH = 255
+
 
 class Chat(BaseModel):
     """Chat model for job-specific conversations"""
@@ -13,6 +15,18 @@ class Chat(BaseModel):
     freelancer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='freelancer_chats')
     is_active = models.BooleanField(default=True)
     
+    # Snapshot of the latest message, maintained by chat.inbox.record_message
+    last_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_message_sender_name = models.CharField(max_length=255, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         db_table = 'chats'
         unique_together = ('job', 'freelancer')  # One chat per job per freelancer
@@ -33,6 +47,9 @@ class Message(BaseModel):
     class Meta:
         db_table = 'messages'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['chat', 'created_at', 'id'], name='messages_chat_created_idx'),
+        ]
         
     def __str__(self):
         return f"Message from {self.sender.name} at {self.created_at}"
@@ -1,12 +1,14 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from common.serializers import TimedModelSerializer
 from .models import Chat, Message, MessageAttachment
 from users.serializers import UserProfileSerializer
 
 User = get_user_model()
 
 
-class MessageAttachmentSerializer(serializers.ModelSerializer):
+class MessageAttachmentSerializer(TimedModelSerializer):
     """Serializer for message attachments"""
     
     class Meta:
@@ -15,7 +17,7 @@ class MessageAttachmentSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(TimedModelSerializer):
     """Serializer for chat messages"""
     
     sender = UserProfileSerializer(read_only=True)
@@ -31,7 +33,7 @@ class MessageSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ChatSerializer(serializers.ModelSerializer):
+class ChatSerializer(TimedModelSerializer):
     """Serializer for chat rooms"""
     
     client = UserProfileSerializer(read_only=True)
@@ -42,38 +44,66 @@ class ChatSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Chat
-        fields = '__all__'
+        exclude = ('last_message_preview', 'last_message_sender_name')
         read_only_fields = ('id', 'created_at', 'updated_at', 'last_message_at')
     
     def get_last_message(self, obj):
-        last_message = obj.messages.last()
-        if last_message:
+        if obj.last_message_id:
             return {
-                'content': last_message.content,
-                'sender': last_message.sender.name,
-                'created_at': last_message.created_at
+                'content': obj.last_message_preview,
+                'sender': obj.last_message_sender_name,
+                'created_at': obj.last_message_at
             }
         return None
     
     def get_unread_count(self, obj):
+        # Annotated by chat.inbox.with_unread_counts on list queries
+        if hasattr(obj, 'user_unread_count'):
+            return obj.user_unread_count or 0
         user = self.context['request'].user
-        return obj.messages.filter(is_read=False).exclude(sender=user).count()
+        participant = obj.participants.filter(user=user).first()
+        return participant.unread_count if participant else 0
 
 
-class ChatDetailSerializer(serializers.ModelSerializer):
-    """Detailed chat serializer with messages"""
+class ChatDetailSerializer(TimedModelSerializer):
+    """Detailed chat serializer with the most recent messages
+    
+    Older messages are loaded from the paginated message history endpoint.
+    """
     
-    messages = MessageSerializer(many=True, read_only=True)
+    messages = serializers.SerializerMethodField()
+    has_more_messages = serializers.SerializerMethodField()
     client = UserProfileSerializer(read_only=True)
     freelancer = UserProfileSerializer(read_only=True)
     job_title = serializers.CharField(source='job.title', read_only=True)
     
     class Meta:
         model = Chat
-        fields = '__all__'
+        # The last_message* columns back the chat list; the messages are here in full
+        fields = ('id', 'job', 'job_title', 'client', 'freelancer', 'is_active', 'created_at', 'updated_at',
+                  'messages', 'has_more_messages')
+    
+    def get_recent_messages(self, obj):
+        if not hasattr(obj, '_recent_messages'):
+            limit = getattr(settings, 'CHAT_DETAIL_MESSAGE_LIMIT', 50)
+            recent = list(
+                obj.messages.select_related('sender__freelancer_profile')
+                .prefetch_related('attachments')
+                .order_by('-created_at', '-id')[:limit + 1]
+            )
+            obj._has_more_messages = len(recent) > limit
+            obj._recent_messages = recent[:limit][::-1]
+        return obj._recent_messages
+    
+    def get_messages(self, obj):
+        return MessageSerializer(self.get_recent_messages(obj), many=True, context=self.context).data
+    
+    def get_has_more_messages(self, obj):
+        self.get_recent_messages(obj)
+        return obj._has_more_messages
 
 
-class CreateMessageSerializer(serializers.ModelSerializer):
+class CreateMessageSerializer(TimedModelSerializer):
     """Serializer for creating new messages"""
     
     attachment = serializers.FileField(required=False, allow_null=True)
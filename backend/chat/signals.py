@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .inbox import ensure_participants
+from .models import Chat
+
+
+@receiver(post_save, sender=Chat)
+def create_chat_participants(sender, instance, created, **kwargs):
+    """Give both sides of a new chat a participant row for unread tracking"""
+    if created:
+        ensure_participants(instance)
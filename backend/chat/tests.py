@@ -1,3 +1,67 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from users.models import User
+from .models import Chat, Message
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class ChatDetailTests(TestCase):
+    """Opening a chat"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        self.freelancer = User.objects.create_user('freelancer@example.com', 'pass', name='F', role=User.FREELANCER)
+        job = Job.objects.create(
+            client=self.client_user, title='Essay', description='Write', assignment_type=Job.ACADEMIC_WRITING,
+            subject='History', deadline=timezone.now() + timedelta(days=3),
+            budget_min=10, budget_max=50, status=Job.OPEN,
+        )
+        self.chat = Chat.objects.create(job=job, client=self.client_user, freelancer=self.freelancer)
+        for content in ('Hello', 'Are you there?'):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.api(self.freelancer).post(f'/api/chat/{self.chat.id}/send/', {'content': content})
+            self.assertEqual(response.status_code, 201)
+
+    def api(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def open_chat(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api(self.client_user).get(f'/api/chat/{self.chat.id}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_renders_the_chat_with_its_messages(self):
+        data = self.open_chat()
+        self.assertEqual(set(data), {
+            'id', 'job', 'job_title', 'client', 'freelancer', 'is_active', 'created_at', 'updated_at',
+            'messages', 'has_more_messages',
+        })
+        self.assertEqual([message['content'] for message in data['messages']], ['Hello', 'Are you there?'])
+        self.assertFalse(data['has_more_messages'])
+
+    def test_marks_the_other_sides_messages_read(self):
+        self.open_chat()
+        self.assertFalse(Message.objects.filter(chat=self.chat, is_read=False).exists())
+
+    def test_loads_the_chat_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.open_chat()
+        chat_loads = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "chats"' in query['sql']
+        ]
+        self.assertEqual(len(chat_loads), 1, chat_loads)
+
+    def test_other_users_cannot_open_it(self):
+        stranger = User.objects.create_user('other@example.com', 'pass', name='O', role=User.CLIENT)
+        self.assertEqual(self.api(stranger).get(f'/api/chat/{self.chat.id}/').status_code, 404)
@@ -1,10 +1,18 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework import serializers as drf_serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from .models import Chat, Message, MessageAttachment
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils.dateparse import parse_datetime
+from common.pagination import KeysetPagination
+from common.queries import query_budget
+from . import events
+from .inbox import mark_chat_read, preview, record_message, with_unread_counts
+from .models import Chat, ChatParticipant, Message, MessageAttachment
 from .serializers import (
     ChatSerializer, 
     ChatDetailSerializer, 
@@ -12,6 +20,8 @@ from .serializers import (
     CreateMessageSerializer
 )
 from jobs.models import Job
+from notifications.coalescing import notify
+from notifications.models import Notification
 
 User = get_user_model()
 
@@ -21,12 +31,16 @@ class ChatListView(generics.ListAPIView):
     
     serializer_class = ChatSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
     
     def get_queryset(self):
         user = self.request.user
-        return Chat.objects.filter(
+        chats = Chat.objects.filter(
             Q(client=user) | Q(freelancer=user)
-        ).select_related('client', 'freelancer', 'job').order_by('-updated_at')
+        ).select_related(
+            'client__freelancer_profile', 'freelancer__freelancer_profile', 'job'
+        ).order_by('-updated_at')
+        return with_unread_counts(chats, user)
 
 
 class ChatDetailView(generics.RetrieveAPIView):
@@ -34,23 +48,69 @@ class ChatDetailView(generics.RetrieveAPIView):
     
     serializer_class = ChatDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 10
     
     def get_queryset(self):
         user = self.request.user
         return Chat.objects.filter(
             Q(client=user) | Q(freelancer=user)
-        ).prefetch_related('messages__sender')
+        ).select_related('client__freelancer_profile', 'freelancer__freelancer_profile', 'job')
     
     def retrieve(self, request, *args, **kwargs):
         chat = self.get_object()
         
         # Mark messages as read for current user
-        Message.objects.filter(
-            chat=chat,
-            is_read=False
-        ).exclude(sender=request.user).update(is_read=True)
+        mark_chat_read(chat, request.user)
+        
+        serializer = self.get_serializer(chat)
+        return Response(serializer.data)
+
+
+class ChatMessageListView(generics.ListAPIView):
+    """Paginated message history of a chat
+    
+    Pages run newest first; follow ``next`` for older messages. With
+    ``?since=<message id or ISO timestamp>`` only messages after that point
+    are returned, oldest first, for clients syncing from their latest message.
+    """
+    
+    serializer_class = MessageSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+    pagination_class = KeysetPagination
+    filter_backends = []
+    
+    def get_queryset(self):
+        user = self.request.user
+        chat = get_object_or_404(
+            Chat.objects.filter(Q(client=user) | Q(freelancer=user)),
+            id=self.kwargs['chat_id']
+        )
+        messages = Message.objects.filter(chat=chat).select_related(
+            'sender__freelancer_profile'
+        ).prefetch_related('attachments')
+        
+        since = self.request.query_params.get('since')
+        if not since:
+            return messages.order_by('-created_at', '-id')
         
-        return super().retrieve(request, *args, **kwargs)
+        return messages.filter(self.get_since_filter(chat, since)).order_by('created_at', 'id')
+    
+    def get_since_filter(self, chat, since):
+        try:
+            anchor = Message.objects.only('id', 'created_at').get(chat=chat, id=since)
+        except (Message.DoesNotExist, ValidationError):
+            try:
+                created_at = parse_datetime(since)
+            except ValueError:
+                # Well formed but out of range, e.g. month 13
+                created_at = None
+            if created_at is None:
+                raise drf_serializers.ValidationError(
+                    {'since': 'Must be a message id or an ISO 8601 timestamp.'}
+                )
+            return Q(created_at__gt=created_at)
+        return Q(created_at__gt=anchor.created_at) | Q(created_at=anchor.created_at, id__gt=anchor.id)
 
 
 class CreateChatView(generics.CreateAPIView):
@@ -138,34 +198,50 @@ class SendMessageView(generics.CreateAPIView):
             # Get file from validated data
             attachment_file = serializer.validated_data.pop('attachment', None)
             
-            message = serializer.save(
-                chat=chat,
-                sender=user
-            )
-            
-            # Handle file attachment if present
-            if attachment_file:
-                try:
-                    MessageAttachment.objects.create(
-                        message=message,
-                        file=attachment_file,
-                        original_name=attachment_file.name,
-                        file_size=attachment_file.size,
-                        content_type=attachment_file.content_type or 'application/octet-stream'
-                    )
-                except Exception as e:
-                    # If attachment fails, still return the message but log the error
-                    print(f"Error saving attachment: {str(e)}")
+            with transaction.atomic():
+                message = serializer.save(
+                    chat=chat,
+                    sender=user
+                )
+                
+                # Handle file attachment if present
+                if attachment_file:
+                    try:
+                        with transaction.atomic():
+                            MessageAttachment.objects.create(
+                                message=message,
+                                file=attachment_file,
+                                original_name=attachment_file.name,
+                                file_size=attachment_file.size,
+                                content_type=attachment_file.content_type or 'application/octet-stream'
+                            )
+                    except Exception as e:
+                        # If attachment fails, still return the message but log the error
+                        print(f"Error saving attachment: {str(e)}")
+                
+                # Update the inbox snapshot and the recipient's unread count
+                record_message(chat, message)
+                
+                # Coalesced per chat: a burst of messages is one notification
+                recipient = chat.freelancer if user == chat.client else chat.client
+                notify(
+                    recipient,
+                    Notification.NEW_MESSAGE,
+                    f"New Message from {user.name}",
+                    preview(message.content) or 'Sent an attachment',
+                    summary=lambda count: f"{count} New Messages from {user.name}",
+                    chat_id=chat.id,
+                    job_id=chat.job_id,
+                    data={
+                        'chat_id': str(chat.id),
+                        'sender_name': user.name,
+                    }
+                )
             
-            # Update chat's last message time
-            from django.utils import timezone
-            chat.last_message_at = timezone.now()
-            chat.save()
+            data = MessageSerializer(message, context={'request': request}).data
+            events.message_created(chat, data)
             
-            return Response(
-                MessageSerializer(message, context={'request': request}).data,
-                status=status.HTTP_201_CREATED
-            )
+            return Response(data, status=status.HTTP_201_CREATED)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -192,28 +268,26 @@ def mark_messages_read(request, chat_id):
         )
     
     # Mark messages as read
-    updated_count = Message.objects.filter(
-        chat=chat,
-        is_read=False
-    ).exclude(sender=user).update(is_read=True)
+    updated_count = mark_chat_read(chat, user)
     
     return Response({
         'message': f'Marked {updated_count} messages as read'
     }, status=status.HTTP_200_OK)
 
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_unread_count(request):
     """Get total unread message count for user"""
     
     user = request.user
-    unread_count = Message.objects.filter(
+    unread_count = ChatParticipant.objects.filter(
+        user=user,
         chat__in=Chat.objects.filter(
             Q(client=user) | Q(freelancer=user)
-        ),
-        is_read=False
-    ).exclude(sender=user).count()
+        )
+    ).aggregate(total=Sum('unread_count'))['total'] or 0
     
     return Response({
         'unread_count': unread_count
@@ -0,0 +1,373 @@
+"""
+In-process benchmarks of the API's critical paths.
+
+``manage.py benchmark_api`` seeds a fresh test database with ``seed_dataset``
+at each requested size, then drives the Django test client through the
+scenarios below: no network, but the full middleware stack and real JWT
+authentication. Each scenario reports latency percentiles and the number of
+queries per request:
+
+* ``job_board``: the job list a freelancer browses
+* ``job_detail``: open jobs, one after another
+* ``ranked_offers``: job owners ranking the offers on their busiest jobs
+* ``job_feed``: freelancers' recommended jobs, built from scratch each time
+* ``notifications``: the notification list of the most notified user
+* ``payment_history``: the payments of the client who paid most
+* ``chat_history``, ``chat_send``, ``chat_mark_read``: the busiest chat
+* ``create_offer``: a freelancer bidding on open jobs
+* ``accept_offer``: clients accepting a pending offer, one job each
+
+Results are compared with a baseline file. A scenario regresses when its
+query count grows, or when its p50 or p95 latency grows by more than that
+percentile's tolerance and by more than ``min_latency_ms``. The p95 of a few
+dozen requests is noisy, so its tolerance is looser. Query counts are the
+same on every machine, latencies are not: save the baseline on the machine
+that runs the check.
+"""
+
+import gc
+import json
+import statistics
+import time
+from dataclasses import dataclass, field
+
+from django.db.models import Count
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from chat.models import Chat, Message
+from common.management.commands.seed_dataset import SCALES, seed_email
+from jobs.models import Job
+from notifications.models import Notification
+from offers.models import Offer
+from payments.models import Payment
+from users.models import User
+
+from .queries import QueryRecorder
+
+# Datasets passed to ``seed_dataset``
+SIZES = {
+    'xs': {'users': 200, 'jobs': 1_000, 'messages': 4_000, 'notifications': 4_000},
+    'small': SCALES['small'],
+    'medium': {'users': 5_000, 'jobs': 50_000, 'messages': 200_000, 'notifications': 200_000},
+}
+# Fixed end of the seeded history, so every run sees the same rows
+SEED_UNTIL = '2026-01-01'
+
+DEFAULT_THRESHOLDS = {
+    # Allowed growth of the latency percentiles, as a fraction of the baseline
+    'p50': 0.5,
+    'p95': 1.0,
+    # Latency growth below this is treated as noise
+    'min_latency_ms': 3.0,
+    # Allowed growth of the queries per request
+    'queries': 0,
+}
+
+
+class BenchmarkError(Exception):
+    """A scenario could not be set up or got an unexpected response"""
+
+
+@dataclass
+class ScenarioResult:
+    """Timed requests of one scenario"""
+
+    name: str
+    latencies: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+
+    def summary(self):
+        ordered = sorted(self.latencies)
+        cuts = statistics.quantiles(ordered, n=100, method='inclusive')
+        return {
+            'requests': len(ordered),
+            'p50_ms': round(cuts[49] * 1000, 2),
+            'p95_ms': round(cuts[94] * 1000, 2),
+            'p99_ms': round(cuts[98] * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2),
+            'mean_ms': round(statistics.fmean(ordered) * 1000, 2),
+            'queries': max(self.queries),
+            'mean_queries': round(statistics.fmean(self.queries), 1),
+        }
+
+
+class ApiBenchmark:
+    """Calls the API through the test client as any user, with a JWT per user"""
+
+    def __init__(self):
+        self.client = Client()
+        self._tokens = {}
+
+    def call(self, method, path, user, data=None, expected_status=None):
+        token = self._tokens.get(user.pk)
+        if token is None:
+            token = self._tokens[user.pk] = str(AccessToken.for_user(user))
+        response = self.client.generic(
+            method, path, json.dumps(data) if data is not None else '',
+            content_type='application/json', headers={'authorization': f'Bearer {token}'},
+        )
+        if expected_status is not None and response.status_code != expected_status:
+            raise BenchmarkError(
+                f'{method} {path} returned {response.status_code}: {response.content[:300]!r}'
+            )
+        return response
+
+
+class Scenario:
+    """One critical path
+
+    ``prepare`` picks the data once; ``request`` returns the
+    ``(method, path, user, data)`` of each timed request and may make
+    untimed calls first.
+    """
+
+    name = None
+    expected_status = 200
+
+    def __init__(self, bench, count):
+        self.bench = bench
+        self.count = count
+        self.prepare()
+
+    def prepare(self):
+        pass
+
+    def request(self, index):
+        raise NotImplementedError
+
+    def require(self, items, what):
+        if len(items) < self.count:
+            raise BenchmarkError(
+                f'{self.name} needs {self.count} {what}, the dataset has {len(items)}; '
+                f'use a larger size or fewer iterations'
+            )
+        return items
+
+
+def _seed_user(role, number=0):
+    return User.objects.get(email=seed_email(role, number))
+
+
+def _busiest(queryset, column):
+    """Value of ``column`` shared by the most rows of ``queryset``"""
+    row = queryset.values(column).annotate(rows=Count('pk')).order_by('-rows', column).first()
+    if row is None:
+        raise BenchmarkError(f'No {queryset.model._meta.verbose_name_plural} in the dataset')
+    return row[column]
+
+
+class JobBoard(Scenario):
+    name = 'job_board'
+
+    def prepare(self):
+        self.user = _seed_user(User.FREELANCER)
+
+    def request(self, index):
+        return 'GET', '/api/jobs/', self.user, None
+
+
+class JobDetail(Scenario):
+    name = 'job_detail'
+
+    def prepare(self):
+        self.user = _seed_user(User.FREELANCER)
+        self.jobs = self.require(
+            list(Job.objects.filter(status=Job.OPEN).order_by('id').values_list('id', flat=True)[:self.count]),
+            'open jobs'
+        )
+
+    def request(self, index):
+        return 'GET', f'/api/jobs/{self.jobs[index]}/', self.user, None
+
+
+class RankedOffers(Scenario):
+    name = 'ranked_offers'
+
+    def prepare(self):
+        # A different job each time, so every request ranks from scratch
+        self.jobs = self.require(
+            list(Job.objects.filter(offers_count__gt=0).select_related('client').order_by('-offers_count', 'id')
+                 [:self.count]),
+            'jobs with offers'
+        )
+
+    def request(self, index):
+        job = self.jobs[index]
+        return 'GET', f'/api/offers/job/{job.pk}/ranked/', job.client, None
+
+
+class JobFeed(Scenario):
+    name = 'job_feed'
+
+    def prepare(self):
+        # A different freelancer each time; a cached feed would be a single cache read
+        self.freelancers = self.require(
+            list(User.objects.filter(role=User.FREELANCER, freelancer_profile__isnull=False).order_by('id')
+                 [:self.count]),
+            'freelancers with a profile'
+        )
+
+    def request(self, index):
+        return 'GET', '/api/jobs/recommended/', self.freelancers[index], None
+
+
+class Notifications(Scenario):
+    name = 'notifications'
+
+    def prepare(self):
+        self.user = User.objects.get(pk=_busiest(Notification.objects.all(), 'user'))
+
+    def request(self, index):
+        return 'GET', '/api/notifications/', self.user, None
+
+
+class PaymentHistory(Scenario):
+    name = 'payment_history'
+
+    def prepare(self):
+        self.user = User.objects.get(pk=_busiest(Payment.objects.all(), 'payer'))
+
+    def request(self, index):
+        return 'GET', '/api/payments/history/', self.user, None
+
+
+class ChatScenario(Scenario):
+    """Base for scenarios on the chat with the most messages"""
+
+    def prepare(self):
+        self.chat = Chat.objects.select_related('client', 'freelancer').get(
+            pk=_busiest(Message.objects.all(), 'chat')
+        )
+
+    def send(self, index):
+        return ('POST', f'/api/chat/{self.chat.pk}/send/', self.chat.freelancer,
+                {'content': f'Benchmark message {index}'})
+
+
+class ChatHistory(ChatScenario):
+    name = 'chat_history'
+
+    def request(self, index):
+        return 'GET', f'/api/chat/{self.chat.pk}/messages/', self.chat.client, None
+
+
+class ChatSend(ChatScenario):
+    name = 'chat_send'
+    expected_status = 201
+
+    def request(self, index):
+        return self.send(index)
+
+
+class ChatMarkRead(ChatScenario):
+    name = 'chat_mark_read'
+
+    def request(self, index):
+        # Always leave something unread for the client
+        method, path, user, data = self.send(index)
+        self.bench.call(method, path, user, data, expected_status=201)
+        return 'POST', f'/api/chat/{self.chat.pk}/mark-read/', self.chat.client, None
+
+
+class CreateOffer(Scenario):
+    name = 'create_offer'
+    expected_status = 201
+
+    def prepare(self):
+        self.user = _seed_user(User.FREELANCER)
+        self.jobs = self.require(
+            list(Job.objects.filter(status=Job.OPEN).exclude(offers__freelancer=self.user)
+                 .order_by('id').values_list('id', flat=True)[:self.count]),
+            'open jobs without an offer'
+        )
+
+    def request(self, index):
+        return 'POST', '/api/offers/create/', self.user, {
+            'job_id': str(self.jobs[index]),
+            'title': 'Benchmark proposal',
+            'description': 'Delivered on time with sources and a plagiarism report.',
+            'delivery_time': 5,
+            'amount': '120.00',
+        }
+
+
+class AcceptOffer(Scenario):
+    name = 'accept_offer'
+
+    def prepare(self):
+        # One offer per job: accepting closes the job to further acceptances
+        self.offers, jobs = [], set()
+        pending = (
+            Offer.objects.filter(status=Offer.PENDING, job__status=Job.OPEN)
+            .select_related('job__client').order_by('job_id', 'created_at')
+        )
+        for offer in pending.iterator():
+            if offer.job_id not in jobs:
+                jobs.add(offer.job_id)
+                self.offers.append(offer)
+                if len(self.offers) == self.count:
+                    break
+        self.require(self.offers, 'open jobs with a pending offer')
+
+    def request(self, index):
+        offer = self.offers[index]
+        return 'POST', f'/api/offers/{offer.pk}/accept/', offer.job.client, None
+
+
+# In run order: reads first, then the writes that change what they would see
+SCENARIOS = [
+    JobBoard, JobDetail, RankedOffers, JobFeed, Notifications, PaymentHistory, ChatHistory, ChatSend, ChatMarkRead,
+    CreateOffer, AcceptOffer,
+]
+
+
+def run_scenario(bench, scenario_class, iterations, warmup=5):
+    """Run ``warmup`` untimed then ``iterations`` timed requests of one scenario"""
+    scenario = scenario_class(bench, warmup + iterations)
+    result = ScenarioResult(scenario.name)
+    for index in range(warmup + iterations):
+        method, path, user, data = scenario.request(index)
+        # Garbage left by earlier requests would otherwise be collected mid-request
+        gc.collect()
+        with QueryRecorder(capture_origin=False) as recorder:
+            start = time.perf_counter()
+            bench.call(method, path, user, data, expected_status=scenario.expected_status)
+            elapsed = time.perf_counter() - start
+        if index >= warmup:
+            result.latencies.append(elapsed)
+            result.queries.append(recorder.count)
+    return result
+
+
+def run_suite(scenarios, iterations, warmup=5):
+    """Summaries of ``scenarios`` against the current database, by scenario name"""
+    bench = ApiBenchmark()
+    return {
+        scenario.name: run_scenario(bench, scenario, iterations, warmup).summary()
+        for scenario in scenarios
+    }
+
+
+def compare(results, baseline, thresholds):
+    """Regressions of ``results`` against ``baseline``, both ``{size: {scenario: summary}}``"""
+    regressions = []
+    for size, scenarios in results.items():
+        for name, current in scenarios.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            if current['queries'] > base['queries'] + thresholds['queries']:
+                regressions.append(
+                    f"{size}/{name}: {current['queries']} queries per request, baseline {base['queries']}"
+                )
+            for percentile in ('p50', 'p95'):
+                key = f'{percentile}_ms'
+                limit = max(base[key] * (1 + thresholds[percentile]),
+                            base[key] + thresholds['min_latency_ms'])
+                if current[key] > limit:
+                    regressions.append(
+                        f"{size}/{name}: {percentile} {current[key]}ms, baseline {base[key]}ms "
+                        f"(limit {limit:.2f}ms)"
+                    )
+    return regressions
@@ -0,0 +1,340 @@
+"""
+Event layer for pushing real-time updates to connected clients.
+
+Application code publishes JSON-serializable events to named groups
+(``user:<id>`` for everything addressed to one user) from ordinary sync
+code, usually with :func:`publish_on_commit`. Long-lived connections
+(WebSockets, event streams) subscribe to groups from the ASGI event loop and
+receive the events in order.
+
+The layer is chosen by the ``EVENT_LAYER`` setting:
+
+* ``common.events.InMemoryEventLayer`` (default) delivers within the
+  current process only, which is enough for a single ASGI worker;
+* ``common.events.RedisEventLayer`` relays events through Redis pub/sub so
+  publishers and subscribers can live in different processes or nodes.
+  ``EVENT_LAYER_URL`` of the form ``local://<name>`` swaps Redis for an
+  in-process stand-in with the same behaviour, for tests and benchmarks.
+
+Events are fire-and-forget: subscribers that are not connected when an
+event is published never see it, so anything that must survive a reconnect
+has to be re-read from the database.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def user_group(user_id):
+    """Group receiving every event addressed to one user"""
+    return f'user:{user_id}'
+
+
+def encode_event(event):
+    return json.dumps(event, cls=DjangoJSONEncoder)
+
+
+class Subscription:
+    """Events delivered to one subscriber, in publish order
+
+    Each subscription buffers up to ``capacity`` events; when a slow
+    consumer falls further behind the oldest events are dropped.
+    """
+
+    def __init__(self, layer, groups, capacity):
+        self.layer = layer
+        self.groups = set(groups)
+        self.capacity = capacity
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.closed = False
+
+    def deliver(self, event):
+        """Queue ``event``; safe to call from any thread"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Event loop already closed; the subscriber is gone
+            pass
+
+    def _put(self, event):
+        if self.queue.qsize() >= self.capacity:
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    async def get_many(self, timeout=None):
+        """Wait up to ``timeout`` seconds for events and return all that are queued"""
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return events
+
+    async def close(self):
+        if not self.closed:
+            self.closed = True
+            await self.layer.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+
+class EventLayer:
+    """Interface implemented by event layers"""
+
+    def publish(self, group, event):
+        """Send ``event`` to every subscriber of ``group``; callable from sync code"""
+        raise NotImplementedError
+
+    async def subscribe(self, groups, capacity=100):
+        """Return a :class:`Subscription` receiving events for ``groups``"""
+        raise NotImplementedError
+
+    async def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InMemoryEventLayer(EventLayer):
+    """Delivers events to subscribers in the current process"""
+
+    def __init__(self, **options):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, group, event):
+        self.dispatch(group, event)
+
+    def dispatch(self, group, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(group, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return len(subscribers)
+
+    async def subscribe(self, groups, capacity=100):
+        subscription = Subscription(self, groups, capacity)
+        with self._lock:
+            for group in subscription.groups:
+                self._subscribers[group].add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        self._remove(subscription)
+
+    def _remove(self, subscription):
+        """Detach ``subscription``; returns the groups left without subscribers"""
+        emptied = []
+        with self._lock:
+            for group in subscription.groups:
+                subscribers = self._subscribers.get(group)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[group]
+                    emptied.append(group)
+        return emptied
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class RedisEventLayer(InMemoryEventLayer):
+    """Relays events between processes through Redis pub/sub
+
+    Each process holds a single pub/sub connection, subscribed to the union
+    of its local subscribers' groups, and fans incoming events out locally,
+    so the number of Redis connections does not grow with client count.
+    """
+
+    def __init__(self, url=None, prefix='workvix:events:', **options):
+        super().__init__(**options)
+        self.url = url or getattr(settings, 'EVENT_LAYER_URL', '') or settings.CELERY_BROKER_URL
+        self.prefix = prefix
+        self._publisher = None
+        self._pubsub = None
+        self._reader = None
+        self._pubsub_lock = None
+
+    # Clients are created lazily so importing the layer never needs Redis
+
+    def _sync_client(self):
+        if self._publisher is None:
+            if self.url.startswith('local://'):
+                self._publisher = LocalRedis(self.url)
+            else:
+                import redis
+                self._publisher = redis.Redis.from_url(self.url)
+        return self._publisher
+
+    async def _async_pubsub(self):
+        if self._pubsub is None:
+            if self.url.startswith('local://'):
+                self._pubsub = LocalRedis(self.url).pubsub()
+            else:
+                import redis.asyncio
+                self._pubsub = redis.asyncio.Redis.from_url(self.url).pubsub()
+        return self._pubsub
+
+    def publish(self, group, event):
+        self._sync_client().publish(self.prefix + group, encode_event(event))
+
+    async def subscribe(self, groups, capacity=100):
+        if self._pubsub_lock is None:
+            self._pubsub_lock = asyncio.Lock()
+        subscription = Subscription(self, groups, capacity)
+        with self._lock:
+            new_groups = [group for group in subscription.groups if group not in self._subscribers]
+            for group in subscription.groups:
+                self._subscribers[group].add(subscription)
+        if new_groups:
+            async with self._pubsub_lock:
+                pubsub = await self._async_pubsub()
+                await pubsub.subscribe(*(self.prefix + group for group in new_groups))
+                if self._reader is None or self._reader.done():
+                    self._reader = asyncio.create_task(self._read())
+        return subscription
+
+    async def unsubscribe(self, subscription):
+        emptied = self._remove(subscription)
+        if emptied and self._pubsub is not None:
+            async with self._pubsub_lock:
+                await self._pubsub.unsubscribe(*(self.prefix + group for group in emptied))
+
+    async def _read(self):
+        while True:
+            if not self._pubsub.subscribed:
+                # Every local subscriber left; Redis refuses to read until we resubscribe
+                await asyncio.sleep(0.5)
+                continue
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event layer lost its pub/sub connection; retrying")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message.get('type') != 'message':
+                continue
+            channel = message['channel']
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                event = json.loads(message['data'])
+            except (TypeError, ValueError):
+                logger.warning("Dropping malformed event on %s", channel)
+                continue
+            self.dispatch(channel[len(self.prefix):], event)
+
+
+class LocalRedis:
+    """In-process stand-in for the subset of Redis pub/sub the layer uses
+
+    All instances created with the same ``local://`` URL share one broker,
+    so several :class:`RedisEventLayer` objects behave like processes
+    connected to the same Redis server. Messages are delivered as JSON
+    strings, exactly as they would be over the wire.
+    """
+
+    _brokers = defaultdict(lambda: defaultdict(set))
+    _lock = threading.Lock()
+
+    def __init__(self, url):
+        self.channels = self._brokers[url]
+
+    def publish(self, channel, data):
+        with self._lock:
+            receivers = list(self.channels.get(channel, ()))
+        for pubsub in receivers:
+            pubsub.deliver(channel, data)
+        return len(receivers)
+
+    def pubsub(self):
+        return LocalPubSub(self)
+
+
+class LocalPubSub:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.subscribed = set()
+
+    def deliver(self, channel, data):
+        message = {'type': 'message', 'channel': channel, 'data': data}
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            pass
+
+    async def subscribe(self, *channels):
+        with self.redis._lock:
+            for channel in channels:
+                self.redis.channels[channel].add(self)
+                self.subscribed.add(channel)
+
+    async def unsubscribe(self, *channels):
+        with self.redis._lock:
+            for channel in channels:
+                self.redis.channels[channel].discard(self)
+                self.subscribed.discard(channel)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        await self.unsubscribe(*list(self.subscribed))
+
+
+@lru_cache(maxsize=None)
+def get_event_layer():
+    """Return the configured :class:`EventLayer` instance"""
+    path = getattr(settings, 'EVENT_LAYER', '') or 'common.events.InMemoryEventLayer'
+    return import_string(path)()
+
+
+def publish(group, event):
+    """Publish now, logging instead of raising if the layer is unavailable"""
+    try:
+        get_event_layer().publish(group, event)
+    except Exception:
+        logger.exception("Failed to publish %s event to %s", event.get('type'), group)
+
+
+def publish_on_commit(groups, event):
+    """Publish ``event`` to each of ``groups`` once the current transaction commits"""
+    def send():
+        for group in groups:
+            publish(group, event)
+    transaction.on_commit(send)
@@ -0,0 +1,321 @@
+"""
+Load generation against a running server.
+
+``manage.py load_test`` starts Gunicorn with ``gunicorn_config.py`` on a
+local port (or targets ``--url``), logs in a pool of the accounts created by
+``seed_dataset`` and then starts user sessions as Poisson arrivals at the
+configured rates:
+
+* client sessions check their jobs, sometimes post a new one, review the
+  offers on an open job and sometimes accept one
+* freelancer sessions browse or search the job board, read a few jobs and
+  sometimes bid on one
+* chat bursts open the inbox and send several messages into one
+  conversation in quick succession, then mark it read
+
+Sessions pause between steps for an exponentially distributed think time.
+Arrivals are open-loop: a session arriving while ``max_sessions`` are
+already running is dropped and counted, which is how saturation shows up
+besides latency.
+
+Per endpoint the run reports throughput, latency percentiles and error
+rates. ``4xx`` responses are rejected requests (bidding twice on a job,
+accepting an offer someone else just accepted); errors are 5xx responses,
+timeouts and connection failures.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .metrics import _percentile
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TERMS = ['essay', 'analysis', 'python', 'report', 'statistics', 'research', 'design']
+
+
+@dataclass
+class Account:
+    email: str
+    role: str
+    token: str
+
+
+@dataclass
+class EndpointStats:
+    """Outcomes of one endpoint"""
+
+    latencies: list = field(default_factory=list)
+    client_errors: int = 0
+    errors: int = 0
+
+
+class LoadStats:
+    """Thread-safe request and session counters of a run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = defaultdict(EndpointStats)
+        self.sessions = defaultdict(Counter)
+
+    def record(self, endpoint, latency, status):
+        with self._lock:
+            stats = self.endpoints[endpoint]
+            stats.latencies.append(latency)
+            if status is None or status >= 500:
+                stats.errors += 1
+            elif status >= 400:
+                stats.client_errors += 1
+
+    def session(self, kind, outcome):
+        with self._lock:
+            self.sessions[kind][outcome] += 1
+
+    def summary(self, elapsed):
+        with self._lock:
+            endpoints = {}
+            for name, stats in sorted(self.endpoints.items(), key=lambda item: -len(item[1].latencies)):
+                ordered = sorted(stats.latencies)
+                count = len(ordered)
+                endpoints[name] = {
+                    'requests': count,
+                    'requests_per_second': round(count / elapsed, 2),
+                    'p50_ms': round(_percentile(ordered, 0.5) * 1000, 1),
+                    'p95_ms': round(_percentile(ordered, 0.95) * 1000, 1),
+                    'p99_ms': round(_percentile(ordered, 0.99) * 1000, 1),
+                    'max_ms': round(ordered[-1] * 1000, 1),
+                    'client_error_rate': round(stats.client_errors / count, 4),
+                    'error_rate': round(stats.errors / count, 4),
+                }
+            total = sum(len(stats.latencies) for stats in self.endpoints.values())
+            errors = sum(stats.errors for stats in self.endpoints.values())
+            return {
+                'elapsed_seconds': round(elapsed, 1),
+                'requests': total,
+                'requests_per_second': round(total / elapsed, 2),
+                'error_rate': round(errors / total, 4) if total else 0,
+                'sessions': {kind: dict(outcomes) for kind, outcomes in sorted(self.sessions.items())},
+                'endpoints': endpoints,
+            }
+
+
+def _call(base_url, method, path, data=None, token=None, timeout=30):
+    """``(status, payload)`` of one request; status is None if no response arrived"""
+    headers = {'Accept': 'application/json', 'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    body = json.dumps(data).encode() if data is not None else None
+    request = urllib.request.Request(base_url + path, data=body, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, content = response.status, response.read()
+    except urllib.error.HTTPError as e:
+        status, content = e.code, e.read()
+    except OSError:
+        return None, None
+    try:
+        return status, json.loads(content) if content else {}
+    except ValueError:
+        return status, None
+
+
+def login(base_url, email, password, role, timeout=30):
+    """Log ``email`` in; returns an :class:`Account` or None"""
+    status, payload = _call(base_url, 'POST', '/api/users/login/',
+                            {'email': email, 'password': password}, timeout=timeout)
+    if status != 200 or not payload:
+        return None
+    return Account(email, role, payload['tokens']['access'])
+
+
+def wait_until_up(base_url, timeout, alive=lambda: True):
+    """Wait for the server to answer any HTTP request; False on timeout or if not ``alive()``"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and alive():
+        status, _ = _call(base_url, 'GET', '/api/jobs/', timeout=2)
+        if status is not None:
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def _results(payload):
+    """Items of a paginated or plain list response"""
+    if isinstance(payload, dict):
+        return payload.get('results') or []
+    return payload or []
+
+
+class Session:
+    """One simulated user: requests as ``account``, recorded in ``stats``"""
+
+    def __init__(self, base_url, account, stats, rng, think_time, timeout):
+        self.base_url = base_url
+        self.account = account
+        self.stats = stats
+        self.rng = rng
+        self.think_time = think_time
+        self.timeout = timeout
+
+    def request(self, endpoint, method, path, data=None):
+        """JSON payload of a successful response, or None"""
+        start = time.perf_counter()
+        status, payload = _call(self.base_url, method, path, data, self.account.token, self.timeout)
+        self.stats.record(endpoint, time.perf_counter() - start, status)
+        if status is None or status >= 400:
+            return None
+        return payload
+
+    def think(self):
+        if self.think_time:
+            time.sleep(self.rng.expovariate(1 / self.think_time))
+
+
+def client_session(session):
+    rng = session.rng
+    jobs = _results(session.request('jobs.my_jobs', 'GET', '/api/jobs/my-jobs/'))
+    session.think()
+    if rng.random() < 0.3:
+        budget = rng.randint(20, 300)
+        session.request('jobs.create', 'POST', '/api/jobs/create/', {
+            'title': f'{rng.choice(SEARCH_TERMS).title()} assignment',
+            'description': 'Load test job. Needs a well researched answer with references.',
+            'assignment_type': 'academic_writing',
+            'deadline': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() + 7 * 86400)),
+            'budget_min': budget,
+            'budget_max': budget + rng.randint(10, 200),
+        })
+        session.think()
+
+    open_jobs = [job for job in jobs if job.get('status') == 'open']
+    if open_jobs:
+        job = rng.choice(open_jobs)
+        payload = session.request('offers.job_offers', 'GET', f"/api/offers/job/{job['id']}/")
+        session.think()
+        pending = [offer for offer in (payload or {}).get('offers', []) if offer.get('status') == 'pending']
+        if pending and rng.random() < 0.3:
+            session.request('offers.accept', 'POST', f"/api/offers/{rng.choice(pending)['id']}/accept/")
+            session.think()
+
+    session.request('notifications.list', 'GET', '/api/notifications/')
+    session.request('chat.unread_count', 'GET', '/api/chat/unread-count/')
+
+
+def freelancer_session(session):
+    rng = session.rng
+    if rng.random() < 0.3:
+        jobs = _results(session.request('jobs.search', 'GET', f'/api/jobs/?search={rng.choice(SEARCH_TERMS)}'))
+    else:
+        jobs = _results(session.request('jobs.list', 'GET', '/api/jobs/'))
+    for job in rng.sample(jobs, min(len(jobs), rng.randint(1, 3))):
+        session.think()
+        session.request('jobs.detail', 'GET', f"/api/jobs/{job['id']}/")
+
+    if jobs and rng.random() < 0.4:
+        session.think()
+        session.request('offers.create', 'POST', '/api/offers/create/', {
+            'job_id': rng.choice(jobs)['id'],
+            'title': 'Proposal',
+            'description': 'I can deliver this on time with sources and a plagiarism report.',
+            'delivery_time': rng.randint(1, 10),
+            'amount': str(rng.randint(20, 300)),
+        })
+
+    session.think()
+    session.request('offers.list', 'GET', '/api/offers/')
+    session.request('notifications.unread_count', 'GET', '/api/notifications/unread-count/')
+
+
+def chat_burst(session):
+    rng = session.rng
+    chats = _results(session.request('chat.list', 'GET', '/api/chat/'))
+    if not chats:
+        return
+    chat_id = rng.choice(chats)['id']
+    session.request('chat.messages', 'GET', f'/api/chat/{chat_id}/messages/')
+    for index in range(rng.randint(3, 10)):
+        # Typing quickly: much shorter pauses than between pages
+        time.sleep(rng.uniform(0.05, 0.5))
+        session.request('chat.send', 'POST', f'/api/chat/{chat_id}/send/',
+                        {'content': f'Quick follow-up {index + 1}'})
+    session.request('chat.mark_read', 'POST', f'/api/chat/{chat_id}/mark-read/')
+
+
+# Session kind: (script, roles whose accounts run it)
+SESSION_KINDS = {
+    'client': (client_session, ('client',)),
+    'freelancer': (freelancer_session, ('freelancer',)),
+    'chat_burst': (chat_burst, ('client', 'freelancer')),
+}
+
+
+class LoadRun:
+    """Poisson arrivals of sessions for ``duration`` seconds
+
+    ``rates`` maps session kinds to arrivals per second.
+    """
+
+    def __init__(self, base_url, accounts, rates, duration, max_sessions=200,
+                 think_time=1.0, timeout=30, seed=1):
+        self.base_url = base_url
+        self.accounts = defaultdict(list)
+        for account in accounts:
+            self.accounts[account.role].append(account)
+        self.rates = {kind: rate for kind, rate in rates.items() if rate > 0}
+        self.duration = duration
+        self.max_sessions = max_sessions
+        self.think_time = think_time
+        self.timeout = timeout
+        self.seed = seed
+        self.stats = LoadStats()
+
+    def run(self):
+        """Run to completion and return the summary"""
+        rng = random.Random(self.seed)
+        kinds = list(self.rates)
+        weights = [self.rates[kind] for kind in kinds]
+        total_rate = sum(weights)
+        slots = threading.BoundedSemaphore(self.max_sessions)
+
+        start = time.monotonic()
+        end = start + self.duration
+        arrival = start
+        number = 0
+        with ThreadPoolExecutor(max_workers=self.max_sessions, thread_name_prefix='load-session') as pool:
+            while total_rate:
+                # A merged Poisson process, each arrival labelled by its rate's share
+                arrival += rng.expovariate(total_rate)
+                if arrival >= end:
+                    break
+                time.sleep(max(0.0, arrival - time.monotonic()))
+                kind = rng.choices(kinds, weights)[0]
+                if not slots.acquire(blocking=False):
+                    self.stats.session(kind, 'dropped')
+                    continue
+                number += 1
+                pool.submit(self._session, kind, random.Random(self.seed * 1_000_003 + number), slots)
+        return self.stats.summary(time.monotonic() - start)
+
+    def _session(self, kind, rng, slots):
+        script, roles = SESSION_KINDS[kind]
+        try:
+            pool = [account for role in roles for account in self.accounts[role]]
+            if not pool:
+                self.stats.session(kind, 'skipped')
+                return
+            session = Session(self.base_url, rng.choice(pool), self.stats, rng, self.think_time, self.timeout)
+            script(session)
+            self.stats.session(kind, 'completed')
+        except Exception:
+            logger.exception('%s session failed', kind)
+            self.stats.session(kind, 'failed')
+        finally:
+            slots.release()
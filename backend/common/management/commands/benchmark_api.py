@@ -0,0 +1,141 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from jobs.view_counter import job_view_buffer
+
+from common.benchmarks import (
+    DEFAULT_THRESHOLDS, SCENARIOS, SEED_UNTIL, SIZES, BenchmarkError, compare, run_suite,
+)
+
+COLUMNS = ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'queries')
+
+
+def _names(value, known, what):
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        raise CommandError(f"Unknown {what}: {', '.join(unknown)}; choose from {', '.join(known)}")
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the critical API paths in-process: seed a fresh test database '
+        'at each size, run every scenario through the test client and report '
+        'latency percentiles and queries per request. Exits with an error when a '
+        'scenario regresses against the baseline file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='xs,small', help=f"Comma-separated: {', '.join(SIZES)}")
+        parser.add_argument('--scenarios', help=f"Comma-separated subset of: "
+                                                f"{', '.join(scenario.name for scenario in SCENARIOS)}")
+        parser.add_argument('--iterations', type=int, default=50, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per scenario')
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmark_baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Store the results in the baseline instead of comparing')
+        parser.add_argument('--output', help='Also write the results to this JSON file')
+        parser.add_argument('--p50-tolerance', type=float,
+                            help='Allowed p50 growth as a fraction, overrides the baseline')
+        parser.add_argument('--p95-tolerance', type=float,
+                            help='Allowed p95 growth as a fraction, overrides the baseline')
+        parser.add_argument('--min-latency-ms', type=float,
+                            help='p95 growth always allowed, overrides the baseline')
+        parser.add_argument('--query-tolerance', type=int,
+                            help='Allowed growth of queries per request, overrides the baseline')
+
+    def handle(self, *args, **options):
+        sizes = _names(options['sizes'], list(SIZES), 'sizes')
+        by_name = {scenario.name: scenario for scenario in SCENARIOS}
+        scenarios = SCENARIOS
+        if options['scenarios']:
+            scenarios = [by_name[name] for name in _names(options['scenarios'], list(by_name), 'scenarios')]
+        if options['iterations'] < 2:
+            raise CommandError('--iterations must be at least 2')
+
+        path = Path(options['baseline'])
+        baseline = json.loads(path.read_text()) if path.exists() else {}
+        thresholds = {**DEFAULT_THRESHOLDS, **baseline.get('thresholds', {})}
+        for key, option in (('p50', 'p50_tolerance'), ('p95', 'p95_tolerance'),
+                            ('min_latency_ms', 'min_latency_ms'), ('queries', 'query_tolerance')):
+            if options[option] is not None:
+                thresholds[key] = options[option]
+
+        results = {}
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            for index, size in enumerate(sizes):
+                if index:
+                    call_command('flush', interactive=False, verbosity=0)
+                results[size] = self._run_size(size, scenarios, options)
+                self._print(size, results[size], baseline.get('results', {}).get(size, {}))
+        except BenchmarkError as e:
+            raise CommandError(str(e))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'thresholds': thresholds,
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'results': results,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+
+        if options['save_baseline']:
+            # Keep the sizes that were not run this time
+            report['results'] = {**baseline.get('results', {}), **results}
+            path.write_text(json.dumps(report, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {path}'))
+            return
+        if not baseline:
+            self.stdout.write(self.style.WARNING(f'No baseline at {path}; create one with --save-baseline'))
+            return
+
+        regressions = compare(results, baseline['results'], thresholds)
+        for regression in regressions:
+            self.stderr.write(regression)
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) against {path}')
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}'))
+
+    def _run_size(self, size, scenarios, options):
+        self.stdout.write(f'Seeding the {size} dataset...')
+        for cache in caches.all():
+            cache.clear()
+        call_command('seed_dataset', until=SEED_UNTIL, stdout=StringIO(), **SIZES[size])
+        # Background work runs inline so every run does the same work, and
+        # buffered job views are written once at the end rather than from a
+        # thread. Queries are counted by the benchmark itself. Everything runs
+        # in this process, so its local memory cache is as good as shared.
+        with override_settings(BACKGROUND_TASKS_EAGER=True, QUERY_BUDGET_ENABLED=False,
+                               CACHE_SHARED=True,
+                               JOB_VIEW_FLUSH_INTERVAL=float('inf'), JOB_VIEW_FLUSH_THRESHOLD=float('inf')):
+            try:
+                return run_suite(scenarios, options['iterations'], options['warmup'])
+            finally:
+                job_view_buffer.flush()
+
+    def _print(self, size, results, baseline):
+        header = f'{size:<18}' + ''.join(f'{column:>10}' for column in COLUMNS)
+        self.stdout.write(f"\n{header}{'p50 vs':>10}{'p95 vs':>10}")
+        for name, summary in results.items():
+            line = f'  {name:<16}' + ''.join(f'{summary[column]:>10}' for column in COLUMNS)
+            base = baseline.get(name)
+            if base:
+                for key in ('p50_ms', 'p95_ms'):
+                    line += f'{(summary[key] / base[key] - 1) * 100:>+9.0f}%' if base[key] else f"{'':>10}"
+            self.stdout.write(line)
+        self.stdout.write('')
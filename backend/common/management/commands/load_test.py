@@ -0,0 +1,138 @@
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from common.loadtest import SESSION_KINDS, LoadRun, login, wait_until_up
+from common.management.commands.seed_dataset import seed_email
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate role-aware traffic against a locally started Gunicorn server '
+        '(gunicorn_config.py) or --url, and report throughput, tail latency and '
+        'error rates per endpoint. Uses the accounts created by seed_dataset.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Target a running server instead of starting one')
+        parser.add_argument('--port', type=int, default=8765, help='Port of the local server')
+        parser.add_argument('--workers', type=int, help='Override the Gunicorn worker count')
+        parser.add_argument('--server-log', default=str(Path(settings.BASE_DIR) / 'logs' / 'load_test_server.log'))
+        parser.add_argument('--duration', type=float, default=60, help='Seconds of arrivals')
+        parser.add_argument('--client-rate', type=float, default=1.0, help='Client sessions per second')
+        parser.add_argument('--freelancer-rate', type=float, default=2.0, help='Freelancer sessions per second')
+        parser.add_argument('--chat-rate', type=float, default=0.5, help='Chat bursts per second')
+        parser.add_argument('--think-time', type=float, default=1.0, help='Mean pause between steps, seconds')
+        parser.add_argument('--max-sessions', type=int, default=200,
+                            help='Concurrent sessions; arrivals beyond it are dropped')
+        parser.add_argument('--clients', type=int, default=50, help='Seeded client accounts to use')
+        parser.add_argument('--freelancers', type=int, default=100, help='Seeded freelancer accounts to use')
+        parser.add_argument('--password', default='seed-password', help='Password given to seed_dataset')
+        parser.add_argument('--timeout', type=float, default=30, help='Request timeout, seconds')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Also write the report to this JSON file')
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            self.stdout.write(self.style.WARNING('DEBUG is on; numbers will not match production'))
+
+        with self._server(options) as base_url:
+            accounts = self._login(base_url, options)
+            rates = {
+                'client': options['client_rate'],
+                'freelancer': options['freelancer_rate'],
+                'chat_burst': options['chat_rate'],
+            }
+            self.stdout.write(
+                f"Running {options['duration']:.0f}s of arrivals against {base_url}: "
+                + ', '.join(f'{kind} {rate}/s' for kind, rate in rates.items())
+            )
+            report = LoadRun(
+                base_url, accounts, rates, options['duration'], max_sessions=options['max_sessions'],
+                think_time=options['think_time'], timeout=options['timeout'], seed=options['seed'],
+            ).run()
+
+        self._print(report)
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+
+    @contextmanager
+    def _server(self, options):
+        if options['url']:
+            yield options['url'].rstrip('/')
+            return
+
+        base_url = f"http://127.0.0.1:{options['port']}"
+        command = [
+            sys.executable, '-m', 'gunicorn', 'workvix_project.wsgi:application',
+            '--config', str(Path(settings.BASE_DIR) / 'gunicorn_config.py'),
+            '--bind', f"127.0.0.1:{options['port']}",
+        ]
+        if options['workers']:
+            command += ['--workers', str(options['workers'])]
+
+        log_path = Path(options['server_log'])
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, 'w') as log:
+            server = subprocess.Popen(command, cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT,
+                                      env=os.environ.copy())
+            try:
+                if not wait_until_up(base_url, timeout=60, alive=lambda: server.poll() is None):
+                    raise CommandError(f'The server did not start; see {log_path}')
+                self.stdout.write(f'Server up at {base_url} (log: {log_path})')
+                yield base_url
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+    def _login(self, base_url, options):
+        wanted = [(seed_email(User.CLIENT, number), User.CLIENT) for number in range(options['clients'])]
+        wanted += [(seed_email(User.FREELANCER, number), User.FREELANCER)
+                   for number in range(options['freelancers'])]
+        self.stdout.write(f'Logging in {len(wanted)} seeded accounts...')
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            accounts = list(pool.map(
+                lambda item: login(base_url, item[0], options['password'], item[1], options['timeout']), wanted
+            ))
+        accounts = [account for account in accounts if account is not None]
+        roles = {account.role for account in accounts}
+        for kind, (_, needed) in SESSION_KINDS.items():
+            if not roles.intersection(needed):
+                raise CommandError(
+                    f'No {" or ".join(needed)} account could log in; seed the database with '
+                    f'seed_dataset and pass its --password'
+                )
+        if len(accounts) < len(wanted):
+            self.stdout.write(self.style.WARNING(f'Only {len(accounts)} of {len(wanted)} accounts logged in'))
+        return accounts
+
+    def _print(self, report):
+        self.stdout.write(
+            f"\n{report['requests']} requests in {report['elapsed_seconds']}s, "
+            f"{report['requests_per_second']} req/s, {report['error_rate']:.2%} errors"
+        )
+        for kind, outcomes in report['sessions'].items():
+            self.stdout.write(f'  {kind:<12} ' + ', '.join(f'{count} {outcome}' for outcome, count in outcomes.items()))
+
+        columns = ('requests', 'requests_per_second', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+        self.stdout.write(
+            f"\n{'endpoint':<28}{'requests':>10}{'req/s':>9}{'p50_ms':>9}{'p95_ms':>9}"
+            f"{'p99_ms':>9}{'max_ms':>9}{'4xx':>8}{'errors':>8}"
+        )
+        for name, stats in report['endpoints'].items():
+            values = [stats[column] for column in columns]
+            self.stdout.write(
+                f'{name:<28}{values[0]:>10}{values[1]:>9}' + ''.join(f'{value:>9}' for value in values[2:])
+                + f"{stats['client_error_rate']:>8.1%}{stats['error_rate']:>8.1%}"
+            )
@@ -0,0 +1,499 @@
+import bisect
+import itertools
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from chat.models import PREVIEW_LENGTH, Chat, ChatParticipant, Message
+from jobs.models import Job
+from notifications.models import Notification
+from offers.counts import reconcile_offer_counts
+from offers.models import Offer
+from orders.models import Order
+from payments.models import Payment, Transaction
+from users.models import FreelancerProfile, FreelancerSkill, User
+from users.skills import get_or_create_skills
+
+SEED_EMAIL_DOMAIN = 'seed.workvix.test'
+
+SCALES = {
+    'small': {'users': 1_000, 'jobs': 5_000, 'messages': 20_000, 'notifications': 20_000},
+    'medium': {'users': 10_000, 'jobs': 100_000, 'messages': 500_000, 'notifications': 1_000_000},
+    'large': {'users': 100_000, 'jobs': 1_000_000, 'messages': 5_000_000, 'notifications': 10_000_000},
+}
+
+FIRST_NAMES = [
+    'Amina', 'Brian', 'Chen', 'Daniel', 'Esther', 'Fatima', 'Grace', 'Hassan', 'Ivan', 'Joy',
+    'Kevin', 'Lina', 'Mary', 'Njeri', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Samuel', 'Tariq',
+]
+LAST_NAMES = [
+    'Achieng', 'Brown', 'Chowdhury', 'Diaz', 'Evans', 'Fischer', 'Garcia', 'Hughes', 'Ito',
+    'Kamau', 'Lopez', 'Mutua', 'Novak', 'Otieno', 'Patel', 'Rossi', 'Smith', 'Wanjiru',
+]
+SUBJECTS = [
+    'economics', 'history', 'nursing', 'psychology', 'marketing', 'biology', 'chemistry',
+    'finance', 'literature', 'sociology', 'statistics', 'law', 'philosophy', 'physics',
+    'management', 'accounting', 'education', 'engineering', 'python', 'javascript',
+]
+SKILLS = [
+    'Academic Writing', 'APA Formatting', 'Research', 'Editing', 'Proofreading', 'Python',
+    'Django', 'JavaScript', 'React', 'SQL', 'Excel', 'SPSS', 'Data Analysis', 'Statistics',
+    'Copywriting', 'SEO', 'Presentation Design', 'Translation', 'Accounting', 'Nursing',
+]
+WORDS = (
+    'analysis report essay research paper draft review case study data model design plan '
+    'summary outline thesis chapter source reference literature method result discussion '
+    'conclusion table chart figure argument evidence structure format deadline quality '
+    'original citation topic question answer project code test feature page section'
+).split()
+
+# Share of jobs per status, and whether a job in that status has been awarded
+JOB_STATUSES = [
+    (Job.OPEN, 0.40), (Job.CLOSED, 0.08), (Job.IN_PROGRESS, 0.17),
+    (Job.COMPLETED, 0.30), (Job.CANCELLED, 0.05),
+]
+AWARDED = {Job.IN_PROGRESS, Job.COMPLETED}
+NOTIFICATION_TYPES = [choice for choice, _ in Notification.TYPE_CHOICES]
+
+# Masks turning 128 random bits into a version 4 UUID
+UUID4_CLEAR = ~((0xc000 << 48) | (0xf000 << 64))
+UUID4_SET = (0x8000 << 48) | (4 << 76)
+
+SEEDED_MODELS = [
+    User, FreelancerProfile, FreelancerSkill, Job, Offer, Chat, ChatParticipant, Message,
+    Order, Payment, Transaction, Notification,
+]
+
+
+def seed_email(role, number):
+    """Address of the ``number``-th seeded user with ``role``, counting from 0"""
+    return f'{role}-{number}@{SEED_EMAIL_DOMAIN}'
+
+
+def _adapter(field):
+    """Function turning a Python value into the database value for ``field``, or None if as-is"""
+    target = field.target_field if field.is_relation else field
+    internal = target.get_internal_type()
+    if internal == 'UUIDField':
+        # Generated ids are already hex strings, which every backend accepts
+        if connection.features.has_native_uuid_field:
+            return None
+        return lambda value: value.hex if isinstance(value, uuid.UUID) else value
+    if internal == 'DateTimeField' and connection.vendor == 'sqlite':
+        return _sqlite_datetime
+    if internal == 'JSONField':
+        # Bound once: every attribute access on ``connection`` goes through a thread-local
+        adapt_json = connection.ops.adapt_json_value
+        return lambda value: adapt_json(value, field.encoder)
+    if internal in ('CharField', 'TextField', 'EmailField', 'BooleanField', 'IntegerField',
+                    'PositiveIntegerField', 'DecimalField'):
+        return None
+    return lambda value: field.get_db_prep_save(value, connection)
+
+
+def _sqlite_datetime(value):
+    # Same text as Django's SQLite adapter, without its per-value overhead
+    if value is None:
+        return None
+    if value.tzinfo is not dt_timezone.utc:
+        value = value.astimezone(dt_timezone.utc)
+    return value.isoformat(' ')[:-6]
+
+
+class _Writer:
+    """Buffered multi-row INSERT into one model's table, bypassing model instances
+
+    Rows are tuples of Python values in ``fields`` order (attnames for
+    foreign keys); every other column gets the field default.
+    """
+
+    def __init__(self, model, fields, batch_size):
+        meta = model._meta
+        self.model = model
+        self.batch_size = batch_size
+        self.fields = [meta.get_field(name) for name in fields]
+        given = {field.attname for field in self.fields}
+        rest = [field for field in meta.concrete_fields if field.attname not in given]
+        for field in rest:
+            if not field.has_default() and not field.null and not field.blank:
+                raise CommandError(f'{meta.label}.{field.name} needs a value')
+
+        self.adapters = [(index, adapt) for index, adapt in enumerate(map(_adapter, self.fields)) if adapt]
+        self.constants = [field.get_db_prep_save(field.get_default(), connection) for field in rest]
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in self.fields + rest)
+        placeholders = ', '.join(['%s'] * (len(self.fields) + len(rest)))
+        self.sql = f'INSERT INTO {connection.ops.quote_name(meta.db_table)} ({columns}) VALUES ({placeholders})'
+        self.rows = []
+        self.count = 0
+        self.elapsed = 0.0
+
+    def add(self, *values):
+        self.rows.append(values)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        start = time.perf_counter()
+        # Convert column by column so the per-value work stays in C where possible
+        columns = list(zip(*self.rows))
+        for index, adapt in self.adapters:
+            columns[index] = map(adapt, columns[index])
+        columns.extend(itertools.repeat(value) for value in self.constants)
+        with connection.cursor() as cursor:
+            cursor.executemany(self.sql, list(zip(*columns)))
+        self.count += len(self.rows)
+        self.rows = []
+        self.elapsed += time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a reproducible, production-shaped dataset across all apps: '
+        'users and freelancer profiles, jobs, offers with their chats and '
+        'messages, orders, payments and notifications. The same --seed and '
+        '--until produce the same rows. Meant for a fresh database; seeded '
+        f'users are client-N@{SEED_EMAIL_DOMAIN} and freelancer-N@{SEED_EMAIL_DOMAIN}, '
+        'numbered from 0, and share --password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--users', type=int, help='Override the scale')
+        parser.add_argument('--jobs', type=int, help='Override the scale')
+        parser.add_argument('--messages', type=int, help='Approximate total, overrides the scale')
+        parser.add_argument('--notifications', type=int, help='Override the scale')
+        parser.add_argument('--freelancer-share', type=float, default=0.7)
+        parser.add_argument('--offers-per-job', type=float, default=2.5,
+                            help='Mean offers per job')
+        parser.add_argument('--days', type=int, default=365, help='Length of the simulated history')
+        parser.add_argument('--until', help='End of the history (YYYY-MM-DD), default today')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password', default='seed-password')
+        parser.add_argument('--skip-search-index', action='store_true',
+                            help='Do not rebuild the job search index afterwards')
+
+    def handle(self, *args, **options):
+        sizes = dict(SCALES[options['scale']])
+        for name in sizes:
+            if options[name] is not None:
+                sizes[name] = options[name]
+        if User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').exists():
+            raise CommandError('This database has already been seeded; use a fresh database')
+
+        until = options['until']
+        until = datetime.strptime(until, '%Y-%m-%d').date() if until else timezone.now().date()
+        self.end = datetime.combine(until, dt_time.min, tzinfo=dt_timezone.utc)
+        self.start = self.end - timedelta(days=options['days'])
+        self.span = (self.end - self.start).total_seconds()
+        self.rng = random.Random(options['seed'])
+        self.words = self.rng.choices(WORDS, k=1 << 16)
+        self.options = options
+        self.sizes = sizes
+
+        self.stdout.write(
+            f"Seeding {sizes['users']} users, {sizes['jobs']} jobs, ~{sizes['messages']} messages, "
+            f"{sizes['notifications']} notifications (seed {options['seed']})"
+        )
+        started = time.perf_counter()
+        with self._bulk_load():
+            self._phase('users', self._seed_users)
+            self._phase('jobs', self._seed_jobs)
+            self._phase('offers, chats, messages, orders, payments', self._seed_engagement)
+            self._phase('notifications', self._seed_notifications)
+        # Job rows are written before their offers, counting the withdrawn ones too
+        start = time.perf_counter()
+        reconcile_offer_counts()
+        self.stdout.write(f'offer counts: {time.perf_counter() - start:.1f}s')
+        start = time.perf_counter()
+        call_command('rebuild_job_skill_vectors', stdout=self.stdout)
+        self.stdout.write(f'job skill vectors: {time.perf_counter() - start:.1f}s')
+        if not options['skip_search_index']:
+            start = time.perf_counter()
+            call_command('rebuild_job_search_index', stdout=self.stdout)
+            self.stdout.write(f'job search index: {time.perf_counter() - start:.1f}s')
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.1f}s'))
+
+    # --- Helpers ---------------------------------------------------------------
+
+    @contextmanager
+    def _bulk_load(self):
+        """Skip foreign key checks and, on SQLite, durability and secondary indexes
+
+        Building an index once at the end is much cheaper than maintaining it
+        row by row. A crash means reseeding anyway.
+        """
+        sqlite = connection.vendor == 'sqlite'
+        indexes = []
+        if sqlite:
+            tables = [model._meta.db_table for model in SEEDED_MODELS]
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous')
+                synchronous = cursor.fetchone()[0]
+                cursor.execute('PRAGMA synchronous=OFF')
+                cursor.execute('PRAGMA cache_size=-262144')
+                cursor.execute('PRAGMA temp_store=MEMORY')
+                cursor.execute(
+                    "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+                    f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})", tables
+                )
+                indexes = cursor.fetchall()
+                for name, _ in indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+        try:
+            with connection.constraint_checks_disabled():
+                yield
+        finally:
+            if sqlite:
+                start = time.perf_counter()
+                with connection.cursor() as cursor:
+                    for _, sql in indexes:
+                        cursor.execute(sql)
+                    cursor.execute(f'PRAGMA synchronous={int(synchronous)}')
+                self.stdout.write(f'{len(indexes)} indexes: {time.perf_counter() - start:.1f}s')
+
+    def _phase(self, label, seed):
+        self.writers = []
+        start = time.perf_counter()
+        with transaction.atomic():
+            seed()
+            for writer in self.writers:
+                writer.flush()
+        elapsed = time.perf_counter() - start
+        rows = sum(writer.count for writer in self.writers)
+        self.stdout.write(f'{label}: {rows} rows in {elapsed:.1f}s, {rows / max(elapsed, 1e-9):.0f} rows/s')
+        for writer in self.writers:
+            self.stdout.write(
+                f'  {writer.model._meta.db_table:<22} {writer.count:>10} rows {writer.elapsed:>7.1f}s inserting'
+            )
+
+    def _writer(self, model, *fields):
+        writer = _Writer(model, fields, self.options['batch_size'])
+        self.writers.append(writer)
+        return writer
+
+    def _id(self):
+        # Hex of a version 4 UUID, without the cost of UUID objects
+        return f'{self.rng.getrandbits(128) & UUID4_CLEAR | UUID4_SET:032x}'
+
+    def _time(self, fraction):
+        return self.start + timedelta(seconds=self.span * fraction)
+
+    def _growth_time(self):
+        """Timestamps skewed towards the end of the history, like a growing platform"""
+        return self._time(self.rng.random() ** 0.5)
+
+    def _text(self, count):
+        # A random window of a pre-drawn word stream is as varied and much cheaper
+        start = self.rng.randrange(len(self.words) - count)
+        return ' '.join(self.words[start:start + count])
+
+    def _zipf_picker(self, population, exponent=0.8):
+        """Choose from ``population`` with a few heavy users and a long tail"""
+        weights = list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(len(population))))
+        total = weights[-1]
+        rng = self.rng
+
+        def pick():
+            return population[bisect.bisect_left(weights, rng.random() * total)]
+        return pick
+
+    # --- Phases ----------------------------------------------------------------
+
+    def _seed_users(self):
+        rng = self.rng
+        password = make_password(self.options['password'])
+        users = self._writer(User, 'id', 'email', 'name', 'role', 'profile_status', 'email_verified',
+                             'password', 'created_at', 'updated_at')
+        profiles = self._writer(FreelancerProfile, 'id', 'user_id', 'bio', 'skills', 'hourly_rate',
+                                'experience_years', 'is_verified', 'rating', 'total_jobs_completed',
+                                'created_at', 'updated_at')
+        skill_index = self._writer(FreelancerSkill, 'id', 'skill_id', 'freelancer_id', 'hourly_rate',
+                                   'rating', 'created_at', 'updated_at')
+        skills = get_or_create_skills(SKILLS)
+
+        self.clients, self.freelancers, self.names = [], [], {}
+        for _ in range(self.sizes['users']):
+            user_id = self._id()
+            joined = self._time(rng.random() * 0.8)
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            freelancer = rng.random() < self.options['freelancer_share']
+            role = User.FREELANCER if freelancer else User.CLIENT
+            number = len(self.freelancers if freelancer else self.clients)
+            users.add(user_id, seed_email(role, number), name, role, User.ACTIVE,
+                      rng.random() < 0.9, password, joined, joined)
+            self.names[user_id] = name
+            if not freelancer:
+                self.clients.append(user_id)
+                continue
+
+            self.freelancers.append(user_id)
+            chosen = rng.sample(SKILLS, rng.randint(2, 6))
+            rate = Decimal(rng.randint(5, 80))
+            rating = Decimal(rng.randint(300, 500)) / 100
+            profiles.add(self._id(), user_id, self._text(20), chosen, rate, rng.randint(0, 15),
+                         rng.random() < 0.3, rating, rng.randint(0, 200), joined, joined)
+            for skill in chosen:
+                skill_index.add(self._id(), skills[skill.lower()].id, user_id, rate, rating, joined, joined)
+        if not self.clients or not self.freelancers:
+            raise CommandError('Need at least one client and one freelancer; adjust --users or --freelancer-share')
+
+    def _seed_jobs(self):
+        rng = self.rng
+        jobs = self._writer(Job, 'id', 'client_id', 'title', 'description', 'assignment_type', 'subject',
+                            'deadline', 'pages', 'urgency', 'budget_min', 'budget_max', 'instructions',
+                            'status', 'skills_required', 'views_count', 'offers_count',
+                            'created_at', 'updated_at')
+        pick_client = self._zipf_picker(self.clients)
+        statuses = [status for status, _ in JOB_STATUSES]
+        status_weights = list(itertools.accumulate(share for _, share in JOB_STATUSES))
+        assignment_types = [choice for choice, _ in Job.ASSIGNMENT_TYPE_CHOICES]
+        urgencies = [choice for choice, _ in Job.URGENCY_CHOICES]
+        mean_offers = self.options['offers_per_job']
+
+        # Compact description of each job for the later phases
+        self.jobs = []
+        for _ in range(self.sizes['jobs']):
+            job_id = self._id()
+            client_id = pick_client()
+            created = self._growth_time()
+            status = rng.choices(statuses, cum_weights=status_weights)[0]
+            subject = rng.choice(SUBJECTS)
+            budget_min = rng.randint(10, 400)
+            budget_max = budget_min + rng.randint(5, 600)
+            offers = int(rng.expovariate(1 / mean_offers)) if mean_offers > 0 else 0
+            offers = min(offers + (1 if status in AWARDED else 0), 40)
+            offers = min(offers, len(self.freelancers))
+            jobs.add(job_id, client_id, f'{subject.title()} {self._text(4)}', self._text(60),
+                     rng.choice(assignment_types), subject, created + timedelta(days=rng.randint(2, 30)),
+                     rng.randint(1, 20), rng.choice(urgencies), Decimal(budget_min), Decimal(budget_max),
+                     self._text(15), status, rng.sample(SKILLS, rng.randint(1, 4)),
+                     rng.randint(offers, offers * 10 + 20), offers, created, created)
+            self.jobs.append((job_id, client_id, created, status, budget_min, budget_max, offers))
+
+    def _seed_engagement(self):
+        rng = self.rng
+        chats = self._writer(Chat, 'id', 'job_id', 'client_id', 'freelancer_id', 'is_active',
+                             'last_message_id', 'last_message_preview', 'last_message_sender_name',
+                             'last_message_at', 'created_at', 'updated_at')
+        participants = self._writer(ChatParticipant, 'id', 'chat_id', 'user_id', 'last_seen_message_id',
+                                    'unread_count', 'created_at', 'updated_at')
+        messages = self._writer(Message, 'id', 'chat_id', 'sender_id', 'content', 'is_read', 'read_at',
+                                'created_at', 'updated_at')
+        offers = self._writer(Offer, 'id', 'job_id', 'freelancer_id', 'chat_id', 'title', 'description',
+                              'delivery_time', 'payment_type', 'amount', 'status', 'milestones',
+                              'created_at', 'updated_at')
+        orders = self._writer(Order, 'id', 'job_id', 'client_id', 'freelancer_id', 'offer_id', 'status',
+                              'title', 'description', 'delivery_time', 'amount', 'delivery_date', 'due_date',
+                              'completed_at', 'client_rating', 'created_at', 'updated_at')
+        payments = self._writer(Payment, 'id', 'order_id', 'payer_id', 'payee_id', 'amount', 'platform_fee',
+                                'freelancer_amount', 'payment_type', 'provider', 'status', 'transaction_id',
+                                'provider_response', 'payment_date', 'paid_at', 'created_at', 'updated_at')
+        transactions = self._writer(Transaction, 'id', 'payment_id', 'amount', 'transaction_type', 'status',
+                                    'transaction_id', 'created_at', 'updated_at')
+
+        total_offers = sum(job[6] for job in self.jobs)
+        mean_messages = self.sizes['messages'] / max(total_offers, 1)
+        self.chat_refs = []
+        for job_id, client_id, created, status, budget_min, budget_max, count in self.jobs:
+            if not count:
+                continue
+            awarded = status in AWARDED
+            for position, freelancer_id in enumerate(rng.sample(self.freelancers, count)):
+                chat_id, offer_id = self._id(), self._id()
+                opened = created + timedelta(minutes=rng.randint(5, 60 * 48))
+                amount = Decimal(rng.randint(budget_min, budget_max))
+                accepted = awarded and position == 0
+                if accepted:
+                    offer_status = Offer.ACCEPTED
+                elif awarded or status in (Job.CLOSED, Job.CANCELLED):
+                    offer_status = Offer.REJECTED
+                else:
+                    offer_status = Offer.WITHDRAWN if rng.random() < 0.05 else Offer.PENDING
+                offers.add(offer_id, job_id, freelancer_id, chat_id, f'Proposal for {self._text(3)}',
+                           self._text(40), rng.randint(1, 14), 'fixed', amount, offer_status, [],
+                           opened, opened)
+
+                # Messages alternate roughly between the two participants
+                message_count = int(rng.expovariate(1 / mean_messages)) if mean_messages else 0
+                if accepted and mean_messages:
+                    message_count += 3
+                unread = rng.choice((0, 0, 0, 1, 2, 5)) if message_count else 0
+                sent = opened
+                last = None
+                for index in range(message_count):
+                    sent += timedelta(seconds=rng.randint(20, 3600 * 6))
+                    sender = freelancer_id if rng.random() < 0.5 else client_id
+                    if index >= message_count - unread:
+                        sender = last[1] if last else sender
+                    is_read = index < message_count - unread
+                    last = (self._id(), sender, self._text(rng.randint(4, 30)), sent)
+                    messages.add(last[0], chat_id, sender, last[2], is_read,
+                                 sent + timedelta(minutes=5) if is_read else None, sent, sent)
+
+                if last:
+                    chats.add(chat_id, job_id, client_id, freelancer_id, True, last[0],
+                              last[2][:PREVIEW_LENGTH], self.names[last[1]], last[3], opened, last[3])
+                else:
+                    chats.add(chat_id, job_id, client_id, freelancer_id, True, None, '', '', None,
+                              opened, opened)
+                for user_id in (client_id, freelancer_id):
+                    pending = unread if last and user_id != last[1] else 0
+                    participants.add(self._id(), chat_id, user_id, None, pending, opened, opened)
+                self.chat_refs.append((chat_id, job_id, offer_id, client_id, freelancer_id))
+
+                if not accepted:
+                    continue
+                order_id, payment_id = self._id(), self._id()
+                started = opened + timedelta(hours=rng.randint(1, 72))
+                days = rng.randint(1, 14)
+                completed = started + timedelta(days=days) if status == Job.COMPLETED else None
+                order_status = Order.COMPLETED if completed else rng.choice(
+                    (Order.ACTIVE, Order.ACTIVE, Order.SUBMITTED, Order.REVISION_REQUESTED)
+                )
+                orders.add(order_id, job_id, client_id, freelancer_id, offer_id, order_status,
+                           f'Order: {self._text(3)}', self._text(40), days, amount,
+                           started + timedelta(days=days), started + timedelta(days=days), completed,
+                           rng.randint(3, 5) if completed else None, started, completed or started)
+                fee = (amount * Decimal('0.10')).quantize(Decimal('0.01'))
+                paid = Payment.PAID if completed else Payment.ESCROW
+                payments.add(payment_id, order_id, client_id, freelancer_id, amount, fee, amount - fee,
+                             Payment.ORDER, Payment.STRIPE, paid, f'seed-{payment_id}', {},
+                             started, started, started, completed or started)
+                transactions.add(self._id(), payment_id, amount, Transaction.PAYMENT, Transaction.COMPLETED,
+                                 f'seed-{payment_id}-1', started, started)
+                if completed:
+                    transactions.add(self._id(), payment_id, amount - fee, Transaction.RELEASE,
+                                     Transaction.COMPLETED, f'seed-{payment_id}-2', completed, completed)
+
+    def _seed_notifications(self):
+        rng = self.rng
+        notifications = self._writer(Notification, 'id', 'user_id', 'notification_type', 'title', 'message',
+                                     'priority', 'is_read', 'read_at', 'job_id', 'chat_id', 'offer_id',
+                                     'send_email', 'data', 'created_at', 'updated_at')
+        users = self.clients + self.freelancers
+        rng.shuffle(users)
+        pick_user = self._zipf_picker(users, exponent=0.6)
+        priorities = [choice for choice, _ in Notification.PRIORITY_CHOICES]
+        for _ in range(self.sizes['notifications']):
+            created = self._growth_time()
+            kind = rng.choice(NOTIFICATION_TYPES)
+            chat_id = job_id = offer_id = None
+            if self.chat_refs:
+                chat_id, job_id, offer_id = rng.choice(self.chat_refs)[:3]
+            # Older notifications are more likely to have been read
+            is_read = rng.random() < 0.3 + 0.65 * (1 - (created - self.start).total_seconds() / self.span)
+            notifications.add(self._id(), pick_user(), kind, self._text(5).capitalize(), self._text(20),
+                              rng.choice(priorities), is_read, created + timedelta(hours=2) if is_read else None,
+                              job_id, chat_id, offer_id, False, {}, created, created)
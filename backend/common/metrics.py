@@ -0,0 +1,263 @@
+"""
+Request metrics: per-view latency histograms, the split of each request
+between database, serialization and rendering time, response sizes and
+query counts.
+
+``common.middleware.RequestMetricsMiddleware`` times every request and
+records it under the view's URL name (``jobs:list``). Database time comes
+from an execute wrapper, serialization time from serializers deriving from
+:class:`TimedSerializerMixin` (excluding queries run while serializing),
+and rendering time from ``common.renderers.TimedJSONRenderer``.
+
+Two endpoints read the registry:
+
+* ``/api/metrics/``: cumulative counters and histograms in the Prometheus
+  text format
+* ``/api/metrics/summary/``: percentiles and time breakdown per view over the
+  last ``METRICS_SUMMARY_WINDOW`` seconds, with the views that take the most
+  total time first
+
+Metrics are kept per process and are not aggregated across processes.
+Under Gunicorn a request to either endpoint is answered by whichever worker
+accepts it, so one scrape reports that worker's numbers only, labelled with
+its ``pid``, and Prometheus sees each worker's series on the scrapes that
+happen to reach it. Read them per ``pid`` to compare views and spot
+regressions, not as exact totals for the service; those would need
+shared storage across workers, like the multiprocess mode of
+``prometheus_client``, which this module does not implement.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Time spent by one request, in seconds"""
+
+    __slots__ = ('db', 'queries', 'serialize', 'render', 'serializing')
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.serialize = 0.0
+        self.render = 0.0
+        self.serializing = False
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current.reset(token)
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+def current_timings():
+    """Timings of the request being handled, or ``None`` outside one"""
+    return _current.get()
+
+
+class TimedSerializerMixin:
+    """Serializer mixin reporting its ``to_representation`` time to the request metrics
+
+    Only the outermost timed call counts, so nested serializers and the
+    items of a ``many=True`` list are not counted twice; queries run while
+    serializing count as database time instead. The project's serializers
+    get it from ``common.serializers``.
+    """
+
+    def to_representation(self, instance):
+        timings = _current.get()
+        if timings is None or timings.serializing:
+            return super().to_representation(instance)
+        timings.serializing = True
+        db_before = timings.db
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serializing = False
+            timings.serialize += time.perf_counter() - start - (timings.db - db_before)
+
+
+class Histogram:
+    """Cumulative histogram over fixed bucket upper bounds"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class ViewMetrics:
+    """Counters and histograms of one view and method"""
+
+    def __init__(self, sample_size):
+        self.statuses = Counter()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db = Histogram(LATENCY_BUCKETS)
+        self.serialize = Histogram(LATENCY_BUCKETS)
+        self.render = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        # (finished at, latency, db, serialize, render, size, queries)
+        self.recent = deque(maxlen=sample_size)
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def _labels(**labels):
+    return ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for name, value in labels.items())
+
+
+class MetricsRegistry:
+    """Process-wide store of request metrics"""
+
+    HISTOGRAMS = (
+        ('latency', 'workvix_http_request_duration_seconds', 'Request latency'),
+        ('db', 'workvix_http_request_db_seconds', 'Time spent in database queries'),
+        ('serialize', 'workvix_http_request_serialize_seconds',
+         'Time spent in serializers, excluding queries'),
+        ('render', 'workvix_http_request_render_seconds', 'Time spent rendering responses'),
+        ('size', 'workvix_http_response_size_bytes', 'Response body size'),
+        ('queries', 'workvix_http_request_queries', 'Database queries per request'),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.views = {}
+            self.started = time.time()
+
+    def record(self, view, method, status, latency, timings, size):
+        key = (view, method)
+        with self._lock:
+            metrics = self.views.get(key)
+            if metrics is None:
+                metrics = self.views[key] = ViewMetrics(settings.METRICS_SAMPLE_SIZE)
+            metrics.statuses[f'{status // 100}xx'] += 1
+            metrics.latency.observe(latency)
+            metrics.db.observe(timings.db)
+            metrics.serialize.observe(timings.serialize)
+            metrics.render.observe(timings.render)
+            metrics.queries.observe(timings.queries)
+            if size is not None:
+                metrics.size.observe(size)
+            metrics.recent.append((time.time(), latency, timings.db, timings.serialize,
+                                   timings.render, size, timings.queries))
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        pid = os.getpid()
+        with self._lock:
+            views = sorted(self.views.items())
+            lines = [
+                '# HELP workvix_http_requests_total Requests handled',
+                '# TYPE workvix_http_requests_total counter',
+            ]
+            for (view, method), metrics in views:
+                for status, count in sorted(metrics.statuses.items()):
+                    labels = _labels(view=view, method=method, status=status, pid=pid)
+                    lines.append(f'workvix_http_requests_total{{{labels}}} {count}')
+
+            for attr, name, description in self.HISTOGRAMS:
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (view, method), metrics in views:
+                    histogram = getattr(metrics, attr)
+                    labels = _labels(view=view, method=method, pid=pid)
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+            lines.append('# HELP workvix_process_start_time_seconds Start of metrics collection')
+            lines.append('# TYPE workvix_process_start_time_seconds gauge')
+            lines.append(f'workvix_process_start_time_seconds{{{_labels(pid=pid)}}} {self.started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, window=None):
+        """Per-view statistics over the last ``window`` seconds, most total time first"""
+        window = window or settings.METRICS_SUMMARY_WINDOW
+        since = time.time() - window
+        with self._lock:
+            samples = {key: [s for s in metrics.recent if s[0] >= since]
+                       for key, metrics in self.views.items()}
+
+        views = []
+        for (view, method), recent in samples.items():
+            if not recent:
+                continue
+            count = len(recent)
+            latencies = sorted(sample[1] for sample in recent)
+            total = sum(latencies)
+            db = sum(sample[2] for sample in recent)
+            serialize = sum(sample[3] for sample in recent)
+            render = sum(sample[4] for sample in recent)
+            sizes = [sample[5] for sample in recent if sample[5] is not None]
+            views.append({
+                'view': view,
+                'method': method,
+                'requests': count,
+                'requests_per_second': round(count / window, 3),
+                'total_ms': round(total * 1000, 1),
+                'p50_ms': round(_percentile(latencies, 0.5) * 1000, 2),
+                'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+                'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2),
+                'mean_ms': {
+                    'total': round(total / count * 1000, 2),
+                    'db': round(db / count * 1000, 2),
+                    'serialize': round(serialize / count * 1000, 2),
+                    'render': round(render / count * 1000, 2),
+                    'other': round((total - db - serialize - render) / count * 1000, 2),
+                },
+                'mean_queries': round(sum(sample[6] for sample in recent) / count, 1),
+                'mean_response_bytes': round(sum(sizes) / len(sizes)) if sizes else None,
+            })
+        views.sort(key=lambda entry: entry['total_ms'], reverse=True)
+        return {
+            'pid': os.getpid(),
+            'window_seconds': window,
+            'collecting_since': self.started,
+            'views': views,
+        }
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,84 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import RequestTimings, registry
+from .queries import QueryBudgetExceeded, QueryRecorder, get_query_budget
+
+logger = logging.getLogger('workvix.queries')
+
+
+class RequestMetricsMiddleware:
+    """Record latency, time breakdown, size and query count of each request
+
+    Goes first in ``MIDDLEWARE`` so the other middleware is timed too. See
+    ``common.metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = timings.activate()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            RequestTimings.deactivate(token)
+        latency = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.record(view, request.method, response.status_code, latency, timings, size)
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Record the queries of each request and check them against the view's budget
+
+    Overruns and N+1 patterns are logged to ``workvix.queries``, or raised
+    as :class:`~common.queries.QueryBudgetExceeded` when
+    ``QUERY_BUDGET_STRICT`` is on. The recorder is left on the response as
+    ``response.queries`` for tests, and ``X-Query-Count`` is added in DEBUG.
+    Queries are only traced back to their origin with
+    ``QUERY_BUDGET_CAPTURE_ORIGIN``; without it N+1 patterns are reported
+    by query shape alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_BUDGET_ENABLED:
+            return self.get_response(request)
+
+        request.query_budget = None
+        with QueryRecorder(capture_origin=settings.QUERY_BUDGET_CAPTURE_ORIGIN) as recorder:
+            response = self.get_response(request)
+
+        response.queries = recorder
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+
+        problems = recorder.report(budget=request.query_budget)
+        if problems:
+            view = getattr(request.resolver_match, 'view_name', None) or request.path
+            message = f'{request.method} {view}: {problems}'
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func)
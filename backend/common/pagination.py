@@ -0,0 +1,169 @@
+"""
+Keyset (cursor) pagination on ``(created_at, id)``.
+
+Every model derives ``created_at`` and ``id`` from ``common.models.BaseModel``,
+so any queryset ordered by ``created_at`` can be paged by seeking past the
+last row seen instead of counting and skipping with ``OFFSET``. Views opt in
+with ``pagination_class = KeysetPagination``.
+
+Requests that still send ``?page=`` or order by another field (e.g.
+``?ordering=deadline``) fall back to page-number pagination.
+"""
+
+import base64
+import hashlib
+import json
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Constant-time pagination keyed on ``(created_at, id)``
+
+    The direction follows the queryset: ``-created_at`` pages newest first,
+    ``created_at`` oldest first. Pass ``?count=approx`` to include a total
+    that may be up to ``PAGINATION_COUNT_CACHE_TIMEOUT`` seconds stale.
+    """
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    fallback_class = PageNumberPagination
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+
+        descending = self.get_direction(queryset)
+        if descending is None or self.fallback_class.page_query_param in request.query_params:
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.descending = descending
+        self.page_size = self.get_page_size(request)
+        self.count = self.get_approximate_count(queryset, request)
+
+        cursor = self.decode_cursor(request)
+        backwards = cursor is not None and cursor['p']
+        # Walking backwards means seeking in the opposite direction and
+        # flipping the page afterwards
+        seek_descending = descending != backwards
+        order = ('-created_at', '-id') if seek_descending else ('created_at', 'id')
+        queryset = queryset.order_by(*order)
+
+        if cursor is not None:
+            lookup = 'lt' if seek_descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'created_at__{lookup}': cursor['t']})
+                | Q(created_at=cursor['t'], **{f'id__{lookup}': cursor['i']})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_direction(self, queryset):
+        """True for newest-first, False for oldest-first, None if not keyset-compatible"""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        if not ordering:
+            return True
+        first = ordering[0]
+        if first == '-created_at':
+            return True
+        if first == 'created_at':
+            return False
+        return None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_approximate_count(self, queryset, request):
+        if request.query_params.get(self.count_query_param) != 'approx':
+            return None
+        sql, params = queryset.order_by().query.sql_with_params()
+        key = 'pagination:count:%s' % hashlib.md5(f'{sql}{params}'.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.order_by().count()
+            cache.set(key, count, getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 300))
+        return count
+
+    def encode_cursor(self, row, previous):
+        position = {'t': row.created_at.isoformat(), 'i': str(row.id), 'p': previous}
+        token = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            created_at = parse_datetime(position['t'])
+            if created_at is None:
+                raise ValueError(position['t'])
+            return {'t': created_at, 'i': uuid.UUID(str(position['i'])), 'p': bool(position.get('p'))}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], previous=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], previous=True)
@@ -0,0 +1,342 @@
+"""
+Declarative projections for nested model serializers.
+
+A serializer deriving from :class:`ProjectedModelSerializer` lists named
+field sets in ``Meta.projections``::
+
+    projections = {
+        'summary': {'fields': ['id', 'status', 'amount', 'order']},
+        'detail': {'fields': [...], 'expand': ['order']},
+    }
+
+``full`` is always available and renders every field with every nested
+serializer expanded, which is what the serializer produced before
+projections existed; it is the default unless ``Meta.default_projection``
+says otherwise.
+
+Clients choose what they get with query parameters:
+
+* ``?fields=summary`` selects a named projection;
+* ``?fields=id,amount,order.title`` selects individual fields, with dotted
+  paths reaching into nested serializers;
+* ``?expand=order,order.offer`` renders those relations as nested objects
+  (in their ``summary`` projection unless ``fields`` says otherwise).
+  Relations that are not expanded are rendered as primary keys.
+
+:func:`plan_queryset` derives the ``select_related``, ``prefetch_related``
+and ``only()`` calls a projection needs, so rendering it costs a fixed
+number of queries per page. Views get both halves from
+:class:`ProjectionMixin`.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .serializers import TimedModelSerializer
+
+FULL = 'full'
+SUMMARY = 'summary'
+
+
+class Projection:
+    """Resolved projection: which fields to render and which to expand
+
+    ``fields`` maps field names to a child :class:`Projection` for expanded
+    relations or ``None`` for plain values. ``fields is None`` renders every
+    field. Serializers that don't declare projections can still be narrowed
+    with dotted ``fields`` paths, but their relations are never collapsed
+    to primary keys.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        self.serializer_class = serializer_class
+        self.fields = fields
+
+    def __repr__(self):
+        return f'<Projection {self.serializer_class.__name__} {self.fields}>'
+
+
+def _split_paths(paths):
+    """``['a', 'b.c', 'b.d.e']`` -> ``{'a': [], 'b': ['c', 'd.e']}``"""
+    tree = {}
+    for path in paths:
+        head, _, rest = path.partition('.')
+        tree.setdefault(head, [])
+        if rest:
+            tree[head].append(rest)
+    return tree
+
+
+def _nested(field):
+    """The nested serializer class behind ``field`` and whether it is a list"""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child.__class__, True
+    if isinstance(field, serializers.BaseSerializer):
+        return field.__class__, False
+    return None, False
+
+
+def resolve_projection(serializer_class, fields=None, expand=(), preset=None):
+    """Build the :class:`Projection` for ``fields``/``expand`` dotted paths or a preset"""
+    meta = getattr(serializer_class, 'Meta', None)
+    projections = getattr(meta, 'projections', None)
+    if projections is None and not fields:
+        return Projection(serializer_class)
+
+    available = serializer_class().fields
+    expand_tree = _split_paths(expand)
+
+    if fields:
+        field_tree = _split_paths(fields)
+        names = list(field_tree)
+        child_preset = SUMMARY
+    else:
+        field_tree = {}
+        preset = preset or getattr(meta, 'default_projection', FULL)
+        if preset == FULL:
+            spec = {'fields': '__all__', 'expand': '__all__'}
+        elif preset in projections:
+            spec = projections[preset]
+        else:
+            raise ValidationError({'fields': f'Unknown projection "{preset}".'})
+        names = list(available) if spec['fields'] == '__all__' else list(spec['fields'])
+        preset_expand = spec.get('expand', ())
+        if preset_expand == '__all__':
+            preset_expand = [name for name in names if _nested(available[name])[0]]
+        for name in preset_expand:
+            expand_tree.setdefault(name, [])
+        child_preset = FULL if preset == FULL else SUMMARY
+
+    for name in expand_tree:
+        if name not in names:
+            names.append(name)
+
+    resolved = {}
+    for name in names:
+        if name not in available:
+            raise ValidationError({'fields': f'Unknown field "{name}" on {serializer_class.__name__}.'})
+        nested_class, _ = _nested(available[name])
+        child_fields = field_tree.get(name)
+        if nested_class is None:
+            if child_fields:
+                raise ValidationError({'fields': f'"{name}" has no nested fields.'})
+            resolved[name] = None
+        elif name in expand_tree or child_fields:
+            resolved[name] = resolve_projection(
+                nested_class,
+                fields=child_fields or None,
+                expand=expand_tree.get(name, ()),
+                preset=None if child_fields else child_preset,
+            )
+        else:
+            resolved[name] = None
+    return Projection(serializer_class, resolved)
+
+
+def projection_from_request(serializer_class, request):
+    params = request.query_params if request is not None else {}
+    fields = [path.strip() for path in params.get('fields', '').split(',') if path.strip()]
+    expand = [path.strip() for path in params.get('expand', '').split(',') if path.strip()]
+    preset = None
+    if len(fields) == 1 and '.' not in fields[0] and fields[0] in _preset_names(serializer_class):
+        preset, fields = fields[0], []
+    return resolve_projection(serializer_class, fields=fields, expand=expand, preset=preset)
+
+
+def _preset_names(serializer_class):
+    projections = getattr(getattr(serializer_class, 'Meta', None), 'projections', None) or {}
+    return set(projections) | {FULL}
+
+
+class ProjectedModelSerializer(TimedModelSerializer):
+    """Model serializer rendering only the fields of its ``projection``"""
+
+    def __init__(self, *args, projection=None, **kwargs):
+        self.projection = projection
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        projection = self.projection
+        if projection is None or projection.fields is None:
+            return fields
+
+        selected = {}
+        for name, child in projection.fields.items():
+            field = fields[name]
+            nested_class, many = _nested(field)
+            if nested_class is not None:
+                if child is None:
+                    field = serializers.PrimaryKeyRelatedField(read_only=True, many=many, source=field.source)
+                elif issubclass(nested_class, ProjectedModelSerializer):
+                    field = nested_class(read_only=True, many=many, source=field.source, projection=child)
+                else:
+                    _prune(field.child if many else field, child)
+            selected[name] = field
+        return selected
+
+
+def _prune(serializer, projection):
+    """Drop the fields ``projection`` leaves out from a plain nested serializer"""
+    if projection.fields is None:
+        return
+    for name in list(serializer.fields):
+        if name not in projection.fields:
+            del serializer.fields[name]
+        elif projection.fields[name] is not None:
+            field = serializer.fields[name]
+            _prune(getattr(field, 'child', field), projection.fields[name])
+
+
+# --- Query planning ------------------------------------------------------------
+
+class QueryPlan:
+    """``select_related``/``prefetch_related``/``only()`` arguments for a projection"""
+
+    def __init__(self):
+        self.select_related = []
+        self.prefetch_related = []
+        self._columns = {}
+        self._unrestricted = set()
+        self._models = {}
+
+    def _track(self, path, model):
+        self._models.setdefault(path, model)
+        self._columns.setdefault(path, {model._meta.pk.name})
+
+    def add_column(self, path, name):
+        self._columns[path].add(name)
+
+    def load_all(self, path):
+        self._unrestricted.add(path)
+
+    def only_fields(self):
+        """Column list for ``only()`` covering the root model and select_related chains"""
+        fields = []
+        for path, model in self._models.items():
+            prefix = f'{path}__' if path else ''
+            if path in self._unrestricted:
+                names = [f.name for f in model._meta.concrete_fields]
+            else:
+                names = sorted(self._columns[path])
+            fields.extend(prefix + name for name in names)
+        return fields
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset.only(*self.only_fields())
+
+
+def plan_queryset(serializer, model):
+    """Work out the :class:`QueryPlan` needed to render ``serializer`` for ``model`` rows"""
+    plan = QueryPlan()
+    _plan_fields(plan, serializer, model, path='', prefetched=False)
+    return plan
+
+
+def _join(path, name):
+    return f'{path}__{name}' if path else name
+
+
+def _follow(plan, model, path, prefetched, relation):
+    """Record traversal of ``relation`` from ``path``; returns the new (model, path, prefetched)"""
+    new_path = _join(path, relation.name)
+    many = relation.one_to_many or relation.many_to_many
+    if prefetched or many:
+        if new_path not in plan.prefetch_related:
+            plan.prefetch_related.append(new_path)
+        return relation.related_model, new_path, True
+    if relation.concrete:
+        plan.add_column(path, relation.name)
+    if new_path not in plan.select_related:
+        plan.select_related.append(new_path)
+    plan._track(new_path, relation.related_model)
+    return relation.related_model, new_path, False
+
+
+def _plan_fields(plan, serializer, model, path, prefetched):
+    if not prefetched:
+        plan._track(path, model)
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            # Method fields and the like may read anything from the instance
+            if not prefetched:
+                plan.load_all(path)
+            continue
+
+        current_model, current_path, current_prefetched = model, path, prefetched
+        attrs = field.source_attrs
+        try:
+            for attr in attrs[:-1]:
+                relation = current_model._meta.get_field(attr)
+                if not relation.is_relation:
+                    raise FieldDoesNotExist(attr)
+                current_model, current_path, current_prefetched = _follow(
+                    plan, current_model, current_path, current_prefetched, relation
+                )
+            model_field = current_model._meta.get_field(attrs[-1])
+        except FieldDoesNotExist:
+            # Properties and other computed attributes
+            if not current_prefetched:
+                plan.load_all(current_path)
+            continue
+
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(nested, serializers.BaseSerializer):
+            child_model, child_path, child_prefetched = _follow(
+                plan, current_model, current_path, current_prefetched, model_field
+            )
+            _plan_fields(plan, nested, child_model, child_path, child_prefetched)
+        elif model_field.is_relation and (model_field.one_to_many or model_field.many_to_many):
+            # Primary keys of a to-many relation
+            path_name = _join(current_path, model_field.name)
+            if path_name not in plan.prefetch_related:
+                plan.prefetch_related.append(path_name)
+        elif model_field.is_relation and not model_field.concrete:
+            # Reverse one-to-one rendered as a primary key
+            _follow(plan, current_model, current_path, current_prefetched, model_field)
+        elif not current_prefetched:
+            plan.add_column(current_path, model_field.name)
+
+
+class ProjectionMixin:
+    """Generic view mixin applying ``?fields=``/``?expand=`` to serializer and queryset"""
+
+    def get_projection(self):
+        if not hasattr(self, '_projection'):
+            self._projection = projection_from_request(self.get_serializer_class(), self.request)
+        return self._projection
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, ProjectedModelSerializer):
+            kwargs.setdefault('projection', self.get_projection())
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, ProjectedModelSerializer):
+            return queryset
+        serializer = serializer_class(projection=self.get_projection(), context=self.get_serializer_context())
+        plan = plan_queryset(serializer, queryset.model)
+        # Ordering columns are read back by keyset pagination cursors
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        for name in ordering + ['created_at']:
+            name = name.lstrip('-') if isinstance(name, str) else None
+            if name and '__' not in name and _concrete_field(queryset.model, name):
+                plan.add_column('', name)
+        return plan.apply(queryset)
+
+
+def _concrete_field(model, name):
+    try:
+        return model._meta.get_field(name).concrete
+    except FieldDoesNotExist:
+        return False
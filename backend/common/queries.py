@@ -0,0 +1,178 @@
+"""
+Per-request SQL recording, N+1 detection and query budgets.
+
+:class:`QueryRecorder` records every statement run on any database
+connection while it is active, together with where it came from: the
+serializer field being rendered (``OrderSerializer.submissions``) or else
+the first frame in project code. Statements are grouped by *shape*, the SQL
+with its ``IN (...)`` lists collapsed, so the same lookup repeated once per
+row of a list shows up as one shape with a large count: an N+1.
+
+Views declare the most queries a request may take::
+
+    class OrderListView(generics.ListAPIView):
+        query_budget = 8
+
+    @query_budget(5)
+    @api_view(['GET'])
+    def payment_history(request):
+        ...
+
+``common.middleware.QueryBudgetMiddleware`` checks every request against
+its view's budget and logs overruns and N+1 patterns; with
+``QUERY_BUDGET_STRICT`` it raises :class:`QueryBudgetExceeded` instead, which
+makes the test client fail the test. ``common.testing`` has assertions for
+use in tests.
+
+Finding the origin walks the Python stack on every query, so the middleware
+only does it with ``QUERY_BUDGET_CAPTURE_ORIGIN`` (on in DEBUG and strict
+mode); otherwise the repeats of a shape are counted together, whatever
+their origin.
+"""
+
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more queries than its view allows, or an N+1 pattern"""
+
+
+def query_shape(sql):
+    """``sql`` with ``IN`` lists of any length collapsed, for grouping repeats"""
+    return _WHITESPACE.sub(' ', _IN_LIST.sub('(%s, ...)', sql)).strip()
+
+
+def query_budget(max_queries):
+    """Declare the query budget of a function view (apply above ``@api_view``)"""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_query_budget(view_func):
+    """The ``query_budget`` declared by a view function or class, if any"""
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        budget = getattr(view_class, 'query_budget', None)
+    return budget
+
+
+def _project_root():
+    return str(settings.BASE_DIR)
+
+
+def find_origin(frame):
+    """Serializer field being rendered at ``frame``, or else the nearest project code"""
+    root = _project_root()
+    fallback = None
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'to_representation' and 'rest_framework' in code.co_filename:
+            field = frame.f_locals.get('field')
+            if field is not None and getattr(field, 'field_name', None):
+                return f"{type(frame.f_locals['self']).__name__}.{field.field_name}"
+        elif (fallback is None and code.co_filename.startswith(root)
+              and 'site-packages' not in code.co_filename and code.co_filename != __file__):
+            fallback = f'{code.co_filename[len(root) + 1:]}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return fallback
+
+
+class RecordedQuery:
+    __slots__ = ('alias', 'sql', 'shape', 'duration', 'origin')
+
+    def __init__(self, alias, sql, duration, origin):
+        self.alias = alias
+        self.sql = sql
+        self.shape = query_shape(sql)
+        self.duration = duration
+        self.origin = origin
+
+
+class NPlusOne:
+    """A query shape repeated ``count`` times from the same ``origin``"""
+
+    def __init__(self, shape, origin, count):
+        self.shape = shape
+        self.origin = origin
+        self.count = count
+
+    def __str__(self):
+        return f'{self.count}x from {self.origin or "unknown"}: {self.shape[:200]}'
+
+
+class QueryRecorder:
+    """Context manager recording the queries run on every database connection"""
+
+    def __init__(self, capture_origin=True):
+        self.capture_origin = capture_origin
+        self.queries = []
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._wrapper(connection.alias)))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def _wrapper(self, alias):
+        def record(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duration = time.perf_counter() - start
+                origin = find_origin(sys._getframe(1)) if self.capture_origin else None
+                self.queries.append(RecordedQuery(alias, sql, duration, origin))
+        return record
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(query.duration for query in self.queries)
+
+    def shapes(self):
+        """Query shapes with their counts, most repeated first"""
+        return Counter(query.shape for query in self.queries).most_common()
+
+    def n_plus_one(self, threshold=None):
+        """SELECT shapes repeated at least ``threshold`` times from one origin"""
+        if threshold is None:
+            threshold = settings.QUERY_BUDGET_N_PLUS_ONE_THRESHOLD
+        repeats = Counter(
+            (query.shape, query.origin) for query in self.queries
+            if query.shape.startswith('SELECT')
+        )
+        return [
+            NPlusOne(shape, origin, count)
+            for (shape, origin), count in repeats.most_common()
+            if count >= threshold
+        ]
+
+    def report(self, budget=None, threshold=None):
+        """Human readable summary of the problems found, empty if there are none"""
+        lines = []
+        if budget is not None and self.count > budget:
+            lines.append(f'{self.count} queries, budget is {budget}')
+        lines.extend(f'N+1: {pattern}' for pattern in self.n_plus_one(threshold))
+        return '\n'.join(lines)
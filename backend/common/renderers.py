@@ -0,0 +1,19 @@
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from .metrics import current_timings
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSON renderer that reports its time to the request metrics"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        timings = current_timings()
+        if timings is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            timings.render += time.perf_counter() - start
@@ -0,0 +1,13 @@
+"""Base classes of the project's serializers"""
+
+from rest_framework import serializers
+
+from .metrics import TimedSerializerMixin
+
+
+class TimedSerializer(TimedSerializerMixin, serializers.Serializer):
+    """``Serializer`` timed for the request metrics"""
+
+
+class TimedModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """``ModelSerializer`` timed for the request metrics"""
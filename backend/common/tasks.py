@@ -0,0 +1,102 @@
+"""
+Background task dispatch shared by all apps.
+
+Tasks are plain functions decorated with :func:`task`. Calling
+``func.delay(*args)`` schedules the task once the current transaction
+commits, ``func.delay_after(seconds, *args)`` that many seconds later:
+
+* with ``CELERY_ENABLED`` the call is sent to the Celery broker configured
+  by the ``CELERY_*`` settings;
+* otherwise it runs on a small in-process thread pool, or inline when
+  ``BACKGROUND_TASKS_EAGER`` is set (handy for scripts and benchmarks).
+
+Task arguments must be JSON serializable (pass ids, not model instances).
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_TASKS_WORKERS', 2),
+                thread_name_prefix='workvix-task',
+            )
+    return _executor
+
+
+def _run_in_thread(func, args, kwargs):
+    close_old_connections()
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", func.__name__)
+    finally:
+        close_old_connections()
+
+
+def _celery_enabled():
+    return getattr(settings, 'CELERY_ENABLED', False)
+
+
+def enqueue(func, *args, **kwargs):
+    """Schedule ``func(*args, **kwargs)`` to run after the current transaction commits"""
+    if _celery_enabled():
+        transaction.on_commit(lambda: func.celery_task.apply_async(args, kwargs))
+    elif getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+    else:
+        transaction.on_commit(
+            lambda: _get_executor().submit(_run_in_thread, func, args, kwargs)
+        )
+
+
+def enqueue_after(countdown, func, *args, **kwargs):
+    """Schedule ``func(*args, **kwargs)`` to run ``countdown`` seconds after the current transaction commits
+    
+    On the thread pool the wait is a timer, so no worker thread is held
+    while waiting. Eager mode runs the task right away.
+    """
+    if _celery_enabled():
+        transaction.on_commit(lambda: func.celery_task.apply_async(args, kwargs, countdown=countdown))
+    elif getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+    else:
+        def submit():
+            timer = threading.Timer(countdown, _get_executor().submit, (_run_in_thread, func, args, kwargs))
+            timer.daemon = True
+            timer.start()
+        transaction.on_commit(submit)
+
+
+def run_locally(func, *args, **kwargs):
+    """Run ``func`` on the in-process thread pool, never on Celery
+    
+    For work that depends on state held by this process (e.g. in-memory
+    buffers), where a Celery worker would see none of it.
+    """
+    return _get_executor().submit(_run_in_thread, func, args, kwargs)
+
+
+def task(func):
+    """Register ``func`` as a background task and give it a ``delay()`` helper"""
+    func.celery_task = None
+    if _celery_enabled():
+        from workvix_project.celery import app
+
+        func.celery_task = app.task(name=f'{func.__module__}.{func.__name__}')(func)
+    func.delay = lambda *args, **kwargs: enqueue(func, *args, **kwargs)
+    func.delay_after = lambda countdown, *args, **kwargs: enqueue_after(countdown, func, *args, **kwargs)
+    return func
@@ -0,0 +1,51 @@
+"""
+Query count assertions for tests.
+
+    from common.testing import QueryBudgetTestMixin
+
+    class OrderListTests(QueryBudgetTestMixin, APITestCase):
+        def test_list(self):
+            with self.assertMaxQueries(5):
+                self.client.get('/api/orders/')
+
+            response = self.client.get('/api/orders/')
+            self.assertWithinQueryBudget(response)
+
+The test settings should turn on ``QUERY_BUDGET_STRICT`` so that every
+request in the suite is checked against its view's budget as well.
+"""
+
+from contextlib import contextmanager
+
+from .queries import QueryRecorder
+
+
+class QueryBudgetTestMixin:
+    """``TestCase`` mixin with query budget and N+1 assertions"""
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries, n_plus_one_threshold=None):
+        with QueryRecorder() as recorder:
+            yield recorder
+        problems = recorder.report(budget=max_queries, threshold=n_plus_one_threshold)
+        if problems:
+            self.fail(problems)
+
+    @contextmanager
+    def assertNoNPlusOne(self, threshold=None):
+        with QueryRecorder() as recorder:
+            yield recorder
+        problems = recorder.report(threshold=threshold)
+        if problems:
+            self.fail(problems)
+
+    def assertWithinQueryBudget(self, response, max_queries=None):
+        """Check a test client response against ``max_queries`` or its view's budget"""
+        recorder = getattr(response, 'queries', None)
+        if recorder is None:
+            self.fail('No queries recorded; is QueryBudgetMiddleware installed and enabled?')
+        if max_queries is None:
+            max_queries = response.wsgi_request.query_budget
+        problems = recorder.report(budget=max_queries)
+        if problems:
+            self.fail(problems)
@@ -1,3 +1,141 @@
-from django.test import TestCase
+import base64
+import json
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from users.models import User
+from .metrics import registry
+from .queries import QueryRecorder
+from .testing import QueryBudgetTestMixin
+
+
+class QueryBudgetAssertionTests(QueryBudgetTestMixin, TestCase):
+    """The assertions of common.testing"""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(f'user{i}@example.com', 'pass', name=f'U{i}', role=User.FREELANCER)
+            for i in range(5)
+        ]
+
+    def test_max_queries(self):
+        with self.assertMaxQueries(1) as recorder:
+            list(User.objects.all())
+        self.assertEqual(recorder.count, 1)
+
+        with self.assertRaisesMessage(AssertionError, '2 queries, budget is 1'):
+            with self.assertMaxQueries(1):
+                User.objects.count()
+                User.objects.count()
+
+    def test_n_plus_one(self):
+        with self.assertNoNPlusOne():
+            list(User.objects.filter(id__in=[user.id for user in self.users]))
+
+        with self.assertRaisesMessage(AssertionError, 'N+1: 5x from common/tests.py'):
+            with self.assertNoNPlusOne():
+                for user in self.users:
+                    User.objects.get(id=user.id)
+
+    def test_within_query_budget(self):
+        response = self.client.get('/api/jobs/')
+        self.assertEqual(response.status_code, 200)
+        self.assertWithinQueryBudget(response)
+
+        with self.assertRaises(AssertionError):
+            self.assertWithinQueryBudget(response, max_queries=0)
+
+
+class QueryRecorderTests(TestCase):
+
+    @override_settings(QUERY_BUDGET_CAPTURE_ORIGIN=False)
+    def test_origin_capture_is_optional(self):
+        response = self.client.get('/api/jobs/')
+        self.assertTrue(response.queries.count)
+        self.assertTrue(all(query.origin is None for query in response.queries.queries))
+
+        with QueryRecorder() as recorder:
+            User.objects.count()
+        self.assertRegex(recorder.queries[0].origin, r'^common/tests\.py:\d+ in test_origin_capture_is_optional$')
+
+
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        client = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        Job.objects.create(
+            client=client, title='Essay', description='Write', assignment_type=Job.ACADEMIC_WRITING,
+            subject='History', deadline=timezone.now() + timedelta(days=3),
+            budget_min=10, budget_max=50, status=Job.OPEN,
+        )
+        registry.reset()
+
+    def test_serialization_is_timed(self):
+        response = self.client.get('/api/jobs/')
+        self.assertEqual(response.status_code, 200)
+
+        metrics = registry.views[('jobs:list', 'GET')]
+        self.assertEqual(metrics.serialize.count, 1)
+        self.assertGreater(metrics.serialize.sum, 0)
+        self.assertLess(metrics.serialize.sum, metrics.latency.sum)
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pagination of the job board"""
+
+    def setUp(self):
+        client = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        now = timezone.now()
+        self.jobs = [
+            Job.objects.create(
+                client=client, title=f'Job {i}', description='Write', assignment_type=Job.ACADEMIC_WRITING,
+                subject='History', deadline=now + timedelta(days=3), budget_min=10, budget_max=50, status=Job.OPEN,
+            )
+            for i in range(5)
+        ]
+        # Two jobs share a timestamp, so the id breaks the tie
+        Job.objects.filter(id__in=[self.jobs[1].id, self.jobs[2].id]).update(created_at=now)
+        self.expected = [
+            str(job_id) for job_id in Job.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        ]
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_next_links_walk_every_job_once(self):
+        seen, page = [], self.get('/api/jobs/', page_size=2)
+        self.assertIsNone(page['previous'])
+        while True:
+            seen += [job['id'] for job in page['results']]
+            if not page['next']:
+                break
+            page = self.get(page['next'])
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link_returns_the_page_before(self):
+        first = self.get('/api/jobs/', page_size=2)
+        second = self.get(first['next'])
+        back = self.get(second['previous'])
+        self.assertEqual([job['id'] for job in back['results']], self.expected[:2])
+        self.assertEqual(back['next'], first['next'])
+
+    def test_bad_cursors_are_not_found(self):
+        def encode(position):
+            return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+        for cursor in (
+            'not-base64!',
+            encode(['t', 'i']),
+            encode({'t': 'yesterday', 'i': str(self.jobs[0].id)}),
+            encode({'t': '2024-01-01T00:00:00+00:00'}),
+            encode({'t': '2024-01-01T00:00:00+00:00', 'i': 'zzz'}),
+            encode({'t': '2024-01-01T00:00:00+00:00', 'i': ['zzz']}),
+        ):
+            response = self.client.get('/api/jobs/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.json()['detail'], 'Invalid cursor')
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'common'
+
+urlpatterns = [
+    path('', views.metrics, name='metrics'),
+    path('summary/', views.metrics_summary, name='metrics-summary'),
+]
@@ -1,3 +1,52 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import registry
+
+METRICS_AUTH = 'metrics-token'
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """Accepts ``Authorization: Bearer <METRICS_TOKEN>`` from a metrics scraper"""
+
+    def authenticate(self, request):
+        token = settings.METRICS_TOKEN
+        header = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            return AnonymousUser(), METRICS_AUTH
+        return None
+
+
+class HasMetricsAccess(BasePermission):
+    """Staff users or the metrics scraper"""
+
+    def has_permission(self, request, view):
+        return request.auth == METRICS_AUTH or bool(request.user and request.user.is_staff)
+
+
+@api_view(['GET'])
+@authentication_classes([MetricsTokenAuthentication, JWTAuthentication])
+@permission_classes([HasMetricsAccess])
+def metrics(request):
+    """Request metrics of this process in the Prometheus text format"""
+    return HttpResponse(registry.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@api_view(['GET'])
+@authentication_classes([MetricsTokenAuthentication, JWTAuthentication])
+@permission_classes([HasMetricsAccess])
+def metrics_summary(request):
+    """Per-view latency and time breakdown over a rolling window"""
+    try:
+        window = int(request.query_params.get('window', settings.METRICS_SUMMARY_WINDOW))
+    except ValueError:
+        return Response({'error': 'window must be a number of seconds'}, status=400)
+    return Response(registry.summary(window=max(window, 1)))
@@ -0,0 +1,116 @@
+"""
+Minimal WebSocket support on top of the raw ASGI protocol.
+
+Django's ASGI handler only speaks HTTP, so ``workvix_project.asgi`` wraps it
+in a :class:`ProtocolRouter` that hands WebSocket connections to plain
+``async def handler(socket)`` functions, keyed by path.
+"""
+
+import json
+from urllib.parse import parse_qs
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class WebSocketDisconnect(Exception):
+    """The client closed the connection"""
+
+    def __init__(self, code=1000):
+        super().__init__(code)
+        self.code = code
+
+
+class WebSocket:
+    """One WebSocket connection"""
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self._receive = receive
+        self._send = send
+        self.query_params = {
+            key: values[-1]
+            for key, values in parse_qs(scope.get('query_string', b'').decode()).items()
+        }
+        self.accepted = False
+        self.closed = False
+
+    @property
+    def path(self):
+        return self.scope['path']
+
+    async def wait_for_connect(self):
+        message = await self._receive()
+        if message['type'] != 'websocket.connect':
+            raise WebSocketDisconnect(message.get('code', 1000))
+
+    async def accept(self):
+        await self._send({'type': 'websocket.accept'})
+        self.accepted = True
+
+    async def close(self, code=1000):
+        if not self.closed:
+            self.closed = True
+            await self._send({'type': 'websocket.close', 'code': code})
+
+    async def send_json(self, data):
+        await self._send({'type': 'websocket.send', 'text': json.dumps(data, cls=DjangoJSONEncoder)})
+
+    async def receive_json(self):
+        """Next JSON message from the client; raises WebSocketDisconnect when it leaves"""
+        while True:
+            message = await self._receive()
+            if message['type'] == 'websocket.disconnect':
+                self.closed = True
+                raise WebSocketDisconnect(message.get('code', 1000))
+            if message['type'] != 'websocket.receive':
+                continue
+            text = message.get('text')
+            if text is None:
+                text = (message.get('bytes') or b'').decode()
+            try:
+                return json.loads(text)
+            except ValueError:
+                return None
+
+
+class ProtocolRouter:
+    """ASGI application dispatching WebSockets by path and everything else to ``http``"""
+
+    def __init__(self, http, websocket_routes):
+        self.http = http
+        self.websocket_routes = websocket_routes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'websocket':
+            await self.websocket(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        else:
+            await self.http(scope, receive, send)
+
+    async def websocket(self, scope, receive, send):
+        socket = WebSocket(scope, receive, send)
+        try:
+            await socket.wait_for_connect()
+        except WebSocketDisconnect:
+            return
+        handler = self.websocket_routes.get(scope['path'].rstrip('/') + '/')
+        if handler is None:
+            await socket.close(code=4404)
+            return
+        try:
+            await handler(socket)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if socket.accepted:
+                await socket.close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Job, JobAttachment, JobView
+from .models import Job, JobAttachment, JobView, JobViewSketch, JobViewDailySketch
 
 
 @admin.register(Job)
@@ -35,3 +35,20 @@ class JobViewAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('job__title', 'user__name')
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(JobViewSketch)
+class JobViewSketchAdmin(admin.ModelAdmin):
+    list_display = ('job', 'unique_viewers', 'updated_at')
+    search_fields = ('job__title',)
+    exclude = ('sketch',)
+    readonly_fields = ('job', 'unique_viewers', 'created_at', 'updated_at')
+
+
+@admin.register(JobViewDailySketch)
+class JobViewDailySketchAdmin(admin.ModelAdmin):
+    list_display = ('job', 'day', 'updated_at')
+    list_filter = ('day',)
+    search_fields = ('job__title',)
+    exclude = ('sketch',)
+    readonly_fields = ('job', 'day', 'created_at', 'updated_at')
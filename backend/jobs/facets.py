@@ -0,0 +1,179 @@
+"""
+Facet counts for the job board.
+
+:func:`job_facets` counts the jobs of a job board queryset per assignment
+type, urgency, budget bucket and deadline bucket. The counts are
+disjunctive: each facet is counted under every filter chosen except its
+own (:func:`facet_filters`), so picking ``urgency=high`` still shows how
+many jobs the other urgencies would list, while the assignment types count
+only urgent jobs. Every count is a conditional aggregate over the same rows,
+so all facets come from one query instead of a ``GROUP BY`` scan each.
+
+Budget buckets follow the job board's ``min_budget``/``max_budget`` filters:
+a bucket counts the jobs those two filters set to its bounds would list, so
+a job whose budget range spans several buckets counts in each. Deadline
+buckets are relative to the time of the request.
+
+:func:`cached_facets` keeps results for ``JOB_FACETS_CACHE_TIMEOUT`` seconds
+under the normalized filter parameters, so equivalent requests share an
+entry whatever their parameter order, spacing or pagination. Counts can lag
+behind posted and closed jobs by that much.
+"""
+
+import hashlib
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .filters import budget_range
+from .models import Job
+from .search import search_terms
+
+# (name, min_budget, max_budget); None leaves that side open
+BUDGET_BUCKETS = (
+    ('under_100', None, 100),
+    ('100_500', 100, 500),
+    ('500_1000', 500, 1000),
+    ('over_1000', 1000, None),
+)
+# (name, from, to) in days from now; None leaves that side open
+DEADLINE_BUCKETS = (
+    ('overdue', None, 0),
+    ('within_1_day', 0, 1),
+    ('within_3_days', 1, 3),
+    ('within_week', 3, 7),
+    ('within_month', 7, 30),
+    ('later', 30, None),
+)
+# Query parameters that change the counts; everything else shares an entry
+FILTER_PARAMS = ('assignment_type', 'urgency', 'status', 'min_budget', 'max_budget', 'search')
+
+
+def _budget_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(budget_max__gte=low)
+    if high is not None:
+        condition &= Q(budget_min__lte=high)
+    return condition
+
+
+def _deadline_filter(now, start, end):
+    condition = Q()
+    if start is not None:
+        condition &= Q(deadline__gte=now + timedelta(days=start))
+    if end is not None:
+        condition &= Q(deadline__lt=now + timedelta(days=end))
+    return condition
+
+
+def facet_filters(params):
+    """Conditions of the facet filters chosen in the job board query parameters ``params``, by facet"""
+    selected = {}
+    for facet, choices in (('assignment_type', Job.ASSIGNMENT_TYPE_CHOICES), ('urgency', Job.URGENCY_CHOICES)):
+        value = params.get(facet)
+        if not value:
+            continue
+        if value not in dict(choices):
+            raise ValidationError({facet: [f'Select a valid choice. {value} is not one of the available choices.']})
+        selected[facet] = Q(**{facet: value})
+    low, high = budget_range(params)
+    if low is not None or high is not None:
+        selected['budget'] = _budget_filter(low, high)
+    return selected
+
+
+def _others(selected, facet):
+    condition = Q()
+    for name, chosen in selected.items():
+        if name != facet:
+            condition &= chosen
+    return condition
+
+
+def job_facets(queryset, selected=None, now=None):
+    """Counts of ``queryset`` in total and per facet value, from a single query
+
+    ``selected`` maps facets to the condition of the filter chosen on them;
+    each facet is counted under all of them but its own, the total under all.
+    """
+    selected = selected or {}
+    now = now or timezone.now()
+    facets = {
+        'assignment_type': [
+            ({'value': value, 'label': label}, Q(assignment_type=value))
+            for value, label in Job.ASSIGNMENT_TYPE_CHOICES
+        ],
+        'urgency': [
+            ({'value': value, 'label': label}, Q(urgency=value))
+            for value, label in Job.URGENCY_CHOICES
+        ],
+        'budget': [
+            ({'value': name, 'min_budget': low, 'max_budget': high}, _budget_filter(low, high))
+            for name, low, high in BUDGET_BUCKETS
+        ],
+        'deadline': [
+            ({'value': name, 'from_days': start, 'to_days': end}, _deadline_filter(now, start, end))
+            for name, start, end in DEADLINE_BUCKETS
+        ],
+    }
+    aggregates = {'total': Count('id', filter=_others(selected, None) or None)}
+    for facet, buckets in facets.items():
+        others = _others(selected, facet)
+        for index, (_, condition) in enumerate(buckets):
+            aggregates[f'{facet}_{index}'] = Count('id', filter=condition & others)
+    # order_by() drops the ordering, which an aggregate doesn't need
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    return {
+        'total': counts['total'],
+        'facets': {
+            facet: [
+                {**bucket, 'count': counts[f'{facet}_{index}']}
+                for index, (bucket, _) in enumerate(buckets)
+            ]
+            for facet, buckets in facets.items()
+        },
+        'generated_at': now,
+    }
+
+
+def _normalize(name, value):
+    # Choices are validated as given, so only free-form values are normalized
+    if name == 'search':
+        return ' '.join(search_terms(value))
+    if name in ('min_budget', 'max_budget'):
+        try:
+            return format(Decimal(value).normalize(), 'f')
+        except InvalidOperation:
+            return value
+    return value
+
+
+def facet_cache_key(params):
+    """Cache key of the facets for the job board query parameters ``params``"""
+    normalized = sorted(
+        (name, _normalize(name, value))
+        for name in FILTER_PARAMS
+        for value in params.getlist(name)
+        if value
+    )
+    return 'jobs:facets:%s' % hashlib.md5(repr(normalized).encode()).hexdigest()
+
+
+def cached_facets(params, build):
+    """The ``build()`` result for query parameters ``params``, from the cache when possible"""
+    timeout = getattr(settings, 'JOB_FACETS_CACHE_TIMEOUT', 60)
+    if not timeout:
+        return build()
+    key = facet_cache_key(params)
+    result = cache.get(key)
+    if result is None:
+        result = build()
+        cache.set(key, result, timeout)
+    return result
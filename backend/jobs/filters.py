@@ -0,0 +1,71 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from .search import get_search_backend, search_jobs
+
+
+def budget_range(params):
+    """The ``min_budget`` and ``max_budget`` query parameters as decimals, None when not given"""
+    bounds, errors = [], {}
+    for name in ('min_budget', 'max_budget'):
+        value = params.get(name)
+        bound = None
+        if value:
+            try:
+                bound = Decimal(value)
+            except InvalidOperation:
+                pass
+            if bound is None or not bound.is_finite():
+                errors[name] = ['A valid number is required.']
+        bounds.append(bound)
+    if errors:
+        raise ValidationError(errors)
+    return tuple(bounds)
+
+
+class JobSearchFilter(filters.BaseFilterBackend):
+    """Ranked full-text search over jobs using the configured search backend
+    
+    Replaces ``SearchFilter``: matches come from the search index instead of
+    ``LIKE`` scans. The queryset is restricted to every matching job inside
+    the same query, so the other filters and the counts see all matches
+    however many there are. Only the best ``JOB_SEARCH_MAX_RESULTS`` are
+    ranked: they get ``search_rank`` 0 (best) upwards and the remaining
+    matches follow them with ``search_rank`` equal to that count, newest
+    first. The ranked hits are stored on ``view.search_hits``.
+    """
+    
+    search_param = 'search'
+    
+    def get_search_term(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+    
+    def filter_queryset(self, request, queryset, view):
+        term = self.get_search_term(request)
+        if not term:
+            return queryset
+        
+        hits = search_jobs(term, limit=settings.JOB_SEARCH_MAX_RESULTS)
+        view.search_hits = {hit.job_id: hit for hit in hits}
+        if not hits:
+            return queryset.none()
+        
+        return get_search_backend().filter_queryset(queryset, term).annotate(
+            search_rank=Case(
+                *[When(id=hit.job_id, then=Value(position)) for position, hit in enumerate(hits)],
+                default=Value(len(hits)),
+                output_field=IntegerField(),
+            )
+        )
+
+
+class JobOrderingFilter(filters.OrderingFilter):
+    """Ordering filter that defaults to relevance order for search requests"""
+    
+    def get_default_ordering(self, view):
+        if getattr(view, 'search_hits', None) is not None:
+            return ['search_rank', '-created_at']
+        return super().get_default_ordering(view)
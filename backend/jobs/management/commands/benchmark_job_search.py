@@ -0,0 +1,112 @@
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import string
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from jobs.search import (
+    FTS5_CREATE_SQL, FTS5_INSERT_SQL, FTS5_SEARCH_SQL, fts5_match_query
+)
+
+SUBJECTS = [
+    'python', 'django', 'react', 'essay', 'marketing', 'logo', 'statistics', 'nursing',
+    'finance', 'accounting', 'wordpress', 'excel', 'research', 'translation', 'seo',
+    'javascript', 'design', 'history', 'biology', 'economics', 'data', 'analysis',
+]
+
+
+def _sqlite(sql):
+    """Convert Django's %s placeholders for the stdlib sqlite3 driver"""
+    return sql.replace('%s', '?')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the SQLite FTS5 job search index on a synthetic corpus. '
+        'Runs on a temporary database and never touches project data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=100)
+        parser.add_argument('--limit', type=int, default=500)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--vocabulary', type=int, default=30_000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        # Pseudo-words with Zipf-like frequencies: a few very common words and
+        # a long tail, like the descriptions of real job posts
+        words = {''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+                 for _ in range(options['vocabulary'])}
+        vocabulary = SUBJECTS + sorted(words)
+        rng.shuffle(vocabulary)
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+        def text(count):
+            return ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=count))
+
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        db = sqlite3.connect(path)
+        try:
+            db.execute('PRAGMA journal_mode=OFF')
+            db.execute('PRAGMA synchronous=OFF')
+            db.execute(FTS5_CREATE_SQL)
+
+            start = time.perf_counter()
+            insert = _sqlite(FTS5_INSERT_SQL)
+            batch = []
+            for rowid in range(1, options['jobs'] + 1):
+                job_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+                batch.append((
+                    rowid, job_id.hex,
+                    text(6), rng.choice(SUBJECTS), ' '.join(rng.sample(SUBJECTS, 3)), text(60),
+                ))
+                if len(batch) == 10_000:
+                    db.executemany(insert, batch)
+                    batch = []
+            if batch:
+                db.executemany(insert, batch)
+            db.execute("INSERT INTO jobs_search(jobs_search) VALUES ('optimize')")
+            db.commit()
+            self.stdout.write(
+                f"Indexed {options['jobs']} jobs in {time.perf_counter() - start:.1f}s"
+            )
+
+            # "broad" queries use one of the most frequent words; they match a
+            # large share of the corpus and are what the search cache absorbs
+            search = _sqlite(FTS5_SEARCH_SQL)
+            timings = {'selective': [], 'two terms': [], 'prefix': [], 'broad': []}
+            for _ in range(options['queries']):
+                common = vocabulary[rng.randint(0, 20)]
+                term = vocabulary[rng.randint(100, len(vocabulary) - 1)]
+                queries = {
+                    'selective': term,
+                    'two terms': f'{term} {vocabulary[rng.randint(100, 2000)]}',
+                    'prefix': term[:4],
+                    'broad': common,
+                }
+                for kind, query in queries.items():
+                    start = time.perf_counter()
+                    db.execute(search, (fts5_match_query(query), options['limit'])).fetchall()
+                    timings[kind].append((time.perf_counter() - start) * 1000)
+
+            self.stdout.write(f"{'query':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            for kind, samples in timings.items():
+                samples.sort()
+                p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+                p99 = samples[max(int(len(samples) * 0.99) - 1, 0)]
+                self.stdout.write(
+                    f'{kind:<12} {statistics.median(samples):>8.2f} {p95:>8.2f} {p99:>8.2f}'
+                )
+        finally:
+            db.close()
+            os.remove(path)
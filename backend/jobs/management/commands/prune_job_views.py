@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from jobs.models import JobView, JobViewDailySketch
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete raw job view rows older than the retention period. Unique '
+        'viewer counts come from the view sketches and are not affected.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.JOB_VIEWS_RETENTION_DAYS,
+            help='Keep raw views from the last N days (default: JOB_VIEWS_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--sketch-days',
+            type=int,
+            default=0,
+            help='Also delete daily view sketches older than N days (default: keep them)',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted = 0
+        # Delete in batches so a large backlog doesn't hold one long transaction
+        while True:
+            ids = list(
+                JobView.objects.filter(created_at__lt=cutoff)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted += JobView.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} job views'))
+
+        if options['sketch_days']:
+            day = timezone.localdate() - timedelta(days=options['sketch_days'])
+            count = JobViewDailySketch.objects.filter(day__lt=day).delete()[0]
+            self.stdout.write(self.style.SUCCESS(f'Deleted {count} daily view sketches'))
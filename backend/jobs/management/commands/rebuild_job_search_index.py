@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from jobs.models import Job
+from jobs.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the job search index from all open jobs'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        jobs = Job.objects.filter(status=Job.OPEN).only(
+            'id', 'title', 'subject', 'skills_required', 'description', 'created_at'
+        ).order_by('created_at')
+        backend.rebuild(jobs.iterator(chunk_size=2000))
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {backend.__class__.__name__} index'
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from jobs.recommendations import rebuild_job_vectors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the skill vectors of all open jobs used by job recommendations'
+
+    def handle(self, *args, **options):
+        rows = rebuild_job_vectors()
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} job skill rows'))
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-17 10:00
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """Create the FTS5 table used by jobs.search.SQLiteFTS5Backend
+    
+    The table is filled by 0007, which also creates the rowid map it needs.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from jobs.search import FTS5_CREATE_SQL
+    
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FTS5_CREATE_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from jobs.search import FTS5_DROP_SQL
+    
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FTS5_DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
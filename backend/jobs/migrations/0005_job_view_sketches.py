@@ -0,0 +1,83 @@
+# Generated by Django 6.0 on 2026-10-17 17:53
+
+import django.db.models.deletion
+import uuid
+from collections import defaultdict
+from django.db import migrations, models
+from django.utils import timezone
+
+from common.hyperloglog import HyperLogLog
+
+SKETCH_PRECISION = 10
+
+
+def build_view_sketches(apps, schema_editor):
+    """Seed the sketches from the existing raw job_views rows"""
+    JobView = apps.get_model('jobs', 'JobView')
+    JobViewSketch = apps.get_model('jobs', 'JobViewSketch')
+    JobViewDailySketch = apps.get_model('jobs', 'JobViewDailySketch')
+
+    def save(job_id, lifetime, daily):
+        JobViewSketch.objects.create(
+            job_id=job_id, sketch=lifetime.to_bytes(), unique_viewers=lifetime.count()
+        )
+        JobViewDailySketch.objects.bulk_create([
+            JobViewDailySketch(job_id=job_id, day=day, sketch=sketch.to_bytes())
+            for day, sketch in daily.items()
+        ])
+
+    views = JobView.objects.order_by('job_id').values_list('job_id', 'user_id', 'ip_address', 'created_at')
+    current = None
+    for job_id, user_id, ip_address, created_at in views.iterator(chunk_size=5000):
+        if job_id != current:
+            if current is not None:
+                save(current, lifetime, daily)
+            current = job_id
+            lifetime = HyperLogLog(SKETCH_PRECISION)
+            daily = defaultdict(lambda: HyperLogLog(SKETCH_PRECISION))
+        key = f'u:{user_id}' if user_id else f'ip:{ip_address}'
+        lifetime.add(key)
+        daily[timezone.localtime(created_at).date()].add(key)
+    if current is not None:
+        save(current, lifetime, daily)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_jobs_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobViewSketch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sketch', models.BinaryField()),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='view_sketch', to='jobs.job')),
+            ],
+            options={
+                'db_table': 'job_view_sketches',
+            },
+        ),
+        migrations.CreateModel(
+            name='JobViewDailySketch',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('day', models.DateField()),
+                ('sketch', models.BinaryField()),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_view_sketches', to='jobs.job')),
+            ],
+            options={
+                'db_table': 'job_view_daily_sketches',
+                'ordering': ['day'],
+                'unique_together': {('job', 'day')},
+            },
+        ),
+        migrations.RunPython(build_view_sketches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:10
+
+from django.db import migrations
+
+
+def create_rowid_map(apps, schema_editor):
+    """Map job ids to FTS5 rowids and rebuild the index with collision-free rowids"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from jobs.search import FTS5_IDS_CREATE_SQL, FTS5_IDS_TRIGGER_SQL, fts5_rebuild
+    
+    Job = apps.get_model('jobs', 'Job')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FTS5_IDS_CREATE_SQL)
+        cursor.execute(FTS5_IDS_TRIGGER_SQL)
+        fts5_rebuild(cursor, Job.objects.filter(status='open').order_by('created_at').iterator())
+
+
+def drop_rowid_map(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from jobs.search import FTS5_IDS_DROP_SQL
+    
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FTS5_IDS_DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_job_skill_vectors'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_rowid_map, drop_rowid_map),
+    ]
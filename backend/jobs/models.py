@@ -72,6 +72,9 @@ class Job(BaseModel):
     class Meta:
         db_table = 'jobs'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at', '-id'], name='jobs_status_created_idx'),
+        ]
         
     def __str__(self):
         return f"{self.title} - {self.client.name}"
@@ -108,3 +111,57 @@ class JobView(BaseModel):
     class Meta:
         db_table = 'job_views'
         unique_together = ('job', 'user')  # One view per user per job
+
+
+class JobViewSketch(BaseModel):
+    """HyperLogLog sketch of all distinct viewers of a job"""
+    
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, related_name='view_sketch')
+    sketch = models.BinaryField()
+    unique_viewers = models.PositiveIntegerField(default=0)  # Estimate as of the last flush
+    
+    class Meta:
+        db_table = 'job_view_sketches'
+        
+    def __str__(self):
+        return f"{self.job_id} - ~{self.unique_viewers} viewers"
+
+
+class JobViewDailySketch(BaseModel):
+    """HyperLogLog sketch of the distinct viewers of a job on one day
+    
+    Daily sketches merge into the sketch for any date range.
+    """
+    
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='daily_view_sketches')
+    day = models.DateField()
+    sketch = models.BinaryField()
+    
+    class Meta:
+        db_table = 'job_view_daily_sketches'
+        unique_together = ('job', 'day')
+        ordering = ['day']
+        
+    def __str__(self):
+        return f"{self.job_id} - {self.day}"
+
+
+class JobSkill(BaseModel):
+    """Skill vector of an open job: one row per required skill
+    
+    The job-side counterpart of ``users.FreelancerSkill``, maintained from
+    ``skills_required`` (see ``jobs/recommendations.py``). Only open jobs have
+    rows, so matching never sees closed work. ``weight`` is the skill's
+    component of the job's L2-normalized vector.
+    """
+    
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='skill_vector')
+    skill = models.ForeignKey('users.Skill', on_delete=models.CASCADE, related_name='jobs')
+    weight = models.FloatField()
+    
+    class Meta:
+        db_table = 'job_skills'
+        unique_together = ('job', 'skill')
+        
+    def __str__(self):
+        return f"{self.job_id} - {self.skill_id}"
@@ -0,0 +1,372 @@
+"""
+Personalized job feed for freelancers.
+
+Freelancers and open jobs are sparse vectors over the skill dictionary
+(``users.Skill``): freelancers through the ``FreelancerSkill`` index, jobs
+through ``JobSkill`` rows kept in line with ``skills_required``. Both are
+binary and L2-normalized, so the cosine similarity of a job and a
+freelancer is the sum of the job's weights over the freelancer's skills
+divided by the square root of the freelancer's skill count, and the
+database finds and orders the best matches in one grouped query.
+
+The feed score combines four components between 0 and 1 with ``WEIGHTS``:
+
+* ``skills``: that cosine similarity
+* ``rate``: 1 when the job's ``budget_max`` pays for an hour at the
+  freelancer's ``hourly_rate``, proportionally less when it doesn't
+* ``history``: the share of the freelancer's orders in the job's assignment type
+* ``freshness``: halves every ``FRESHNESS_HALF_LIFE`` days after posting
+
+The top ``JOB_FEED_SIZE`` jobs of each freelancer are cached, serialized,
+next to the profile they were scored with, so serving a feed is a single
+cache read. When a job is posted, changed or closed it is merged into or
+dropped from the cached feeds of the freelancers sharing one of its skills
+without querying their profiles (:func:`update_job_feeds`). Feeds are
+dropped when the freelancer's profile changes or removals leave them short,
+and rebuilt on the next read; they are also rebuilt after
+``JOB_FEED_CACHE_TIMEOUT`` seconds, which bounds how stale job fields such
+as ``offers_count`` get. Jobs without skills only reach feeds through the
+newest open jobs that top up short feeds when they are built.
+
+Feeds are patched by the background task of whichever process saved the
+job, so they are only cached when every process shares the cache
+(``CACHE_SHARED``); otherwise each request builds its feed. A feed is only
+written under its lock, taken with ``cache.add()``: patches re-read it under
+the lock, so concurrent patches don't overwrite each other, and a build
+holds it from before reading the database until the feed is stored. A patch
+finding a feed locked marks it stale instead, and a stale feed is rebuilt on
+its next read, so no change is lost to a write in flight.
+"""
+
+import math
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from offers.models import Offer
+from orders.models import Order
+from users.models import FreelancerProfile, FreelancerSkill
+from users.skills import freelancers_with_skills, get_or_create_skills, normalize_skills
+
+from .models import Job, JobSkill
+from .serializers import JobListSerializer
+
+WEIGHTS = {'skills': 0.6, 'rate': 0.15, 'history': 0.15, 'freshness': 0.1}
+FRESHNESS_HALF_LIFE = 7
+# Best skill matches scored in Python when a feed is built
+CANDIDATES = 500
+# Cached feeds read per cache round trip when merging a job
+UPDATE_BATCH_SIZE = 500
+# Job fields score_components() reads
+SCORED_FIELDS = ('id', 'budget_max', 'assignment_type', 'created_at')
+# Seconds a feed lock outlives a build or patch that died holding it
+LOCK_TIMEOUT = 30
+
+
+def _feed_size():
+    return getattr(settings, 'JOB_FEED_SIZE', 50)
+
+
+def _feed_timeout():
+    return getattr(settings, 'JOB_FEED_CACHE_TIMEOUT', 3600)
+
+
+def _caching():
+    return settings.CACHE_SHARED and _feed_timeout()
+
+
+def feed_key(freelancer_id):
+    return f'jobs:feed:{freelancer_id}'
+
+
+def _stale_key(freelancer_id):
+    return f'jobs:feed:stale:{freelancer_id}'
+
+
+def _lock_key(freelancer_id):
+    return f'jobs:feed:lock:{freelancer_id}'
+
+
+def _acquire(freelancer_id):
+    """Lock the feed of ``freelancer_id``; returns the token to release it with, or None if it is taken"""
+    token = uuid.uuid4().hex
+    return token if cache.add(_lock_key(freelancer_id), token, LOCK_TIMEOUT) else None
+
+
+def _release(tokens):
+    """Release the feed locks in ``tokens``, a dict of freelancer ids to tokens, that are still ours"""
+    keys = {_lock_key(freelancer_id): token for freelancer_id, token in tokens.items()}
+    cache.delete_many([key for key, token in cache.get_many(keys).items() if token == keys[key]])
+
+
+def _vector_weight(skill_count):
+    return 1 / math.sqrt(skill_count) if skill_count else 0.0
+
+
+def sync_job_vector(job):
+    """Bring the ``JobSkill`` rows of ``job`` in line with it; returns its skill ids (none unless open)"""
+    if job.status != Job.OPEN:
+        JobSkill.objects.filter(job_id=job.pk).delete()
+        return set()
+
+    skill_ids = {skill.id for skill in get_or_create_skills(job.skills_required).values()}
+    weight = _vector_weight(len(skill_ids))
+    with transaction.atomic():
+        vector = JobSkill.objects.filter(job_id=job.pk)
+        vector.exclude(skill_id__in=skill_ids).delete()
+        vector.update(weight=weight)
+
+        existing = set(vector.values_list('skill_id', flat=True))
+        JobSkill.objects.bulk_create([
+            JobSkill(job_id=job.pk, skill_id=skill_id, weight=weight)
+            for skill_id in skill_ids - existing
+        ], ignore_conflicts=True)
+    return skill_ids
+
+
+def rebuild_job_vectors(batch_size=2000):
+    """Recompute the vectors of all open jobs from scratch; returns the number of rows written"""
+    skill_ids = {}
+    rows = []
+    jobs = Job.objects.filter(status=Job.OPEN).only('id', 'skills_required')
+    with transaction.atomic():
+        JobSkill.objects.all().delete()
+        for job in jobs.iterator(chunk_size=batch_size):
+            slugs = normalize_skills(job.skills_required)
+            if any(slug not in skill_ids for slug in slugs):
+                skill_ids.update({slug: skill.id for slug, skill in get_or_create_skills(job.skills_required).items()})
+            weight = _vector_weight(len(slugs))
+            rows.extend(JobSkill(job_id=job.pk, skill_id=skill_ids[slug], weight=weight) for slug in slugs)
+        JobSkill.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def freelancer_profile(user):
+    """What scoring a job for ``user`` needs: skill ids, hourly rate and order history by assignment type"""
+    try:
+        rate = user.freelancer_profile.hourly_rate
+    except FreelancerProfile.DoesNotExist:
+        rate = None
+    skills = FreelancerSkill.objects.filter(freelancer_id=user.pk).values_list('skill_id', flat=True)
+    orders = dict(
+        Order.objects.filter(freelancer_id=user.pk).order_by()
+        .values_list('job__assignment_type').annotate(count=Count('id'))
+    )
+    total = sum(orders.values())
+    return {
+        'skills': sorted(skills),
+        'rate': float(rate) if rate else None,
+        'history': {kind: count / total for kind, count in orders.items()},
+    }
+
+
+def score_components(profile, job, skill_match, now):
+    """The components for a freelancer with ``profile`` of ``job``, a dict of ``SCORED_FIELDS``"""
+    rate = profile['rate']
+    budget = float(job['budget_max'])
+    age_days = max((now - job['created_at']).total_seconds(), 0) / 86400
+    return {
+        'skills': skill_match,
+        'rate': 1.0 if not rate or budget >= rate else budget / rate,
+        'history': profile['history'].get(job['assignment_type'], 0.0),
+        'freshness': 0.5 ** (age_days / FRESHNESS_HALF_LIFE),
+    }
+
+
+def _score(components):
+    return sum(WEIGHTS[name] * value for name, value in components.items())
+
+
+def _entry(job_data, components):
+    return {
+        'score': round(_score(components), 4),
+        'scores': {name: round(value, 4) for name, value in components.items()},
+        'job': job_data,
+    }
+
+
+def _serialize(job):
+    return dict(JobListSerializer(job).data)
+
+
+def _ranked(items):
+    return sorted(items, key=lambda item: item['score'], reverse=True)[:_feed_size()]
+
+
+def build_feed(user, now=None):
+    """Score open jobs for ``user``, cache the top ones when possible and return the feed"""
+    if not _caching():
+        return _build(user, now)
+    token = _acquire(user.pk)
+    if token is None:
+        # Another build or a patch is writing this feed
+        return _build(user, now)
+    try:
+        # Cleared before reading the database: a patch marking the feed
+        # stale from now on may concern a change this build doesn't see
+        cache.delete(_stale_key(user.pk))
+        feed = _build(user, now)
+        cache.set(feed_key(user.pk), feed, _feed_timeout())
+    finally:
+        _release({user.pk: token})
+    return feed
+
+
+def _build(user, now=None):
+    now = now or timezone.now()
+    size = _feed_size()
+    profile = freelancer_profile(user)
+    open_jobs = (
+        Job.objects.filter(status=Job.OPEN)
+        .exclude(id__in=Offer.objects.filter(freelancer_id=user.pk).values('job_id'))
+        .values(*SCORED_FIELDS)
+    )
+
+    # Candidates are scored from a few columns; only the jobs making the feed are loaded
+    candidates = []
+    if profile['skills']:
+        norm = math.sqrt(len(profile['skills']))
+        matches = (
+            open_jobs.filter(skill_vector__skill_id__in=profile['skills'])
+            .annotate(dot=Sum('skill_vector__weight'))
+            .order_by('-dot', '-created_at')[:CANDIDATES]
+        )
+        candidates = [(row, min(row['dot'] / norm, 1.0)) for row in matches]
+    if len(candidates) < size:
+        # Too few matches: top up with the newest open jobs
+        seen = [row['id'] for row, _ in candidates]
+        candidates += [(row, 0.0) for row in open_jobs.exclude(id__in=seen).order_by('-created_at')[:size - len(candidates)]]
+
+    scored = sorted(
+        ((row['id'], score_components(profile, row, match, now)) for row, match in candidates),
+        key=lambda pair: _score(pair[1]), reverse=True,
+    )[:size]
+    jobs = Job.objects.select_related('client').in_bulk([job_id for job_id, _ in scored])
+    scored = [(jobs[job_id], components) for job_id, components in scored if job_id in jobs]
+    # One serializer for the whole feed: its fields are built once
+    serialized = JobListSerializer([job for job, _ in scored], many=True).data
+    return {
+        'generated_at': now,
+        'profile': profile,
+        'items': [_entry(dict(data), components) for data, (_, components) in zip(serialized, scored)],
+    }
+
+
+def get_feed(user):
+    """The cached feed of ``user``, built when missing, stale or older than ``JOB_FEED_CACHE_TIMEOUT``"""
+    if not _caching():
+        return build_feed(user)
+    cached = cache.get_many([feed_key(user.pk), _stale_key(user.pk)])
+    feed = cached.get(feed_key(user.pk))
+    if (feed is None or _stale_key(user.pk) in cached
+            or (timezone.now() - feed['generated_at']).total_seconds() > _feed_timeout()):
+        feed = build_feed(user)
+    return feed
+
+
+def invalidate_feed(freelancer_id):
+    """Have the feed of ``freelancer_id`` rebuilt on its next read"""
+    if _caching():
+        # A flag rather than a delete, which a build in flight would undo
+        cache.set(_stale_key(freelancer_id), True, _feed_timeout())
+
+
+def discard_from_feed(freelancer_id, job_id):
+    """Take ``job_id`` out of the cached feed of ``freelancer_id``, e.g. once they made an offer on it"""
+    if _caching():
+        _patch_feeds([freelancer_id], str(job_id))
+
+
+def update_job_feeds(job_id, skills):
+    """Sync the vector of ``job_id`` and merge it into, or drop it from, the cached feeds it concerns
+
+    ``skills`` are the job's skills as last saved, to find the feeds of a
+    deleted job. Only feeds of freelancers sharing a skill are touched, so
+    freelancers matching just skills the job dropped keep it until their
+    feed is rebuilt.
+    """
+    job = Job.objects.select_related('client').filter(pk=job_id).first()
+    skill_ids = set()
+    if job is not None:
+        skill_ids = sync_job_vector(job)
+        skills = job.skills_required
+    if not _caching():
+        return
+    freelancer_ids = list(freelancers_with_skills(skills))
+    if not freelancer_ids:
+        return
+
+    merge = _merger(job, skill_ids) if skill_ids else None
+    for start in range(0, len(freelancer_ids), UPDATE_BATCH_SIZE):
+        _patch_feeds(freelancer_ids[start:start + UPDATE_BATCH_SIZE], str(job_id), merge)
+
+
+def _merger(job, skill_ids):
+    """Scores open ``job`` for the profile of a cached feed, or None when it doesn't belong in it"""
+    now = timezone.now()
+    job_data = _serialize(job)
+    fields = {name: getattr(job, name) for name in SCORED_FIELDS}
+    offered = set(Offer.objects.filter(job_id=job.pk).values_list('freelancer_id', flat=True))
+
+    def merge(freelancer_id, profile):
+        shared = len(skill_ids.intersection(profile['skills']))
+        if freelancer_id in offered or not shared:
+            return None
+        match = shared / math.sqrt(len(skill_ids) * len(profile['skills']))
+        return _entry(job_data, score_components(profile, fields, match, now))
+    return merge
+
+
+def _patched(feed, freelancer_id, job_id, merge):
+    """``feed`` without ``job_id`` and with ``merge(freelancer_id, profile)``, or None if that changes nothing"""
+    items = [item for item in feed['items'] if item['job']['id'] != job_id]
+    entry = merge(freelancer_id, feed['profile']) if merge else None
+    if entry is not None:
+        items = _ranked(items + [entry])
+    elif len(items) == len(feed['items']):
+        return None
+    return {**feed, 'items': items}
+
+
+def _patch_feeds(freelancer_ids, job_id, merge=None):
+    """Remove ``job_id`` from the cached feeds of ``freelancer_ids`` and add ``merge(freelancer_id, profile)``
+
+    Feeds left with fewer than half of ``JOB_FEED_SIZE`` jobs are dropped
+    instead, to be rebuilt with new candidates on the next read. Feeds
+    locked by a build or another patch are marked stale.
+    """
+    keys = {feed_key(freelancer_id): freelancer_id for freelancer_id in freelancer_ids}
+    cached = cache.get_many([*keys, *map(_lock_key, freelancer_ids)])
+    stale = {freelancer_id for freelancer_id in freelancer_ids if _lock_key(freelancer_id) in cached}
+    tokens = {}
+    for key, freelancer_id in keys.items():
+        feed = cached.get(key)
+        if feed is None or freelancer_id in stale or _patched(feed, freelancer_id, job_id, merge) is None:
+            continue
+        token = _acquire(freelancer_id)
+        if token is None:
+            stale.add(freelancer_id)
+        else:
+            tokens[freelancer_id] = token
+
+    try:
+        # Re-read under the locks: the feeds may have changed since
+        changed, short = {}, []
+        for key, feed in cache.get_many([feed_key(freelancer_id) for freelancer_id in tokens]).items():
+            feed = _patched(feed, keys[key], job_id, merge)
+            if feed is None:
+                continue
+            if len(feed['items']) < _feed_size() // 2:
+                short.append(key)
+            else:
+                changed[key] = feed
+        # Expiry is enforced from generated_at, see get_feed
+        cache.set_many(changed, _feed_timeout())
+        cache.delete_many(short)
+    finally:
+        _release(tokens)
+    cache.set_many({_stale_key(freelancer_id): True for freelancer_id in stale}, _feed_timeout())
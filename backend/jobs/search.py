@@ -0,0 +1,362 @@
+"""
+Full-text search for the job board.
+
+Search goes through a pluggable backend selected by the ``JOB_SEARCH_BACKEND``
+setting (a dotted path). When unset, the backend is picked from the database
+vendor: SQLite uses an FTS5 virtual table kept in sync by ``jobs.signals``,
+PostgreSQL uses ``tsvector`` ranking.
+
+Only open jobs are indexed since those are the only ones the job board lists.
+"""
+
+import hashlib
+import re
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+@dataclass
+class SearchHit:
+    """One ranked search result"""
+
+    job_id: uuid.UUID
+    rank: float
+
+
+class JobSearchBackend:
+    """Interface implemented by job search backends"""
+
+    def index(self, job):
+        """Add or refresh ``job`` in the index"""
+        raise NotImplementedError
+
+    def remove(self, job):
+        """Remove a job from the index"""
+        raise NotImplementedError
+
+    def rebuild(self, jobs):
+        """Replace the whole index with ``jobs``"""
+        raise NotImplementedError
+
+    def search(self, query, limit):
+        """Return up to ``limit`` :class:`SearchHit` objects, best match first"""
+        raise NotImplementedError
+
+    def filter_queryset(self, queryset, query):
+        """Restrict ``queryset`` to every job matching ``query``, unranked and uncapped"""
+        raise NotImplementedError
+
+
+def search_terms(query):
+    """Split free text into search terms"""
+    return _TOKEN.findall(query.lower())
+
+
+def _term_pattern(terms):
+    # Any term may match as a word prefix; also covers stemmed matches
+    return re.compile(r'\b(%s)\w*' % '|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+
+
+def highlight(text, terms):
+    """Wrap words of ``text`` starting with any of ``terms`` in highlight markers
+    
+    Highlighting is done here rather than in the database so it only runs for
+    the page of results being returned, not for every match.
+    """
+    if not terms or not text:
+        return escape(text or '')
+    pattern = _term_pattern(terms)
+    parts = []
+    position = 0
+    for match in pattern.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(f'{HIGHLIGHT_START}{escape(match.group(0))}{HIGHLIGHT_END}')
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return ''.join(parts)
+
+
+def snippet(text, terms, words=24):
+    """Highlighted excerpt of about ``words`` words around the first match"""
+    text = text or ''
+    tokens = text.split()
+    match = _term_pattern(terms).search(text) if terms else None
+    if match is None:
+        start = 0
+    else:
+        start = max(len(text[:match.start()].split()) - words // 3, 0)
+    excerpt = ' '.join(tokens[start:start + words])
+    if start > 0:
+        excerpt = '...' + excerpt
+    if start + words < len(tokens):
+        excerpt += '...'
+    return highlight(excerpt, terms)
+
+
+# --- SQLite FTS5 ---------------------------------------------------------------
+
+FTS5_TABLE = 'jobs_search'
+
+FTS5_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS5_TABLE} USING fts5("
+    "job_id UNINDEXED, title, subject, skills, description, "
+    "tokenize='porter unicode61', prefix='2 3 4')"
+)
+
+FTS5_DROP_SQL = f"DROP TABLE IF EXISTS {FTS5_TABLE}"
+
+# Maps job ids to FTS5 rowids so updates and deletes use the rowid b-tree
+# (job_id is UNINDEXED in the FTS5 table). New jobs get max(rowid) + 1, so
+# inserts append to the index instead of landing at random positions.
+# Deleting a mapping deletes its FTS5 row through the trigger, and FTS5 rows
+# are written with INSERT OR REPLACE, so a job is indexed or removed with the
+# same number of statements as before the map (needs SQLite 3.35 for RETURNING).
+FTS5_IDS_TABLE = 'jobs_search_ids'
+
+FTS5_IDS_CREATE_SQL = (
+    f"CREATE TABLE IF NOT EXISTS {FTS5_IDS_TABLE} ("
+    "rowid INTEGER PRIMARY KEY, job_id TEXT NOT NULL UNIQUE)"
+)
+
+FTS5_IDS_TRIGGER_SQL = (
+    f"CREATE TRIGGER IF NOT EXISTS {FTS5_IDS_TABLE}_delete AFTER DELETE ON {FTS5_IDS_TABLE} "
+    f"BEGIN DELETE FROM {FTS5_TABLE} WHERE rowid = old.rowid; END"
+)
+
+FTS5_IDS_DROP_SQL = f"DROP TABLE IF EXISTS {FTS5_IDS_TABLE}"
+
+FTS5_IDS_ASSIGN_SQL = (
+    f"INSERT INTO {FTS5_IDS_TABLE} (job_id) VALUES (%s) "
+    "ON CONFLICT(job_id) DO UPDATE SET job_id = excluded.job_id RETURNING rowid"
+)
+
+FTS5_IDS_INSERT_SQL = f"INSERT INTO {FTS5_IDS_TABLE} (rowid, job_id) VALUES (%s, %s)"
+
+FTS5_IDS_DELETE_SQL = f"DELETE FROM {FTS5_IDS_TABLE} WHERE job_id = %s"
+
+FTS5_INSERT_SQL = (
+    f"INSERT OR REPLACE INTO {FTS5_TABLE} (rowid, job_id, title, subject, skills, description) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+
+# bm25 column weights: job_id (unindexed), title, subject, skills, description
+FTS5_SEARCH_SQL = (
+    f"SELECT job_id, bm25({FTS5_TABLE}, 0.0, 10.0, 4.0, 4.0, 1.0) AS rank "
+    f"FROM {FTS5_TABLE} WHERE {FTS5_TABLE} MATCH %s ORDER BY rank LIMIT %s"
+)
+
+# job_id holds the hex form SQLite stores UUID primary keys in
+FTS5_MATCHING_IDS_SQL = f"SELECT job_id FROM {FTS5_TABLE} WHERE {FTS5_TABLE} MATCH %s"
+
+
+def fts5_match_query(query):
+    """Translate free text into an FTS5 query
+    
+    Every term must match; the last one also matches as a prefix so partially
+    typed words still find results.
+    """
+    terms = [f'"{term}"' for term in search_terms(query)]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def fts5_job_id(job):
+    return uuid.UUID(str(job.id)).hex
+
+
+def fts5_row(job, rowid):
+    return (
+        rowid,
+        fts5_job_id(job),
+        job.title,
+        job.subject,
+        ' '.join(str(skill) for skill in job.skills_required or []),
+        job.description,
+    )
+
+
+def fts5_rebuild(cursor, jobs, batch_size=2000):
+    """Replace the FTS5 table and its rowid map with ``jobs``, numbered in order"""
+    # FTS5 rows first, so the trigger finds nothing left to delete
+    cursor.execute(f"DELETE FROM {FTS5_TABLE}")
+    cursor.execute(f"DELETE FROM {FTS5_IDS_TABLE}")
+    ids, rows = [], []
+    for rowid, job in enumerate(jobs, start=1):
+        ids.append((rowid, fts5_job_id(job)))
+        rows.append(fts5_row(job, rowid))
+        if len(rows) >= batch_size:
+            cursor.executemany(FTS5_IDS_INSERT_SQL, ids)
+            cursor.executemany(FTS5_INSERT_SQL, rows)
+            ids, rows = [], []
+    if rows:
+        cursor.executemany(FTS5_IDS_INSERT_SQL, ids)
+        cursor.executemany(FTS5_INSERT_SQL, rows)
+    cursor.execute(f"INSERT INTO {FTS5_TABLE}({FTS5_TABLE}) VALUES ('optimize')")
+
+
+class SQLiteFTS5Backend(JobSearchBackend):
+    """Search backed by an FTS5 virtual table (see migrations jobs.0003 and jobs.0007)"""
+
+    def index(self, job):
+        with connection.cursor() as cursor:
+            cursor.execute(FTS5_IDS_ASSIGN_SQL, [fts5_job_id(job)])
+            rowid = cursor.fetchone()[0]
+            cursor.execute(FTS5_INSERT_SQL, fts5_row(job, rowid))
+
+    def remove(self, job):
+        with connection.cursor() as cursor:
+            cursor.execute(FTS5_IDS_DELETE_SQL, [fts5_job_id(job)])
+
+    def rebuild(self, jobs, batch_size=2000):
+        with connection.cursor() as cursor:
+            fts5_rebuild(cursor, jobs, batch_size)
+
+    def search(self, query, limit):
+        match = fts5_match_query(query)
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(FTS5_SEARCH_SQL, [match, limit])
+            return [SearchHit(uuid.UUID(job_id), rank) for job_id, rank in cursor.fetchall()]
+
+    def filter_queryset(self, queryset, query):
+        match = fts5_match_query(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(id__in=RawSQL(FTS5_MATCHING_IDS_SQL, [match]))
+
+
+# --- PostgreSQL ----------------------------------------------------------------
+
+class PostgresSearchBackend(JobSearchBackend):
+    """Search using PostgreSQL ``tsvector`` ranking
+
+    The vector is computed from the job columns, so there is nothing to keep
+    in sync; add a GIN expression index on the same vector for large tables.
+    """
+
+    def index(self, job):
+        pass
+
+    def remove(self, job):
+        pass
+
+    def rebuild(self, jobs):
+        pass
+
+    def _vector_and_query(self, query):
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+
+        terms = search_terms(query)
+        if not terms:
+            return None, None
+        vector = (
+            SearchVector('title', weight='A')
+            + SearchVector('subject', weight='B')
+            + SearchVector('description', weight='C')
+        )
+        terms[-1] += ':*'
+        return vector, SearchQuery(' & '.join(terms), search_type='raw')
+
+    def search(self, query, limit):
+        from django.contrib.postgres.search import SearchRank
+        from .models import Job
+
+        vector, search_query = self._vector_and_query(query)
+        if vector is None:
+            return []
+        jobs = (
+            Job.objects.filter(status=Job.OPEN)
+            .annotate(rank=SearchRank(vector, search_query))
+            .filter(rank__gt=0)
+            .order_by('-rank')
+            .values_list('id', 'rank')[:limit]
+        )
+        return [SearchHit(job_id, -rank) for job_id, rank in jobs]
+
+    def filter_queryset(self, queryset, query):
+        vector, search_query = self._vector_and_query(query)
+        if vector is None:
+            return queryset.none()
+        return queryset.annotate(search_vector=vector).filter(search_vector=search_query)
+
+
+class NullSearchBackend(JobSearchBackend):
+    """Fallback for databases without a dedicated backend: substring matching"""
+
+    def index(self, job):
+        pass
+
+    def remove(self, job):
+        pass
+
+    def rebuild(self, jobs):
+        pass
+
+    def _condition(self, query):
+        from django.db.models import Q
+
+        condition = Q()
+        for term in search_terms(query):
+            condition &= Q(title__icontains=term) | Q(subject__icontains=term) | Q(description__icontains=term)
+        return condition
+
+    def search(self, query, limit):
+        from .models import Job
+
+        job_ids = Job.objects.filter(self._condition(query), status=Job.OPEN).values_list('id', flat=True)[:limit]
+        return [SearchHit(job_id, position) for position, job_id in enumerate(job_ids)]
+
+    def filter_queryset(self, queryset, query):
+        return queryset.filter(self._condition(query))
+
+
+_VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def search_jobs(query, limit):
+    """Ranked hits for ``query`` from the configured backend, cached briefly
+    
+    Broad queries are both the most expensive to rank and the most popular,
+    so a short cache absorbs most of their cost. Results can lag the index by
+    ``JOB_SEARCH_CACHE_TIMEOUT`` seconds; callers still filter on job status.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    timeout = getattr(settings, 'JOB_SEARCH_CACHE_TIMEOUT', 60)
+    if not timeout:
+        return get_search_backend().search(query, limit)
+    
+    key = 'jobs:search:%s' % hashlib.md5(f"{limit}:{' '.join(terms)}".encode()).hexdigest()
+    hits = cache.get(key)
+    if hits is None:
+        hits = get_search_backend().search(query, limit)
+        cache.set(key, hits, timeout)
+    return hits
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """Return the configured :class:`JobSearchBackend` instance"""
+    path = getattr(settings, 'JOB_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    return _VENDOR_BACKENDS.get(connection.vendor, NullSearchBackend)()
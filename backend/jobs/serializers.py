@@ -1,10 +1,12 @@
 from rest_framework import serializers
 from django.utils import timezone
+from common.serializers import TimedModelSerializer, TimedSerializer
+from . import search
 from .models import Job, JobAttachment, JobView
 from users.serializers import UserProfileSerializer
 
 
-class JobAttachmentSerializer(serializers.ModelSerializer):
+class JobAttachmentSerializer(TimedModelSerializer):
     """Serializer for job attachments"""
     
     class Meta:
@@ -13,7 +15,7 @@ class JobAttachmentSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(TimedModelSerializer):
     """Serializer for job listing and details"""
     
     attachments = serializers.SerializerMethodField()
@@ -42,7 +44,7 @@ class JobSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class JobCreateSerializer(serializers.ModelSerializer):
+class JobCreateSerializer(TimedModelSerializer):
     """Serializer for creating jobs"""
     
     class Meta:
@@ -55,7 +57,7 @@ class JobCreateSerializer(serializers.ModelSerializer):
         return job
 
 
-class JobUpdateSerializer(serializers.ModelSerializer):
+class JobUpdateSerializer(TimedModelSerializer):
     """Serializer for updating jobs (partial updates allowed)"""
 
     class Meta:
@@ -71,7 +73,7 @@ class JobUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class JobListSerializer(serializers.ModelSerializer):
+class JobListSerializer(TimedModelSerializer):
     """Simplified serializer for job listing"""
     
     client_name = serializers.CharField(source='client.name', read_only=True)
@@ -85,7 +87,23 @@ class JobListSerializer(serializers.ModelSerializer):
                  'created_at']
 
 
-class GuestJobSubmissionSerializer(serializers.Serializer):
+class JobSearchResultSerializer(JobListSerializer):
+    """Job listing entry for search results, with highlighted matches"""
+    
+    search_highlight = serializers.SerializerMethodField()
+    search_snippet = serializers.SerializerMethodField()
+    
+    class Meta(JobListSerializer.Meta):
+        fields = JobListSerializer.Meta.fields + ['search_highlight', 'search_snippet']
+    
+    def get_search_highlight(self, obj):
+        return search.highlight(obj.title, self.context.get('search_terms'))
+    
+    def get_search_snippet(self, obj):
+        return search.snippet(obj.description, self.context.get('search_terms'))
+
+
+class GuestJobSubmissionSerializer(TimedSerializer):
     """Serializer for guest job submission (before registration)"""
     
     # Job data
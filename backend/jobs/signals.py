@@ -1,35 +1,72 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
 from .models import Job
-from notifications.models import Notification
-from users.models import User
+from .recommendations import discard_from_feed, invalidate_feed
+from .search import get_search_backend
+from .tasks import update_job_feeds
+from notifications.tasks import start_job_fanout
+from offers.models import Offer
+from users.models import FreelancerProfile
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=Job)
 def notify_freelancers_on_job_creation(sender, instance, created, **kwargs):
-    """Create notification for freelancers when a new job is posted"""
+    """Queue notifications for freelancers when a new job is posted
+    
+    Only the fan-out record is written here; the notifications themselves are
+    created in bulk by a background worker so posting a job does not scale
+    with the number of freelancers.
+    """
     if not created or instance.status != Job.OPEN:
         return
     
     try:
-        # Notify all freelancers (you might want to filter by skills in the future)
-        freelancers = User.objects.filter(role=User.FREELANCER)
-        
-        for freelancer in freelancers:
-            Notification.objects.create(
-                user=freelancer,
-                notification_type=Notification.NEW_MESSAGE,
-                title=f"New Job Posted: {instance.title}",
-                message=f"A new job '{instance.title}' has been posted by {instance.client.name}. Check it out!",
-                priority=Notification.MEDIUM,
-                job_id=instance.id,
-                data={
-                    'job_id': str(instance.id),
-                    'job_title': instance.title,
-                    'client_name': instance.client.name,
-                    'budget': f"${instance.budget_min} - ${instance.budget_max}"
-                }
-            )
+        start_job_fanout(instance)
     except Exception as e:
-        print(f"Error creating job notification: {e}")
+        print(f"Error queueing job notifications: {e}")
+
+
+@receiver(post_save, sender=Job)
+def update_search_index(sender, instance, **kwargs):
+    """Keep the job search index in sync; only open jobs are searchable"""
+    try:
+        if instance.status == Job.OPEN:
+            get_search_backend().index(instance)
+        else:
+            get_search_backend().remove(instance)
+    except Exception:
+        logger.exception("Error updating search index for job %s", instance.id)
+
+
+@receiver(post_delete, sender=Job)
+def remove_from_search_index(sender, instance, **kwargs):
+    try:
+        get_search_backend().remove(instance)
+    except Exception:
+        logger.exception("Error removing job %s from search index", instance.id)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def update_recommendations(sender, instance, **kwargs):
+    """Re-vectorize the job and merge it into, or drop it from, cached freelancer feeds"""
+    update_job_feeds.delay(str(instance.pk), instance.skills_required)
+
+
+@receiver(post_save, sender=Offer)
+def drop_offered_job_from_feed(sender, instance, created, **kwargs):
+    """Freelancers aren't recommended jobs they already made an offer on"""
+    if created:
+        transaction.on_commit(lambda: discard_from_feed(instance.freelancer_id, instance.job_id))
+
+
+@receiver(post_save, sender=FreelancerProfile)
+@receiver(post_delete, sender=FreelancerProfile)
+def invalidate_recommendations(sender, instance, **kwargs):
+    """Feeds are scored against the profile, so a changed profile gets a new one on its next read"""
+    transaction.on_commit(lambda: invalidate_feed(instance.user_id))
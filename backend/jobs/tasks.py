@@ -0,0 +1,13 @@
+"""
+Background tasks for the jobs app.
+"""
+
+from common.tasks import task
+
+from . import recommendations
+
+
+@task
+def update_job_feeds(job_id, skills):
+    """Sync the skill vector of a saved or deleted job and update the cached feeds it belongs in"""
+    recommendations.update_job_feeds(job_id, skills)
@@ -1,3 +1,195 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from users.models import FreelancerProfile, User
+from .models import Job, JobView, JobViewSketch
+from .recommendations import _acquire, _release, feed_key, get_feed, invalidate_feed
+from .search import get_search_backend
+from .view_counter import JobViewBuffer
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, CACHE_SHARED=True, JOB_FEED_SIZE=2)
+class JobFeedTests(TestCase):
+    """Cached freelancer feeds and their updates"""
+
+    def setUp(self):
+        cache.clear()
+        self.client_user = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        self.freelancer = User.objects.create_user('freelancer@example.com', 'pass', name='F', role=User.FREELANCER)
+        with self.captureOnCommitCallbacks(execute=True):
+            FreelancerProfile.objects.create(user=self.freelancer, skills=['Python'])
+        self.job = self.post_job('First')
+
+    def post_job(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Job.objects.create(
+                client=self.client_user, title=title, description='Write', assignment_type=Job.ACADEMIC_WRITING,
+                subject='History', deadline=timezone.now() + timedelta(days=3), skills_required=['Python'],
+                budget_min=10, budget_max=50, status=Job.OPEN,
+            )
+
+    def feed_ids(self):
+        return [item['job']['id'] for item in get_feed(self.freelancer)['items']]
+
+    def test_posted_job_is_merged_into_the_cached_feed(self):
+        self.assertEqual(self.feed_ids(), [str(self.job.id)])
+        job = self.post_job('Second')
+        with self.assertNumQueries(0):
+            self.assertCountEqual(self.feed_ids(), [str(self.job.id), str(job.id)])
+
+    def test_locked_feed_is_marked_stale(self):
+        self.feed_ids()
+        token = _acquire(self.freelancer.pk)
+        job = self.post_job('Second')
+        _release({self.freelancer.pk: token})
+
+        self.assertEqual(len(cache.get(feed_key(self.freelancer.pk))['items']), 1)
+        self.assertCountEqual(self.feed_ids(), [str(self.job.id), str(job.id)])
+
+    def test_invalidated_feed_is_rebuilt(self):
+        self.feed_ids()
+        invalidate_feed(self.freelancer.pk)
+        with self.assertNumQueries(5):
+            self.feed_ids()
+        with self.assertNumQueries(0):
+            self.feed_ids()
+
+    @override_settings(CACHE_SHARED=False)
+    def test_not_cached_without_a_shared_cache(self):
+        self.feed_ids()
+        self.assertIsNone(cache.get(feed_key(self.freelancer.pk)))
+        job = self.post_job('Second')
+        self.assertCountEqual(self.feed_ids(), [str(self.job.id), str(job.id)])
+
+
+class JobFacetsTests(TestCase):
+    """Facet counts of the job board"""
+
+    def setUp(self):
+        cache.clear()
+        client = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        for assignment_type, urgency, budget in (
+            (Job.ACADEMIC_WRITING, Job.HIGH, 50),
+            (Job.ACADEMIC_WRITING, Job.LOW, 50),
+            (Job.PROGRAMMING, Job.HIGH, 700),
+        ):
+            Job.objects.create(
+                client=client, title='Essay', description='Write', assignment_type=assignment_type,
+                subject='History', deadline=timezone.now() + timedelta(days=3), urgency=urgency,
+                budget_min=budget, budget_max=budget, status=Job.OPEN,
+            )
+
+    def counts(self, response, facet):
+        return {bucket['value']: bucket['count'] for bucket in response.json()['facets'][facet]}
+
+    def test_each_facet_ignores_its_own_filter(self):
+        response = self.client.get('/api/jobs/facets/', {'urgency': Job.HIGH, 'min_budget': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 1)
+        self.assertEqual(self.counts(response, 'urgency')[Job.HIGH], 1)
+        self.assertEqual(self.counts(response, 'urgency')[Job.LOW], 0)
+        self.assertEqual(self.counts(response, 'budget')['under_100'], 1)
+        self.assertEqual(self.counts(response, 'budget')['500_1000'], 1)
+        self.assertEqual(self.counts(response, 'assignment_type')[Job.ACADEMIC_WRITING], 0)
+        self.assertEqual(self.counts(response, 'assignment_type')[Job.PROGRAMMING], 1)
+
+    def test_invalid_budget_is_rejected(self):
+        for path in ('/api/jobs/', '/api/jobs/facets/'):
+            response = self.client.get(path, {'min_budget': 'abc'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('min_budget', response.json())
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, JOB_SEARCH_CACHE_TIMEOUT=0)
+class JobSearchIndexTests(TestCase):
+    """The search index follows jobs as they are posted, edited and removed"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+
+    def post_job(self, title, **fields):
+        return Job.objects.create(
+            client=self.client_user, title=title, description='Write', subject='History',
+            assignment_type=Job.ACADEMIC_WRITING, deadline=timezone.now() + timedelta(days=3),
+            urgency=Job.LOW, budget_min=50, budget_max=50, status=Job.OPEN, **fields,
+        )
+
+    def search(self, query):
+        return [hit.job_id for hit in get_search_backend().search(query, 10)]
+
+    def test_jobs_posted_together_are_both_searchable(self):
+        now = timezone.now()
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            first = self.post_job('Roman roads', id=uuid.UUID(int=1 << 64 | 0x2A))
+            second = self.post_job('Roman baths', id=uuid.UUID(int=2 << 64 | 0x2A))
+        self.assertEqual(first.created_at, second.created_at)
+        self.assertCountEqual(self.search('roman'), [first.id, second.id])
+
+    def test_update_replaces_the_indexed_text(self):
+        job = self.post_job('Roman roads')
+        job.title = 'Greek temples'
+        job.save()
+        self.assertEqual(self.search('roman'), [])
+        self.assertEqual(self.search('greek'), [job.id])
+
+    def test_closed_and_deleted_jobs_leave_the_index(self):
+        closed = self.post_job('Roman roads')
+        deleted = self.post_job('Roman baths')
+        kept = self.post_job('Roman forum')
+        closed.status = Job.CLOSED
+        closed.save()
+        deleted.delete()
+        self.assertEqual(self.search('roman'), [kept.id])
+
+        closed.status = Job.OPEN
+        closed.save()
+        self.assertCountEqual(self.search('roman'), [kept.id, closed.id])
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, JOB_VIEW_FLUSH_INTERVAL=float('inf'),
+                   JOB_VIEW_FLUSH_THRESHOLD=float('inf'))
+class JobViewBufferTests(TransactionTestCase):
+    """Buffered job view counting; foreign keys are only checked on commit"""
+
+    def setUp(self):
+        cache.clear()
+        client = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        self.viewer = User.objects.create_user('freelancer@example.com', 'pass', name='F', role=User.FREELANCER)
+        self.jobs = [
+            Job.objects.create(
+                client=client, title=title, description='Write', assignment_type=Job.ACADEMIC_WRITING,
+                subject='History', deadline=timezone.now() + timedelta(days=3),
+                budget_min=10, budget_max=50, status=Job.OPEN,
+            )
+            for title in ('Kept', 'Deleted')
+        ]
+        self.buffer = JobViewBuffer()
+
+    def test_views_are_counted_once_per_viewer(self):
+        kept = self.jobs[0]
+        self.assertTrue(self.buffer.record(kept.id, user_id=self.viewer.id))
+        self.assertFalse(self.buffer.record(kept.id, user_id=self.viewer.id))
+        self.assertTrue(self.buffer.record(kept.id, ip_address='10.0.0.1'))
+        self.buffer.flush()
+
+        kept.refresh_from_db()
+        self.assertEqual(kept.views_count, 2)
+        self.assertEqual(JobView.objects.filter(job=kept).count(), 2)
+        self.assertEqual(JobViewSketch.objects.get(job=kept).unique_viewers, 2)
+
+    def test_views_of_a_deleted_job_are_dropped(self):
+        kept, deleted = self.jobs
+        self.buffer.record(kept.id, user_id=self.viewer.id)
+        self.buffer.record(deleted.id, user_id=self.viewer.id)
+        deleted.delete()
+        self.buffer.flush()
+
+        kept.refresh_from_db()
+        self.assertEqual(kept.views_count, 1)
+        self.assertEqual(list(JobView.objects.values_list('job_id', flat=True)), [kept.id])
+        self.assertEqual(self.buffer._take(), ({}, []))
@@ -8,8 +8,11 @@ urlpatterns = [
     path('<uuid:pk>/', views.JobDetailView.as_view(), name='detail'),
     path('create/', views.JobCreateView.as_view(), name='create'),
     path('<uuid:pk>/update/', views.JobUpdateView.as_view(), name='update'),
+    path('facets/', views.JobFacetsView.as_view(), name='facets'),
+    path('recommended/', views.recommended_jobs, name='recommended'),
     path('my-jobs/', views.MyJobsView.as_view(), name='my-jobs'),
     path('guest-submission/', views.guest_job_submission, name='guest-submission'),
     path('<uuid:job_id>/complete-registration/', views.complete_guest_registration, name='complete-registration'),
     path('<uuid:job_id>/update-status/', views.update_job_status, name='update-status'),
+    path('<uuid:job_id>/views/', views.job_view_stats, name='view-stats'),
 ]
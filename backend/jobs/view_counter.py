@@ -0,0 +1,175 @@
+"""
+Buffered counting of job detail views.
+
+Views are deduplicated per viewer (user id, or IP address for anonymous
+visitors) within ``JOB_VIEW_DEDUP_WINDOW`` seconds using the cache, then
+accumulated in a per-process buffer. A daemon thread, started by the
+first view a process records, flushes the buffer every
+``JOB_VIEW_FLUSH_INTERVAL`` seconds while it holds views, so views don't
+wait for more traffic; a view that fills the buffer to
+``JOB_VIEW_FLUSH_THRESHOLD`` flushes it at once. Flushes run in the
+background as one ``UPDATE ... views_count + n`` per distinct increment plus
+a fixed number of queries updating the unique-viewer sketches (see
+``jobs.view_sketches``), so the job detail endpoint itself never writes. Raw ``JobView`` rows are only inserted while
+``JOB_VIEWS_RECORD_RAW`` is enabled.
+
+Counts still in the buffer when a worker is killed are lost; the buffer is
+flushed on normal interpreter exit.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from common.tasks import run_locally
+
+from .view_sketches import update_view_sketches, viewer_key
+
+logger = logging.getLogger(__name__)
+
+
+class JobViewBuffer:
+    """Thread-safe per-process buffer of deduplicated job views"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._viewers = []
+        self._last_flush = time.monotonic()
+        self._flushing = False
+        self._flusher = None
+
+    def record(self, job_id, user_id=None, ip_address=None):
+        """Count a view of ``job_id``; returns False if the viewer was already counted"""
+        viewer = viewer_key(user_id, ip_address)
+        window = getattr(settings, 'JOB_VIEW_DEDUP_WINDOW', 1800)
+        if not cache.add(f'jobs:viewed:{job_id}:{viewer}', 1, timeout=window):
+            return False
+
+        with self._lock:
+            self._start_flusher()
+            self._counts[job_id] += 1
+            self._viewers.append((job_id, user_id, ip_address, timezone.localdate()))
+            due = (
+                not self._flushing
+                and (
+                    len(self._viewers) >= getattr(settings, 'JOB_VIEW_FLUSH_THRESHOLD', 500)
+                    or time.monotonic() - self._last_flush >= getattr(settings, 'JOB_VIEW_FLUSH_INTERVAL', 10)
+                )
+            )
+            if due:
+                self._flushing = True
+        if due:
+            run_locally(self.flush)
+        return True
+
+    def _start_flusher(self):
+        # Called with the lock held. Threads don't survive a fork, so a
+        # forked worker starts its own on its first view
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._flush_periodically, name='job-view-flusher', daemon=True)
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        while True:
+            interval = getattr(settings, 'JOB_VIEW_FLUSH_INTERVAL', 10)
+            # Capped so an infinite interval, which turns timed flushes off,
+            # can still be slept on; the check below decides either way
+            time.sleep(min(interval, 60))
+            with self._lock:
+                due = (
+                    self._viewers
+                    and not self._flushing
+                    and time.monotonic() - self._last_flush >= interval
+                )
+                if due:
+                    self._flushing = True
+            if due:
+                run_locally(self.flush)
+
+    def _take(self):
+        with self._lock:
+            counts, viewers = self._counts, self._viewers
+            self._counts, self._viewers = defaultdict(int), []
+            self._last_flush = time.monotonic()
+        return counts, viewers
+
+    def _restore(self, counts, viewers):
+        with self._lock:
+            for job_id, count in counts.items():
+                self._counts[job_id] += count
+            self._viewers.extend(viewers)
+
+    def flush(self):
+        """Write buffered views to the database"""
+        counts, viewers = self._take()
+        try:
+            if counts:
+                write_views(counts, viewers)
+        except Exception:
+            logger.exception("Failed to flush %s buffered job views", len(viewers))
+            self._restore(counts, viewers)
+        finally:
+            with self._lock:
+                self._flushing = False
+
+
+def write_views(counts, viewers):
+    """Apply aggregated view increments and record viewers in bulk
+    
+    ``viewers`` holds ``(job_id, user_id, ip_address, day)`` tuples. Views of
+    jobs deleted since they were buffered are dropped.
+    """
+    from .models import Job, JobView
+
+    jobs_by_increment = defaultdict(list)
+    for job_id, count in counts.items():
+        jobs_by_increment[count].append(job_id)
+
+    with transaction.atomic():
+        for increment, job_ids in jobs_by_increment.items():
+            Job.objects.filter(id__in=job_ids).update(views_count=F('views_count') + increment)
+
+        # After the updates, which hold the write lock: rows referencing a
+        # deleted job would fail the whole flush, and every retry after it
+        existing = {str(job_id) for job_id in Job.objects.filter(id__in=list(counts)).values_list('id', flat=True)}
+        viewers = [viewer for viewer in viewers if str(viewer[0]) in existing]
+
+        update_view_sketches(
+            (job_id, day, viewer_key(user_id, ip)) for job_id, user_id, ip, day in viewers
+        )
+
+        if not getattr(settings, 'JOB_VIEWS_RECORD_RAW', True):
+            return
+
+        # Signed-in viewers are deduplicated by the (job, user) unique
+        # constraint; anonymous ones by looking up existing (job, ip) rows
+        anonymous = {(job_id, ip) for job_id, user_id, ip, _ in viewers if not user_id}
+        if anonymous:
+            existing = set(
+                JobView.objects.filter(
+                    job_id__in={job_id for job_id, _ in anonymous},
+                    ip_address__in={ip for _, ip in anonymous},
+                    user__isnull=True,
+                ).values_list('job_id', 'ip_address')
+            )
+            anonymous -= existing
+
+        rows = {(job_id, user_id, None) for job_id, user_id, _, _ in viewers if user_id}
+        rows |= {(job_id, None, ip) for job_id, ip in anonymous}
+        JobView.objects.bulk_create(
+            [JobView(job_id=job_id, user_id=user_id, ip_address=ip) for job_id, user_id, ip in rows],
+            ignore_conflicts=True,
+        )
+
+
+job_view_buffer = JobViewBuffer()
+atexit.register(job_view_buffer.flush)
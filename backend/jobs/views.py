@@ -1,14 +1,26 @@
-from rest_framework import generics, status, permissions, filters
+from datetime import timedelta
+from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django.contrib.auth import get_user_model
 from django.db.models import Q
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Job, JobAttachment, JobView
+from common.pagination import KeysetPagination
+from common.queries import query_budget
+from .facets import cached_facets, facet_filters, job_facets
+from .filters import JobSearchFilter, JobOrderingFilter, budget_range
+from .models import Job, JobAttachment
+from .recommendations import WEIGHTS, get_feed
+from .search import search_terms
+from .view_counter import job_view_buffer
+from .view_sketches import daily_unique_viewers
 from .serializers import (
     JobSerializer, 
     JobCreateSerializer, 
     JobListSerializer,
+    JobSearchResultSerializer,
     GuestJobSubmissionSerializer,
     JobUpdateSerializer
 )
@@ -21,49 +33,81 @@ class JobListView(generics.ListAPIView):
     
     serializer_class = JobListSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    query_budget = 4
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, JobSearchFilter, JobOrderingFilter]
     filterset_fields = ['assignment_type', 'urgency', 'status']
-    search_fields = ['title', 'description', 'subject', 'skills_required']
     ordering_fields = ['created_at', 'deadline', 'budget_min', 'budget_max']
     ordering = ['-created_at']
+    search_hits = None
+    
+    def get_serializer_class(self):
+        if self.search_hits is not None:
+            return JobSearchResultSerializer
+        return JobListSerializer
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.search_hits is not None:
+            context['search_terms'] = search_terms(self.request.query_params.get('search', ''))
+        return context
     
     def get_queryset(self):
         queryset = Job.objects.filter(status=Job.OPEN).select_related('client')
         
         # Budget filtering
-        min_budget = self.request.query_params.get('min_budget')
-        max_budget = self.request.query_params.get('max_budget')
+        min_budget, max_budget = budget_range(self.request.query_params)
         
-        if min_budget:
+        if min_budget is not None:
             queryset = queryset.filter(budget_max__gte=min_budget)
-        if max_budget:
+        if max_budget is not None:
             queryset = queryset.filter(budget_min__lte=max_budget)
         
         return queryset
 
 
+class JobFacetsView(JobListView):
+    """Counts of the filtered job board per assignment type, urgency, budget and deadline
+    
+    Takes the job board's filter and search parameters; see ``jobs/facets.py``.
+    The facet filters are applied inside the counts rather than to the
+    queryset, so that each facet can be counted without its own filter.
+    """
+    
+    query_budget = 3
+    filterset_fields = ['status']
+    
+    def get_queryset(self):
+        return Job.objects.filter(status=Job.OPEN)
+    
+    def list(self, request, *args, **kwargs):
+        selected = facet_filters(request.query_params)
+        return Response(cached_facets(
+            request.query_params,
+            lambda: job_facets(self.filter_queryset(self.get_queryset()), selected),
+        ))
+
+
 class JobDetailView(generics.RetrieveAPIView):
     """Retrieve job details"""
     
     queryset = Job.objects.all()
     serializer_class = JobSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 6
     
     def retrieve(self, request, *args, **kwargs):
         job = self.get_object()
         
-        # Track job view
+        # Views are buffered and written in bulk in the background
         if request.user.is_authenticated:
-            JobView.objects.get_or_create(job=job, user=request.user)
+            job_view_buffer.record(job.id, user_id=request.user.id)
         else:
             # Track by IP for anonymous users
-            ip_address = self.get_client_ip(request)
-            JobView.objects.get_or_create(job=job, ip_address=ip_address)
+            job_view_buffer.record(job.id, ip_address=self.get_client_ip(request))
         
-        # Increment view count
-        Job.objects.filter(id=job.id).update(views_count=job.views_count + 1)
-        
-        return super().retrieve(request, *args, **kwargs)
+        serializer = self.get_serializer(job)
+        return Response(serializer.data)
     
     def get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -105,9 +149,15 @@ class MyJobsView(generics.ListAPIView):
     
     serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
-        return Job.objects.filter(client=self.request.user).order_by('-created_at')
+        return (
+            Job.objects.filter(client=self.request.user)
+            .select_related('client__freelancer_profile')
+            .prefetch_related('attachments')
+            .order_by('-created_at')
+        )
 
 
 class JobUpdateView(generics.UpdateAPIView):
@@ -210,3 +260,58 @@ def update_job_status(request, job_id):
     
     except Job.DoesNotExist:
         return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def job_view_stats(request, job_id):
+    """Estimated unique viewers of a job, overall and per day (client only)"""
+    try:
+        job = Job.objects.select_related('view_sketch').get(id=job_id, client=request.user)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+    except ValueError:
+        return Response({'error': 'days must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    since = timezone.localdate() - timedelta(days=days - 1)
+    daily, merged = daily_unique_viewers(job.id, since=since)
+    sketch = getattr(job, 'view_sketch', None)
+    
+    return Response({
+        'job_id': job.id,
+        'views_count': job.views_count,
+        'unique_viewers': sketch.unique_viewers if sketch else 0,
+        'period': {
+            'days': days,
+            'since': since,
+            'unique_viewers': merged.count(),
+        },
+        'daily': [{'date': day, 'unique_viewers': count} for day, count in daily],
+    })
+
+
+@query_budget(6)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def recommended_jobs(request):
+    """Open jobs best matching the freelancer's skills, rate and history (freelancers only)"""
+    if request.user.role != User.FREELANCER:
+        return Response({'error': 'Only freelancers get job recommendations'}, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        limit = int(request.query_params.get('limit', api_settings.PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return Response({'error': 'limit must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # One cache read unless the feed has to be (re)built
+    feed = get_feed(request.user)
+    return Response({
+        'generated_at': feed['generated_at'],
+        'weights': WEIGHTS,
+        'results': feed['items'][:limit],
+    })
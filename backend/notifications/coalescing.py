@@ -0,0 +1,88 @@
+"""
+Creating notifications, with coalescing of bursts.
+
+Types listed in ``Notification.COALESCE_FIELDS`` are coalesced per
+recipient and related object. While the latest notification about the same
+job (offers) or chat (messages) is unread, not yet emailed and younger than
+``NOTIFICATION_COALESCE_WINDOW`` seconds, a new event updates that row
+instead of adding one: ``occurrences`` counts the events, the title becomes
+a summary and the message and data are the latest ones. The email of a
+coalesced notification is held until the window has passed, so a burst is
+emailed once, with its final count.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .events import notification_updated
+from .models import Notification
+
+RELATED_FIELDS = ('job_id', 'order_id', 'chat_id', 'offer_id')
+
+
+def coalesce_key(notification_type, related):
+    """Key shared by the notifications merged together; empty if the type isn't coalesced"""
+    field = Notification.COALESCE_FIELDS.get(notification_type)
+    value = related.get(field) if field else None
+    return f'{notification_type}:{value}' if value else ''
+
+
+def _merge(user, key, title, message, summary, data, since):
+    mergeable = Notification.objects.filter(
+        user=user, coalesce_key=key, created_at__gte=since,
+        is_read=False, email_sent=False, email_claim__isnull=True,
+    )
+    # Retried once when a concurrent event merged into the same row first
+    for _ in range(2):
+        target = mergeable.order_by('-created_at').first()
+        if target is None:
+            return None
+        count = target.occurrences + 1
+        merged_title = (summary(count) if summary else f'{title} ({count})')[:200]
+        updated = mergeable.filter(pk=target.pk, occurrences=target.occurrences).update(
+            occurrences=count, title=merged_title, message=message, data=data, updated_at=timezone.now()
+        )
+        if updated:
+            target.occurrences, target.title, target.message, target.data = count, merged_title, message, data
+            notification_updated(target)
+            return target
+    return None
+
+
+def notify(user, notification_type, title, message, summary=None, priority=Notification.MEDIUM, data=None,
+           **related):
+    """Notify ``user``, merging into a recent notification about the same object when coalesced
+
+    ``related`` takes the ``job_id``, ``order_id``, ``chat_id`` and
+    ``offer_id`` fields. ``summary(count)`` gives the title of a merged
+    notification; by default the count is appended to ``title``. Returns
+    the new or updated notification.
+    """
+    unknown = set(related) - set(RELATED_FIELDS)
+    if unknown:
+        raise TypeError(f"Unexpected related fields: {', '.join(sorted(unknown))}")
+    data = data or {}
+    window = settings.NOTIFICATION_COALESCE_WINDOW
+    key = coalesce_key(notification_type, related) if window else ''
+    now = timezone.now()
+
+    if key:
+        merged = _merge(user, key, title, message, summary, data, now - timedelta(seconds=window))
+        if merged is not None:
+            return merged
+
+    # Saved one by one so post_save publishes it to open streams
+    return Notification.objects.create(
+        user=user,
+        notification_type=notification_type,
+        title=title[:200],
+        message=message,
+        priority=priority,
+        data=data,
+        coalesce_key=key,
+        # Held back until the burst is over, see the outbox
+        email_next_attempt_at=now + timedelta(seconds=window) if key else None,
+        **related,
+    )
@@ -0,0 +1,232 @@
+"""
+Email content of notifications.
+
+A notification is rendered with the active :class:`EmailTemplate` named
+after its ``notification_type`` when there is one, or sent as plain text
+made of its title and message otherwise. Templates use the Django template
+language; their context is the notification's ``data`` plus ``user_name``,
+``title``, ``message`` and ``notification_type``.
+
+Digests (see ``NotificationPreference.email_frequency``) use the template
+named ``digest``, with ``user_name``, ``count``, ``notifications`` (the
+first ``DIGEST_LIMIT``, each with ``title``, ``message``,
+``notification_type``, ``occurrences`` and ``created_at``) and ``more``,
+the number left out. Without one they are sent as a plain text list.
+
+Templates are compiled once per process and kept by id together with their
+``updated_at``, so a batch costs one query for the current versions and
+templates are only loaded and parsed again after they change (saved through
+the ORM, which bumps ``updated_at``). Compiling also checks that a template
+only reads the variables it declares in ``variables``.
+"""
+
+from dataclasses import dataclass
+from html import unescape
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template import Context, Template, TemplateSyntaxError
+from django.template.base import FilterExpression, Node, Variable
+from django.template.defaulttags import ForNode, WithNode
+from django.template.smartif import TokenBase
+from django.utils.html import strip_tags
+
+from .models import EmailTemplate
+
+# Names every template can read besides its declared variables
+BUILTIN_VARIABLES = frozenset({'user_name', 'title', 'message', 'notification_type', 'True', 'False', 'None'})
+
+DIGEST_TEMPLATE = 'digest'
+DIGEST_VARIABLES = frozenset({'user_name', 'count', 'notifications', 'more', 'True', 'False', 'None'})
+DIGEST_LIMIT = 50
+
+
+class TemplateValidationError(ValueError):
+    """An email template doesn't parse or reads undeclared variables"""
+
+
+def _expressions(value):
+    """Filter expressions in a node attribute, however nested"""
+    if isinstance(value, FilterExpression):
+        yield value
+    elif isinstance(value, TokenBase):
+        # ``{% if %}`` conditions: literals and operators
+        for attribute in ('value', 'first', 'second'):
+            yield from _expressions(getattr(value, attribute, None))
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _expressions(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _expressions(item)
+
+
+def _expression_names(expression):
+    variables = [expression.var] + [arg for _, args in expression.filters for _, arg in args]
+    return {variable.lookups[0] for variable in variables if isinstance(variable, Variable) and variable.lookups}
+
+
+def template_variables(nodelist, local=frozenset()):
+    """Names of the context variables ``nodelist`` reads, except ``local`` ones"""
+    names = set()
+    for node in nodelist:
+        inner = local
+        if isinstance(node, ForNode):
+            inner = local | set(node.loopvars) | {'forloop'}
+        elif isinstance(node, WithNode):
+            inner = local | set(node.extra_context)
+        for attribute, value in vars(node).items():
+            if attribute not in node.child_nodelists and not isinstance(value, Node):
+                for expression in _expressions(value):
+                    names |= _expression_names(expression) - local
+        for attribute in node.child_nodelists:
+            children = getattr(node, attribute, None)
+            if children:
+                names |= template_variables(children, inner)
+    return names
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """Parsed parts of one version of an :class:`EmailTemplate`"""
+
+    id: object
+    updated_at: object
+    subject: Template
+    html: Template
+    text: Template = None
+
+    def render(self, context):
+        """``(subject, text, html)`` for the ``context`` dict"""
+        # Only the HTML part is escaped; subject and text are plain text
+        plain = Context(context, autoescape=False)
+        html = self.html.render(Context(context))
+        text = self.text.render(plain) if self.text else unescape(strip_tags(html))
+        return self.subject.render(plain), text, html
+
+
+def compile_template(template):
+    """Parse ``template`` and check its variables; raises :class:`TemplateValidationError`"""
+    sources = {'subject': template.subject, 'html': template.html_content}
+    if template.text_content:
+        sources['text'] = template.text_content
+    try:
+        parts = {part: Template(source) for part, source in sources.items()}
+    except TemplateSyntaxError as e:
+        raise TemplateValidationError(f'{template.name}: {e}') from e
+
+    builtins = DIGEST_VARIABLES if template.name == DIGEST_TEMPLATE else BUILTIN_VARIABLES
+    declared = builtins.union(template.variables)
+    undeclared = set().union(*(template_variables(part.nodelist) for part in parts.values())) - declared
+    if undeclared:
+        raise TemplateValidationError(
+            f"{template.name} uses variables missing from its variables list: {', '.join(sorted(undeclared))}"
+        )
+    return CompiledTemplate(template.id, template.updated_at, **parts)
+
+
+# Template id -> (updated_at, CompiledTemplate or the TemplateValidationError)
+_compiled = {}
+
+
+def get_templates(names):
+    """Compiled active templates named ``names`` (notification types or ``digest``) by name
+
+    Values are :class:`CompiledTemplate` objects, or the
+    :class:`TemplateValidationError` of a template that doesn't compile.
+    """
+    versions = list(
+        EmailTemplate.objects.filter(name__in=set(names), is_active=True)
+        .values_list('id', 'name', 'updated_at')
+    )
+    stale = [pk for pk, _, updated_at in versions if _compiled.get(pk, (None,))[0] != updated_at]
+    if stale:
+        for template in EmailTemplate.objects.filter(id__in=stale):
+            try:
+                compiled = compile_template(template)
+            except TemplateValidationError as e:
+                compiled = e
+            _compiled[template.id] = (template.updated_at, compiled)
+    return {name: _compiled[pk][1] for pk, name, _ in versions if pk in _compiled}
+
+
+def email_context(notification):
+    return {
+        **notification.data,
+        'user_name': notification.user.name,
+        'title': notification.title,
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+    }
+
+
+def build_email(notification, template=None):
+    """The email of ``notification``, rendered with the :class:`CompiledTemplate` if given"""
+    if template is None:
+        subject, text, html = notification.title, notification.message, None
+    else:
+        subject, text, html = template.render(email_context(notification))
+
+    # Header values can't contain line breaks
+    email = EmailMultiAlternatives(' '.join(subject.split()), text, settings.DEFAULT_FROM_EMAIL,
+                                   [notification.user.email])
+    if html:
+        email.attach_alternative(html, 'text/html')
+    return email
+
+
+def build_digest(notifications, template=None):
+    """One email listing ``notifications``, all for the same user"""
+    user = notifications[0].user
+    items = [
+        {field: getattr(notification, field)
+         for field in ('title', 'message', 'notification_type', 'occurrences', 'created_at')}
+        for notification in notifications[:DIGEST_LIMIT]
+    ]
+    more = len(notifications) - len(items)
+    if template is None:
+        subject = f'You have {len(notifications)} new notifications'
+        text = '\n\n'.join(f"{item['title']}\n{item['message']}" for item in items)
+        if more:
+            text += f'\n\n...and {more} more'
+        html = None
+    else:
+        subject, text, html = template.render({
+            'user_name': user.name, 'count': len(notifications), 'notifications': items, 'more': more,
+        })
+
+    email = EmailMultiAlternatives(' '.join(subject.split()), text, settings.DEFAULT_FROM_EMAIL, [user.email])
+    if html:
+        email.attach_alternative(html, 'text/html')
+    return email
+
+
+def render_digests(groups):
+    """``(notifications, email or exception)`` pairs for lists of notifications, one list per user"""
+    template = get_templates([DIGEST_TEMPLATE]).get(DIGEST_TEMPLATE)
+    results = []
+    for notifications in groups:
+        if isinstance(template, Exception):
+            results.append((notifications, template))
+            continue
+        try:
+            results.append((notifications, build_digest(notifications, template)))
+        except Exception as e:
+            results.append((notifications, e))
+    return results
+
+
+def render_emails(notifications):
+    """``(notification, email or exception)`` pairs, looking the templates up once for all"""
+    templates = get_templates(notification.notification_type for notification in notifications)
+    results = []
+    for notification in notifications:
+        template = templates.get(notification.notification_type)
+        if isinstance(template, Exception):
+            results.append((notification, template))
+            continue
+        try:
+            results.append((notification, build_email(notification, template)))
+        except Exception as e:
+            results.append((notification, e))
+    return results
@@ -0,0 +1,85 @@
+"""
+Real-time notification events.
+
+Published to the recipient's ``user:<id>`` group on the event layer (see
+``common.events``) after the transaction commits, and delivered by the
+notification stream (``notifications.stream``):
+
+* ``notification.created``: a new notification, with ``unread_delta``
+* ``notification.updated``: a notification that coalesced another event
+  (see ``notifications.coalescing``); still unread, so no delta. It has no
+  event ``id``: the notification is older than ones already delivered, and
+  as an SSE id or poll cursor it would make the next reconnect replay them
+* ``notification.unread_count``: read state changed; carries both the
+  ``delta`` and the resulting ``unread_count``
+"""
+
+from django.db import transaction
+
+from common.events import publish, user_group
+
+from .models import Notification
+
+EVENT_PREFIX = 'notification.'
+
+
+# Same field names as NotificationSerializer, built by hand since bulk
+# fan-outs publish thousands of these per batch
+PAYLOAD_FIELDS = (
+    'notification_type', 'title', 'message', 'priority', 'is_read', 'read_at',
+    'job_id', 'order_id', 'chat_id', 'offer_id', 'data', 'occurrences', 'created_at',
+)
+
+
+def notification_payload(notification):
+    payload = {field: getattr(notification, field) for field in PAYLOAD_FIELDS}
+    payload['id'] = str(notification.id)
+    payload['user'] = str(notification.user_id)
+    return payload
+
+
+def created_event(notification):
+    return {
+        'type': 'notification.created',
+        'id': str(notification.id),
+        'notification': notification_payload(notification),
+        'unread_delta': 0 if notification.is_read else 1,
+    }
+
+
+def updated_event(notification):
+    return {
+        'type': 'notification.updated',
+        'notification': notification_payload(notification),
+    }
+
+
+def notifications_created(notifications):
+    """Publish each of ``notifications`` to its recipient once committed"""
+    notifications = list(notifications)
+
+    def send():
+        for notification in notifications:
+            publish(user_group(notification.user_id), created_event(notification))
+    transaction.on_commit(send)
+
+
+def notification_updated(notification):
+    """Publish the new state of ``notification`` to its recipient once committed"""
+    event = updated_event(notification)
+    transaction.on_commit(lambda: publish(user_group(notification.user_id), event))
+
+
+def unread_count_changed(user_id, delta):
+    """Publish a read-state change for ``user_id`` once committed"""
+    if not delta:
+        return
+
+    def send():
+        unread = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        publish(user_group(user_id), {
+            'type': 'notification.unread_count',
+            'delta': delta,
+            'unread_count': unread,
+        })
+    transaction.on_commit(send)
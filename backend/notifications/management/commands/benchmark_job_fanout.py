@@ -0,0 +1,85 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+from notifications.models import JobNotificationFanout
+from notifications.tasks import fanout_job_notifications
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure job-post latency and background fan-out throughput for several '
+        'freelancer counts. All rows are created inside a transaction that is '
+        'rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--freelancers', default='100,1000,10000',
+                            help='Comma separated freelancer counts')
+        parser.add_argument('--posts', type=int, default=5,
+                            help='Jobs posted per freelancer count')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['freelancers'].split(',')]
+        
+        self.stdout.write(f"{'freelancers':>12} {'post p50 ms':>12} {'post max ms':>12} "
+                          f"{'fan-out s':>10} {'rows/s':>10}")
+        try:
+            with transaction.atomic():
+                password = make_password(None)
+                client = User.objects.create(
+                    email='fanout-bench-client@example.com', name='Bench Client',
+                    role=User.CLIENT, password=password,
+                )
+                created = 0
+                for size in sizes:
+                    User.objects.bulk_create([
+                        User(email=f'fanout-bench-{i}@example.com', name=f'Freelancer {i}',
+                             role=User.FREELANCER, password=password)
+                        for i in range(created, size)
+                    ], batch_size=1000)
+                    created = max(created, size)
+                    self._run(client, size, options['posts'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, client, size, posts):
+        latencies = []
+        job = None
+        for i in range(posts):
+            start = time.perf_counter()
+            job = Job.objects.create(
+                client=client,
+                title=f'Benchmark job {size}-{i}',
+                description='Benchmark',
+                assignment_type=Job.PROGRAMMING,
+                subject='Benchmark',
+                deadline=timezone.now() + timedelta(days=7),
+                budget_min=10,
+                budget_max=100,
+                status=Job.OPEN,
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+        
+        # Run one fan-out inline to measure worker throughput
+        fanout = JobNotificationFanout.objects.get(job=job)
+        start = time.perf_counter()
+        fanout_job_notifications(str(fanout.id))
+        elapsed = time.perf_counter() - start
+        
+        self.stdout.write(
+            f'{size:>12} {statistics.median(latencies):>12.2f} {max(latencies):>12.2f} '
+            f'{elapsed:>10.2f} {size / elapsed:>10.0f}'
+        )
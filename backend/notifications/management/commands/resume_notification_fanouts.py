@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from notifications.models import JobNotificationFanout
+from notifications.tasks import fanout_job_notifications
+
+
+class Command(BaseCommand):
+    help = 'Re-queue job notification fan-outs that were interrupted or failed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-failed',
+            action='store_true',
+            help='Also retry fan-outs that exhausted their attempts',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=600,
+            help='Seconds without progress after which a running fan-out counts as interrupted',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # Running fan-outs write their progress after every batch, so only
+        # those that stopped making progress are taken over
+        stale = Q(status=JobNotificationFanout.RUNNING,
+                  updated_at__lt=now - timedelta(seconds=options['stale_after']))
+        
+        reclaimable = Q(status=JobNotificationFanout.PENDING) | stale
+        if options['include_failed']:
+            reclaimable |= Q(status=JobNotificationFanout.FAILED)
+        
+        fanout_ids = []
+        candidates = JobNotificationFanout.objects.filter(reclaimable).values_list('id', 'status')
+        for fanout_id, status in candidates:
+            if status == JobNotificationFanout.PENDING:
+                fanout_ids.append(fanout_id)
+                continue
+            # Claimed with a conditional update, so a fan-out that made
+            # progress or was taken over meanwhile is left alone
+            condition = stale if status == JobNotificationFanout.RUNNING else Q(status=JobNotificationFanout.FAILED)
+            reset = {'attempts': 0} if status == JobNotificationFanout.FAILED else {}
+            if JobNotificationFanout.objects.filter(condition, id=fanout_id).update(
+                status=JobNotificationFanout.PENDING, updated_at=now, **reset
+            ):
+                fanout_ids.append(fanout_id)
+        
+        # Each attempt claims its fan-out, so a pending one queued twice still runs once
+        for fanout_id in fanout_ids:
+            fanout_job_notifications.delay(str(fanout_id))
+        
+        self.stdout.write(self.style.SUCCESS(f'Queued {len(fanout_ids)} fan-outs'))
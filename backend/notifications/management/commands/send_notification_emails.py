@@ -0,0 +1,51 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.outbox import EmailOutbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver notification emails from the outbox in batches over pooled '
+        'connections. Runs until interrupted, polling for new notifications; '
+        'with --once it exits when nothing is due.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when nothing is due')
+        parser.add_argument('--batch-size', type=int, help='Override EMAIL_OUTBOX_BATCH_SIZE')
+        parser.add_argument('--rate', type=float, help='Messages per second, 0 for no limit')
+        parser.add_argument('--connections', type=int, help='Override EMAIL_OUTBOX_CONNECTIONS')
+        parser.add_argument('--poll-interval', type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+                            help='Seconds to wait when nothing is due')
+
+    def handle(self, *args, **options):
+        outbox = EmailOutbox(options['batch_size'], options['rate'], options['connections'])
+        totals = Counter()
+        start = time.monotonic()
+        try:
+            while True:
+                close_old_connections()
+                counts = outbox.run_batch()
+                totals.update(counts)
+                if counts and options['verbosity'] >= 2:
+                    self.stdout.write(', '.join(f'{count} {outcome}' for outcome, count in counts.items()))
+                if not counts:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            outbox.close()
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Delivered {totals['sent']} notifications in {elapsed:.1f}s ({totals['sent'] / elapsed:.1f}/s) over "
+            f"{outbox.pool.opened} connections; {totals['digests']} digests, {totals['parked']} held for digests, "
+            f"{totals['skipped']} skipped, {totals['failed']} failed"
+        ))
@@ -0,0 +1,108 @@
+import random
+import socketserver
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """One SMTP session: accepts every message, optionally slowly or with temporary failures"""
+
+    def reply(self, *lines):
+        self.wfile.write(''.join(f'{line}\r\n' for line in lines).encode())
+
+    def handle(self):
+        sink = self.server
+        sink.count('connections')
+        self.reply('220 workvix-smtp-sink ready')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode('utf-8', 'replace').strip().split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-workvix-smtp-sink', '250-8BITMIME', '250 SMTPUTF8')
+            elif verb in ('HELO', 'MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                size = 0
+                for data in iter(self.rfile.readline, b''):
+                    if data == b'.\r\n':
+                        break
+                    size += len(data)
+                else:
+                    return
+                if sink.delay:
+                    time.sleep(sink.delay)
+                if sink.rng.random() < sink.fail_rate:
+                    sink.count('rejected')
+                    self.reply('451 4.3.0 Try again later')
+                else:
+                    sink.count('messages', bytes=size)
+                    self.reply('250 OK: queued')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, delay, fail_rate, seed):
+        super().__init__(address, SinkHandler)
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.counts = {'connections': 0, 'messages': 0, 'rejected': 0, 'bytes': 0}
+        self.lock = threading.Lock()
+
+    def count(self, name, bytes=0):
+        with self.lock:
+            self.counts[name] += 1
+            self.counts['bytes'] += bytes
+
+
+class Command(BaseCommand):
+    help = (
+        'Local SMTP server that accepts and discards every message, for testing '
+        'email delivery without sending mail. Point EMAIL_BACKEND at '
+        'django.core.mail.backends.smtp.EmailBackend with EMAIL_HOST=127.0.0.1, '
+        'EMAIL_PORT set to --port and EMAIL_USE_TLS=False.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--delay', type=float, default=0, help='Seconds taken to accept each message')
+        parser.add_argument('--fail-rate', type=float, default=0,
+                            help='Share of messages refused with a temporary (4xx) error')
+        parser.add_argument('--report-interval', type=float, default=10, help='Seconds between counts')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        server = SinkServer(('127.0.0.1', options['port']), options['delay'], options['fail_rate'], options['seed'])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.stdout.write(f"SMTP sink listening on 127.0.0.1:{options['port']}")
+
+        last = dict(server.counts)
+        try:
+            while True:
+                time.sleep(options['report_interval'])
+                counts = dict(server.counts)
+                if counts != last:
+                    received = counts['messages'] - last['messages']
+                    self.stdout.write(
+                        f"{counts['messages']} messages ({received / options['report_interval']:.1f}/s), "
+                        f"{counts['rejected']} rejected, {counts['connections']} connections, "
+                        f"{counts['bytes'] / 1024:.0f} KiB"
+                    )
+                    last = counts
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
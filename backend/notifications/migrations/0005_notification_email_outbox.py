@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_notifications_user_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='email_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='email_claim',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='email_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='email_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('email_sent', False), ('send_email', True)), fields=['created_at'], name='notifications_email_outbox_idx'),
+        ),
+    ]
@@ -1,3 +1,7 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth import get_user_model
 from common.models import BaseModel
@@ -67,15 +71,41 @@ class Notification(BaseModel):
     email_sent = models.BooleanField(default=False)
     email_sent_at = models.DateTimeField(null=True, blank=True)
     
+    # Email outbox state (see notifications/outbox.py): the row is not due
+    # before ``email_next_attempt_at``, which is both the claim lease and the
+    # retry backoff, and ``email_claim`` identifies the worker holding it
+    email_attempts = models.PositiveSmallIntegerField(default=0)
+    email_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    email_claim = models.UUIDField(null=True, blank=True)
+    email_error = models.TextField(blank=True)
+    
     # Metadata
     data = models.JSONField(default=dict, help_text="Additional notification data")
     
+    # Coalescing (see notifications/coalescing.py): repeated events about the
+    # same object update one row, counted in ``occurrences``
+    coalesce_key = models.CharField(max_length=100, blank=True)
+    occurrences = models.PositiveIntegerField(default=1)
+    
+    # Coalesced types and the related object they are grouped by
+    COALESCE_FIELDS = {
+        NEW_OFFER: 'job_id',
+        NEW_MESSAGE: 'chat_id',
+    }
+    
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', 'is_read']),
             models.Index(fields=['notification_type']),
+            models.Index(fields=['user', '-created_at', '-id'], name='notifications_user_created_idx'),
+            # Only undelivered emails: the outbox stays small however many
+            # notifications there are
+            models.Index(fields=['created_at'], name='notifications_email_outbox_idx',
+                         condition=models.Q(send_email=True, email_sent=False)),
+            models.Index(fields=['user', 'coalesce_key', '-created_at'], name='notifications_coalesce_idx',
+                         condition=~models.Q(coalesce_key='')),
         ]
         
     def __str__(self):
@@ -108,11 +138,48 @@ class NotificationPreference(BaseModel):
     marketing_emails = models.BooleanField(default=False)
     newsletter = models.BooleanField(default=False)
     
+    # Emails go out one by one, or collected into an hourly or daily digest
+    IMMEDIATE = 'immediate'
+    HOURLY = 'hourly'
+    DAILY = 'daily'
+    
+    FREQUENCY_CHOICES = [
+        (IMMEDIATE, 'Immediately'),
+        (HOURLY, 'Hourly digest'),
+        (DAILY, 'Daily digest'),
+    ]
+    
+    email_frequency = models.CharField(max_length=20, choices=FREQUENCY_CHOICES, default=IMMEDIATE)
+    
+    # Email preference of each notification type; other types are always emailed
+    EMAIL_FIELDS = {
+        Notification.NEW_MESSAGE: 'email_new_message',
+        Notification.NEW_OFFER: 'email_new_offer',
+        Notification.OFFER_ACCEPTED: 'email_offer_accepted',
+        Notification.PAYMENT_CONFIRMED: 'email_payment_confirmed',
+        Notification.WORK_SUBMITTED: 'email_work_submitted',
+        Notification.ORDER_COMPLETED: 'email_order_completed',
+        Notification.DEADLINE_REMINDER: 'email_deadline_reminder',
+    }
+    
     class Meta:
         db_table = 'notification_preferences'
         
     def __str__(self):
         return f"Preferences for {self.user.name}"
+    
+    def wants_email(self, notification_type):
+        field = self.EMAIL_FIELDS.get(notification_type)
+        return field is None or getattr(self, field)
+    
+    def digest_at(self, created_at):
+        """When the digest holding a notification created at ``created_at`` is due; None if not digested"""
+        if self.email_frequency == self.HOURLY:
+            return created_at.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        if self.email_frequency == self.DAILY:
+            due = created_at.replace(hour=settings.NOTIFICATION_DIGEST_HOUR, minute=0, second=0, microsecond=0)
+            return due if due > created_at else due + timedelta(days=1)
+        return None
 
 
 class EmailTemplate(BaseModel):
@@ -132,3 +199,46 @@ class EmailTemplate(BaseModel):
         
     def __str__(self):
         return self.name
+    
+    def clean(self):
+        from .emails import TemplateValidationError, compile_template
+        
+        try:
+            compile_template(self)
+        except TemplateValidationError as e:
+            raise ValidationError(str(e))
+
+
+class JobNotificationFanout(BaseModel):
+    """Progress of the background fan-out of new-job notifications"""
+    
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (COMPLETED, 'Completed'),
+        (FAILED, 'Failed'),
+    ]
+    
+    job = models.OneToOneField('jobs.Job', on_delete=models.CASCADE, related_name='notification_fanout')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    
+    # Progress; recipients are processed in id order, so ``last_recipient_id``
+    # is the resume point after a partial failure
+    processed_count = models.PositiveIntegerField(default=0)
+    last_recipient_id = models.UUIDField(null=True, blank=True)
+    
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'job_notification_fanouts'
+        
+    def __str__(self):
+        return f"Fan-out for job {self.job_id}: {self.status} ({self.processed_count} sent)"
@@ -0,0 +1,338 @@
+"""
+Email delivery of notifications.
+
+Notifications with ``send_email`` set and ``email_sent`` unset form the
+outbox, which ``manage.py send_notification_emails`` drains with an
+:class:`EmailOutbox`. Each batch:
+
+1. claims up to ``EMAIL_OUTBOX_BATCH_SIZE`` due rows with one conditional
+   UPDATE that stamps a claim token and moves ``email_next_attempt_at`` past
+   the lease, so concurrent workers skip them and the rows of a worker that
+   died come back once the lease ends;
+2. stops emailing rows whose recipient is inactive or opted out in
+   ``NotificationPreference``;
+3. parks the rows of users who take digests until their digest is due; a
+   due row brings along every other due row of its user, and they are sent
+   as one digest email;
+4. renders the rest (see ``notifications/emails.py``) and sends them over a
+   small pool of connections that stay open across batches, at most
+   ``EMAIL_OUTBOX_RATE`` messages per second;
+5. marks the delivered rows sent with one UPDATE and schedules the failed
+   ones for a retry with exponential backoff. A row is given up after
+   ``EMAIL_OUTBOX_MAX_ATTEMPTS`` attempts, or at once when the server
+   rejects the message permanently (5xx).
+
+Notifications older than ``EMAIL_OUTBOX_MAX_AGE`` seconds are no longer
+emailed. Delivery is at least once: a worker stalled past its lease may see
+its rows sent again by another worker.
+"""
+
+import logging
+import smtplib
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .emails import render_digests, render_emails
+from .models import Notification, NotificationPreference
+
+logger = logging.getLogger(__name__)
+
+# Seconds between passes that stop emailing notifications past the max age
+EXPIRE_INTERVAL = 60
+
+
+class EmailNotSent(Exception):
+    """The backend returned without delivering the message"""
+
+
+def _is_permanent(error):
+    """True if retrying can't deliver the message: every recipient or the content was rejected"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPDataError) and error.smtp_code >= 500
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt after ``attempts`` failed ones"""
+    return min(60 * 2 ** (attempts - 1), 3600)
+
+
+class RateLimiter:
+    """Spaces calls to :meth:`wait` at least ``1 / rate`` seconds apart across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        time.sleep(slot - now)
+
+
+class ConnectionPool:
+    """Email backend connections kept open across sends, one per sending thread
+
+    A connection is replaced after ``max_messages`` messages, as servers
+    limit the messages of one session, and after a network error.
+    """
+
+    def __init__(self, max_messages=0):
+        self.max_messages = max_messages
+        self.opened = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._states = []
+
+    def _state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            state = self._local.state = {'connection': None, 'sent': 0}
+            with self._lock:
+                self._states.append(state)
+        return state
+
+    def _close(self, state):
+        connection, state['connection'] = state['connection'], None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                logger.debug('Closing an email connection failed', exc_info=True)
+
+    def send(self, email):
+        """Send ``email`` on this thread's connection; raises if it was not delivered"""
+        state = self._state()
+        reused = state['connection'] is not None
+        if not reused:
+            connection = get_connection()
+            connection.open()
+            state.update(connection=connection, sent=0)
+            with self._lock:
+                self.opened += 1
+
+        try:
+            delivered = state['connection'].send_messages([email])
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server answered, so the session is still usable
+            raise
+        except OSError:
+            self._close(state)
+            if reused:
+                # Most likely the server dropped the idle connection: retry once on a new one
+                return self.send(email)
+            raise
+        if not delivered:
+            raise EmailNotSent('The email backend did not deliver the message')
+
+        state['sent'] += 1
+        if self.max_messages and state['sent'] >= self.max_messages:
+            self._close(state)
+
+    def close_all(self):
+        with self._lock:
+            states = list(self._states)
+        for state in states:
+            self._close(state)
+
+
+class EmailOutbox:
+    """Claims, sends and settles batches of notification emails"""
+
+    def __init__(self, batch_size=None, rate=None, connections=None):
+        self.batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        self.max_attempts = settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        self.lease = timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        self.max_age = settings.EMAIL_OUTBOX_MAX_AGE
+        self.limiter = RateLimiter(settings.EMAIL_OUTBOX_RATE if rate is None else rate)
+        self.pool = ConnectionPool(settings.EMAIL_CONNECTION_MAX_MESSAGES)
+        self._executor = ThreadPoolExecutor(max_workers=connections or settings.EMAIL_OUTBOX_CONNECTIONS,
+                                            thread_name_prefix='email-outbox')
+        self._expired_at = None
+
+    def close(self):
+        self._executor.shutdown()
+        self.pool.close_all()
+
+    def pending(self):
+        return Notification.objects.filter(send_email=True, email_sent=False)
+
+    def expire(self, now):
+        """Stop emailing notifications older than the max age; returns how many"""
+        if not self.max_age:
+            return 0
+        return self.pending().filter(created_at__lt=now - timedelta(seconds=self.max_age)).update(
+            send_email=False, email_claim=None, email_next_attempt_at=None, email_error='Expired before delivery'
+        )
+
+    def due(self, now):
+        due = self.pending().filter(
+            Q(email_next_attempt_at__isnull=True) | Q(email_next_attempt_at__lte=now),
+            email_attempts__lt=self.max_attempts,
+        )
+        if self.max_age:
+            due = due.filter(created_at__gte=now - timedelta(seconds=self.max_age))
+        return due
+
+    def _take(self, due, token, now):
+        # Conditional on still being due, so of two workers racing for a row
+        # only one stamps its token
+        return due.update(
+            email_claim=token, email_next_attempt_at=now + self.lease, email_attempts=F('email_attempts') + 1
+        )
+
+    def claim(self, now):
+        """``(token, notifications)`` of a batch of due rows, now held by this worker"""
+        due = self.due(now)
+        ids = list(due.order_by('created_at').values_list('id', flat=True)[:self.batch_size])
+        if not ids:
+            return None, []
+
+        token = uuid.uuid4()
+        self._take(due.filter(id__in=ids), token, now)
+        notifications = list(
+            Notification.objects.filter(id__in=ids, email_claim=token)
+            .select_related('user__notification_preferences').order_by('created_at')
+        )
+        return token, notifications
+
+    def claim_user(self, token, user_id, now, exclude):
+        """Also claim the other due rows of ``user_id``, to send them in one digest"""
+        if not self._take(self.due(now).filter(user_id=user_id).exclude(id__in=exclude), token, now):
+            return []
+        return list(
+            Notification.objects.filter(user_id=user_id, email_claim=token).exclude(id__in=exclude)
+            .select_related('user__notification_preferences').order_by('created_at')
+        )
+
+    def _preferences(self, user):
+        try:
+            return user.notification_preferences
+        except NotificationPreference.DoesNotExist:
+            return None
+
+    def wants_email(self, notification):
+        user = notification.user
+        if not user.is_active or not user.email:
+            return False
+        preferences = self._preferences(user)
+        return preferences is None or preferences.wants_email(notification.notification_type)
+
+    def digest_at(self, notification):
+        """When the digest holding ``notification`` is due, or None if it is emailed on its own"""
+        preferences = self._preferences(notification.user)
+        return preferences.digest_at(notification.created_at) if preferences else None
+
+    def _send(self, email):
+        self.limiter.wait()
+        try:
+            self.pool.send(email)
+        except Exception as e:
+            return e
+        return None
+
+    def run_batch(self):
+        """Claim and deliver one batch; returns counts by outcome, empty if nothing was due"""
+        now = timezone.now()
+        if self._expired_at is None or (now - self._expired_at).total_seconds() >= EXPIRE_INTERVAL:
+            self._expired_at = now
+            expired = self.expire(now)
+            if expired:
+                logger.info('Stopped emailing %s notifications older than %ss', expired, self.max_age)
+
+        token, notifications = self.claim(now)
+        if not notifications:
+            return Counter()
+        claimed = len(notifications)
+
+        skipped, single, parked, digests = [], [], defaultdict(list), defaultdict(list)
+
+        def sort(rows):
+            for notification in rows:
+                if not self.wants_email(notification):
+                    skipped.append(notification.id)
+                    continue
+                digest_at = self.digest_at(notification)
+                if digest_at is None:
+                    single.append(notification)
+                elif digest_at > now:
+                    parked[digest_at].append(notification.id)
+                else:
+                    digests[notification.user_id].append(notification)
+
+        sort(notifications)
+        for user_id, rows in list(digests.items()):
+            extra = self.claim_user(token, user_id, now, exclude=[notification.id for notification in rows])
+            claimed += len(extra)
+            sort(extra)
+
+        mine = Notification.objects.filter(email_claim=token)
+        for digest_at, ids in parked.items():
+            # Not an attempt: give back what claiming added
+            mine.filter(id__in=ids).update(
+                email_claim=None, email_next_attempt_at=digest_at, email_attempts=F('email_attempts') - 1
+            )
+
+        # (notifications, email or rendering error, is a digest)
+        jobs = [([notification], email, False) for notification, email in render_emails(single)]
+        jobs += [(rows, email, True) for rows, email in render_digests(list(digests.values()))]
+        sendable, failed = [], []
+        for rows, email, digest in jobs:
+            if isinstance(email, Exception):
+                failed.extend((notification, email) for notification in rows)
+            else:
+                sendable.append((rows, email, digest))
+
+        sent, digests_sent = [], 0
+        errors = self._executor.map(self._send, [email for _, email, _ in sendable])
+        for (rows, _, digest), error in zip(sendable, errors):
+            if error is None:
+                sent.extend(notification.id for notification in rows)
+                digests_sent += digest
+            else:
+                failed.extend((notification, error) for notification in rows)
+
+        if skipped:
+            mine.filter(id__in=skipped).update(send_email=False, email_claim=None, email_next_attempt_at=None)
+        if sent:
+            mine.filter(id__in=sent).update(
+                email_sent=True, email_sent_at=timezone.now(), email_claim=None, email_next_attempt_at=None,
+                email_error='',
+            )
+        if failed:
+            self._reschedule(mine, failed)
+
+        return Counter({
+            'claimed': claimed, 'sent': len(sent), 'skipped': len(skipped), 'failed': len(failed),
+            'parked': sum(len(ids) for ids in parked.values()), 'digests': digests_sent,
+        })
+
+    def _reschedule(self, mine, failed):
+        now = timezone.now()
+        rows = []
+        for notification, error in failed:
+            notification.email_claim = None
+            notification.email_error = f'{type(error).__name__}: {error}'[:1000]
+            if _is_permanent(error) or notification.email_attempts >= self.max_attempts:
+                notification.email_attempts = self.max_attempts
+                notification.email_next_attempt_at = None
+                logger.warning('Gave up emailing notification %s: %s', notification.id, notification.email_error)
+            else:
+                notification.email_next_attempt_at = now + timedelta(seconds=retry_delay(notification.email_attempts))
+            rows.append(notification)
+        logger.info('%s notification emails failed, first error: %s', len(rows), rows[0].email_error)
+        mine.bulk_update(rows, ['email_claim', 'email_error', 'email_attempts', 'email_next_attempt_at'])
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.utils import timezone
+from common.serializers import TimedModelSerializer, TimedSerializer
 from .models import Notification, NotificationPreference
 from users.serializers import UserProfileSerializer
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedModelSerializer):
     """Serializer for notification listing and details"""
     
     recipient_name = serializers.CharField(source='user.name', read_only=True)
@@ -15,7 +16,7 @@ class NotificationSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at', 'user')
 
 
-class CreateNotificationSerializer(serializers.ModelSerializer):
+class CreateNotificationSerializer(TimedModelSerializer):
     """Serializer for creating notifications"""
     
     class Meta:
@@ -32,7 +33,7 @@ class CreateNotificationSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class NotificationPreferenceSerializer(serializers.ModelSerializer):
+class NotificationPreferenceSerializer(TimedModelSerializer):
     """Serializer for notification preferences"""
     
     class Meta:
@@ -41,7 +42,7 @@ class NotificationPreferenceSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at', 'user')
 
 
-class MarkNotificationSerializer(serializers.Serializer):
+class MarkNotificationSerializer(TimedSerializer):
     """Serializer for marking notifications as read/unread"""
     
     notification_ids = serializers.ListField(
@@ -51,7 +52,7 @@ class MarkNotificationSerializer(serializers.Serializer):
     action = serializers.ChoiceField(choices=['read', 'unread'])
 
 
-class BulkNotificationSerializer(serializers.Serializer):
+class BulkNotificationSerializer(TimedSerializer):
     """Serializer for bulk notification operations"""
     
     recipient_ids = serializers.ListField(
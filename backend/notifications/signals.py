@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .events import notifications_created
+from .models import Notification
+
+
+@receiver(post_save, sender=Notification)
+def publish_new_notification(sender, instance, created, **kwargs):
+    """Push new notifications to the recipient's open streams"""
+    if created:
+        notifications_created([instance])
@@ -0,0 +1,211 @@
+"""
+Push delivery of notifications, replacing polling of the list and
+unread-count endpoints.
+
+``GET /api/notifications/stream/`` is a Server-Sent Events stream of the
+``notification.*`` events from ``notifications.events``. Each new
+notification carries its id as the SSE event id, so a reconnecting
+``EventSource`` sends ``Last-Event-ID`` and receives what it missed from the
+database (up to ``NOTIFICATION_REPLAY_LIMIT``, beyond which a
+``notification.resync`` event asks the client to reload its list). A comment
+line is sent every ``NOTIFICATION_STREAM_HEARTBEAT`` seconds and the stream
+ends after ``NOTIFICATION_STREAM_MAX_AGE`` seconds, after which the client
+reconnects.
+
+``GET /api/notifications/poll/?after=<notification id>`` is a long-poll
+fallback for clients that can't hold a stream: it answers as soon as there
+is anything newer than ``after``, or after ``timeout`` seconds.
+
+The stream needs the ASGI application: a WSGI server buffers an async
+response until it ends, so under WSGI (the gunicorn sync workers) the stream
+answers 501 and points the client at the long-poll. The long-poll waits up
+to ``NOTIFICATION_POLL_TIMEOUT`` under ASGI, but under WSGI every waiting
+client holds a whole sync worker, so there it waits at most
+``NOTIFICATION_POLL_WSGI_TIMEOUT`` (by default it answers at once). Keep
+``NOTIFICATION_STREAM_MAX_AGE`` below the server's worker timeout.
+``EventSource`` can't set headers, so the JWT access token may also be
+passed as ``?token=``.
+"""
+
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from common.events import get_event_layer, user_group
+from users.authentication import get_user_for_token
+
+from .events import EVENT_PREFIX, created_event
+from .models import Notification
+
+
+def get_request_token(request):
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):]
+    return request.GET.get('token')
+
+
+def missed_notifications(user, last_event_id):
+    """Notifications created after ``last_event_id``, oldest first
+
+    Returns ``(notifications, resync)``; ``resync`` is true when the id is
+    unknown or more than ``NOTIFICATION_REPLAY_LIMIT`` were missed.
+    """
+    if not last_event_id:
+        return [], False
+    try:
+        anchor = Notification.objects.only('id', 'created_at').get(id=last_event_id, user=user)
+    except (Notification.DoesNotExist, ValidationError):
+        return [], True
+
+    limit = settings.NOTIFICATION_REPLAY_LIMIT
+    notifications = list(
+        Notification.objects.filter(user=user)
+        .filter(Q(created_at__gt=anchor.created_at) | Q(created_at=anchor.created_at, id__gt=anchor.id))
+        .order_by('created_at', 'id')[:limit + 1]
+    )
+    return notifications[:limit], len(notifications) > limit
+
+
+def unread_count_event(user):
+    return {
+        'type': 'notification.unread_count',
+        'unread_count': Notification.objects.filter(user=user, is_read=False).count(),
+    }
+
+
+def latest_notification_id(user):
+    notification_id = (
+        Notification.objects.filter(user=user)
+        .order_by('-created_at', '-id')
+        .values_list('id', flat=True)
+        .first()
+    )
+    return str(notification_id) if notification_id else None
+
+
+def format_sse(event):
+    lines = []
+    if event.get('id'):
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event, cls=DjangoJSONEncoder)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(user, last_event_id):
+    # Subscribe before reading the backlog so nothing published in between is lost
+    subscription = await get_event_layer().subscribe([user_group(user.id)])
+    try:
+        yield f'retry: {settings.NOTIFICATION_STREAM_RETRY}\n\n'
+
+        backlog, resync = await sync_to_async(missed_notifications)(user, last_event_id)
+        if resync:
+            yield format_sse({'type': 'notification.resync'})
+        replayed = set()
+        for notification in backlog:
+            event = created_event(notification)
+            replayed.add(event['id'])
+            yield format_sse(event)
+        yield format_sse(await sync_to_async(unread_count_event)(user))
+
+        deadline = time.monotonic() + settings.NOTIFICATION_STREAM_MAX_AGE
+        while time.monotonic() < deadline:
+            events = await subscription.get_many(timeout=settings.NOTIFICATION_STREAM_HEARTBEAT)
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for event in events:
+                if not event.get('type', '').startswith(EVENT_PREFIX):
+                    continue
+                if event.get('id') in replayed:
+                    continue
+                yield format_sse(event)
+    finally:
+        await subscription.close()
+
+
+async def notification_stream(request):
+    """Server-Sent Events stream of the user's notifications"""
+    if not isinstance(request, ASGIRequest):
+        # A WSGI server would hold the whole stream back until it ends
+        return JsonResponse({
+            'error': 'Notification streaming needs the ASGI server; use the long-poll endpoint instead.',
+            'poll_url': reverse('notifications:poll'),
+        }, status=501)
+
+    user = await sync_to_async(get_user_for_token)(get_request_token(request))
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(event_stream(user, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def notification_poll(request):
+    """Long-poll for notification events newer than ``after``"""
+    user = await sync_to_async(get_user_for_token)(get_request_token(request))
+    if user is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided.'}, status=401)
+
+    after = request.GET.get('after') or request.headers.get('Last-Event-ID')
+    max_timeout = settings.NOTIFICATION_POLL_TIMEOUT
+    if not isinstance(request, ASGIRequest):
+        # Waiting here blocks a sync worker, and with it every other request it could serve
+        max_timeout = min(max_timeout, settings.NOTIFICATION_POLL_WSGI_TIMEOUT)
+    try:
+        timeout = min(max(float(request.GET.get('timeout', max_timeout)), 0), max_timeout)
+    except ValueError:
+        return JsonResponse({'error': 'timeout must be a number'}, status=400)
+
+    subscription = await get_event_layer().subscribe([user_group(user.id)])
+    try:
+        events = []
+        if after:
+            backlog, resync = await sync_to_async(missed_notifications)(user, after)
+            if resync:
+                events.append({'type': 'notification.resync'})
+            events.extend(created_event(notification) for notification in backlog)
+            if not events and timeout:
+                try:
+                    events = await asyncio.wait_for(_next_notification_events(subscription), timeout)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        await subscription.close()
+
+    last_event_id = after
+    for event in events:
+        last_event_id = event.get('id', last_event_id)
+    if not after:
+        # First poll: hand out a cursor to continue from
+        last_event_id = await sync_to_async(latest_notification_id)(user)
+
+    unread = await sync_to_async(unread_count_event)(user)
+    return JsonResponse({
+        'events': events,
+        'last_event_id': last_event_id,
+        'unread_count': unread['unread_count'],
+    }, encoder=DjangoJSONEncoder)
+
+
+async def _next_notification_events(subscription):
+    while True:
+        events = [
+            event for event in await subscription.get_many()
+            if event.get('type', '').startswith(EVENT_PREFIX)
+        ]
+        if events:
+            return events
@@ -0,0 +1,160 @@
+"""
+Background tasks for the notifications app.
+"""
+
+import logging
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from common.tasks import task
+from users.models import User
+from users.skills import normalize_skills, freelancers_with_skills
+from .events import notifications_created
+from .models import Notification, JobNotificationFanout
+
+logger = logging.getLogger(__name__)
+
+
+def job_notification_recipients(job, after=None):
+    """Ids of the freelancers to notify about ``job``, in id order
+    
+    Jobs that list required skills only reach freelancers with a matching
+    skill, resolved from the skill index; jobs without skills reach everyone.
+    """
+    if normalize_skills(job.skills_required):
+        queryset = freelancers_with_skills(job.skills_required)
+        if after is not None:
+            queryset = queryset.filter(freelancer_id__gt=after)
+        return queryset
+    
+    queryset = User.objects.filter(role=User.FREELANCER)
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    return queryset.order_by('id').values_list('id', flat=True)
+
+
+def build_job_notification(job, user_id):
+    """Build (but do not save) the new-job notification for one freelancer"""
+    return Notification(
+        user_id=user_id,
+        notification_type=Notification.NEW_MESSAGE,
+        title=f"New Job Posted: {job.title}",
+        message=f"A new job '{job.title}' has been posted by {job.client.name}. Check it out!",
+        priority=Notification.MEDIUM,
+        job_id=job.id,
+        data={
+            'job_id': str(job.id),
+            'job_title': job.title,
+            'client_name': job.client.name,
+            'budget': f"${job.budget_min} - ${job.budget_max}"
+        }
+    )
+
+
+def start_job_fanout(job):
+    """Record a fan-out for ``job`` and hand it to the background worker"""
+    fanout = JobNotificationFanout.objects.create(job=job)
+    fanout_job_notifications.delay(str(fanout.id))
+    return fanout
+
+
+class FanoutLeaseLost(Exception):
+    """Another attempt claimed the fan-out; this one must stop writing"""
+
+
+def _update_fanout(fanout, **fields):
+    """Write ``fields`` unless a newer attempt claimed the fan-out; raises :class:`FanoutLeaseLost` then"""
+    updated = JobNotificationFanout.objects.filter(id=fanout.id, attempts=fanout.attempts).update(
+        updated_at=timezone.now(), **fields
+    )
+    if not updated:
+        raise FanoutLeaseLost(fanout.id)
+
+
+def _send_batches(fanout, batch_size):
+    job = fanout.job
+    while True:
+        recipient_ids = list(
+            job_notification_recipients(job, after=fanout.last_recipient_id)[:batch_size]
+        )
+        if not recipient_ids:
+            return
+        
+        # Notifications and the progress marker are committed together, so a
+        # retry resumes exactly after the last delivered batch; the marker is
+        # only written while this attempt holds the fan-out
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create(
+                [build_job_notification(job, user_id) for user_id in recipient_ids],
+                batch_size=batch_size,
+            )
+            _update_fanout(
+                fanout,
+                processed_count=F('processed_count') + len(recipient_ids),
+                last_recipient_id=recipient_ids[-1],
+            )
+            # bulk_create skips post_save, so publish to open streams here,
+            # once the batch is committed
+            transaction.on_commit(partial(notifications_created, notifications))
+        fanout.last_recipient_id = recipient_ids[-1]
+
+
+def claim_fanout(fanout_id):
+    """Start a new attempt at a pending fan-out; returns it, or None when it isn't pending
+    
+    The conditional update makes concurrent workers claim each attempt once,
+    and bumping ``attempts`` revokes the lease of any older attempt still
+    running (see :func:`_update_fanout`).
+    """
+    now = timezone.now()
+    claimed = JobNotificationFanout.objects.filter(id=fanout_id, status=JobNotificationFanout.PENDING).update(
+        status=JobNotificationFanout.RUNNING,
+        attempts=F('attempts') + 1,
+        started_at=Coalesce('started_at', Value(now)),
+        updated_at=now,
+    )
+    if not claimed:
+        return None
+    return JobNotificationFanout.objects.select_related('job__client').get(id=fanout_id)
+
+
+@task
+def fanout_job_notifications(fanout_id):
+    """Write new-job notifications for every recipient in bulk batches
+    
+    Runs one attempt; a failed attempt schedules the next one with
+    exponential backoff rather than waiting on a worker thread.
+    """
+    fanout = claim_fanout(fanout_id)
+    if fanout is None:
+        return
+    
+    try:
+        _send_batches(fanout, settings.NOTIFICATION_FANOUT_BATCH_SIZE)
+        _update_fanout(fanout, status=JobNotificationFanout.COMPLETED, completed_at=timezone.now(), last_error='')
+    except FanoutLeaseLost:
+        logger.warning("Job notification fan-out %s was taken over by a newer attempt", fanout.id)
+    except Exception as e:
+        # Progress as committed, not as counted before a rolled back batch;
+        # attempts stays this attempt's, the lease the update below checks
+        fanout.refresh_from_db(fields=['processed_count'])
+        logger.exception(
+            "Job notification fan-out %s failed after %s notifications (attempt %s)",
+            fanout.id, fanout.processed_count, fanout.attempts
+        )
+        failed = fanout.attempts >= settings.NOTIFICATION_FANOUT_MAX_ATTEMPTS
+        try:
+            _update_fanout(
+                fanout,
+                status=JobNotificationFanout.FAILED if failed else JobNotificationFanout.PENDING,
+                last_error=str(e),
+            )
+        except FanoutLeaseLost:
+            return
+        if not failed:
+            fanout_job_notifications.delay_after(min(2 ** fanout.attempts, 60), str(fanout.id))
@@ -1,3 +1,281 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+import smtplib
+import uuid
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from jobs.models import Job
+from users.models import User
+from .coalescing import notify
+from .events import updated_event
+from .models import EmailTemplate, JobNotificationFanout, Notification
+from .outbox import EmailOutbox
+from .stream import format_sse
+from .tasks import FanoutLeaseLost, _update_fanout, claim_fanout, fanout_job_notifications
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, NOTIFICATION_FANOUT_BATCH_SIZE=2)
+class JobFanoutTests(TestCase):
+    """Background fan-out of new-job notifications"""
+
+    def setUp(self):
+        client = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        self.freelancers = [
+            User.objects.create_user(f'freelancer{i}@example.com', 'pass', name=f'F{i}', role=User.FREELANCER)
+            for i in range(5)
+        ]
+        self.job = Job.objects.create(
+            client=client, title='Essay', description='Write', assignment_type=Job.ACADEMIC_WRITING,
+            subject='History', deadline=timezone.now() + timedelta(days=3),
+            budget_min=10, budget_max=50, status=Job.OPEN,
+        )
+        self.fanout = JobNotificationFanout.objects.get(job=self.job)
+
+    def notified(self):
+        return list(Notification.objects.filter(job_id=self.job.id).values_list('user_id', flat=True))
+
+    def test_notifies_every_freelancer_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            fanout_job_notifications(str(self.fanout.id))
+
+        self.fanout.refresh_from_db()
+        self.assertEqual(self.fanout.status, JobNotificationFanout.COMPLETED)
+        self.assertEqual(self.fanout.processed_count, 5)
+        self.assertCountEqual(self.notified(), [user.id for user in self.freelancers])
+
+    def test_failed_batch_is_retried_without_duplicates(self):
+        bulk_create = Notification.objects.bulk_create
+        calls = []
+
+        def flaky_bulk_create(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(Notification.objects, 'bulk_create', side_effect=flaky_bulk_create):
+            with self.captureOnCommitCallbacks(execute=True):
+                fanout_job_notifications(str(self.fanout.id))
+
+        self.fanout.refresh_from_db()
+        self.assertEqual(self.fanout.status, JobNotificationFanout.COMPLETED)
+        self.assertEqual(self.fanout.attempts, 2)
+        self.assertEqual(self.fanout.processed_count, 5)
+        notified = self.notified()
+        self.assertEqual(len(notified), len(set(notified)))
+        self.assertCountEqual(notified, [user.id for user in self.freelancers])
+
+    def test_running_fanout_is_claimed_once(self):
+        self.assertIsNotNone(claim_fanout(self.fanout.id))
+        self.assertIsNone(claim_fanout(self.fanout.id))
+
+        fanout_job_notifications(str(self.fanout.id))
+        self.assertEqual(self.notified(), [])
+
+    def test_taken_over_attempt_stops_writing(self):
+        fanout = claim_fanout(self.fanout.id)
+        JobNotificationFanout.objects.filter(id=fanout.id).update(attempts=fanout.attempts + 1)
+
+        with self.assertRaises(FanoutLeaseLost):
+            _update_fanout(fanout, processed_count=1)
+
+    def test_failing_attempt_taken_over_leaves_the_fanout_alone(self):
+        def taken_over(*args, **kwargs):
+            JobNotificationFanout.objects.filter(id=self.fanout.id).update(attempts=F('attempts') + 1)
+            raise RuntimeError('database went away')
+
+        # Outside the batch transaction, so the takeover isn't rolled back with it
+        with mock.patch('notifications.tasks.job_notification_recipients', side_effect=taken_over), \
+                mock.patch.object(fanout_job_notifications, 'delay_after') as delay_after:
+            fanout_job_notifications(str(self.fanout.id))
+
+        self.fanout.refresh_from_db()
+        self.assertEqual(self.fanout.status, JobNotificationFanout.RUNNING)
+        self.assertEqual(self.fanout.attempts, 2)
+        self.assertEqual(self.fanout.last_error, '')
+        delay_after.assert_not_called()
+
+    def test_resume_only_takes_over_stale_fanouts(self):
+        claim_fanout(self.fanout.id)
+        call_command('resume_notification_fanouts', stdout=StringIO())
+        self.fanout.refresh_from_db()
+        self.assertEqual(self.fanout.status, JobNotificationFanout.RUNNING)
+
+        JobNotificationFanout.objects.filter(id=self.fanout.id).update(
+            updated_at=timezone.now() - timedelta(hours=1)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('resume_notification_fanouts', stdout=StringIO())
+        self.fanout.refresh_from_db()
+        self.assertEqual(self.fanout.status, JobNotificationFanout.COMPLETED)
+        self.assertEqual(len(self.notified()), 5)
+
+
+class NotificationStreamTests(TestCase):
+    """Server-Sent Events endpoint"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('freelancer@example.com', 'pass', name='F', role=User.FREELANCER)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get('/api/notifications/stream/', {'token': self.token})
+        self.assertEqual(response.status_code, 501)
+        self.assertEqual(response.json()['poll_url'], '/api/notifications/poll/')
+
+    async def test_stream_is_served_under_asgi(self):
+        response = await self.async_client.get('/api/notifications/stream/', {'token': self.token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        await response.streaming_content.aclose()
+
+
+@override_settings(NOTIFICATION_POLL_TIMEOUT=25, NOTIFICATION_POLL_WSGI_TIMEOUT=5)
+class NotificationPollTests(TestCase):
+    """Long-poll cursor, and its wait under WSGI"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('client@example.com', 'pass', name='C', role=User.CLIENT)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.job_id = uuid.uuid4()
+
+    def notify_offer(self):
+        return notify(self.user, Notification.NEW_OFFER, 'New Offer', 'Offer', job_id=self.job_id)
+
+    def poll(self, after, **params):
+        return self.client.get('/api/notifications/poll/', {'token': self.token, 'after': after, **params}).json()
+
+    def test_update_of_an_older_notification_keeps_the_cursor(self):
+        coalesced = self.notify_offer()
+        newest = notify(self.user, Notification.PAYMENT_CONFIRMED, 'Paid', 'Payment confirmed')
+        self.assertEqual(self.notify_offer().id, coalesced.id)
+
+        update = updated_event(Notification.objects.get(id=coalesced.id))
+        self.assertNotIn('id:', format_sse(update))
+        with mock.patch('notifications.stream._next_notification_events', new=mock.AsyncMock(return_value=[update])):
+            response = self.poll(str(newest.id))
+        self.assertEqual([event['type'] for event in response['events']], ['notification.updated'])
+        self.assertEqual(response['last_event_id'], str(newest.id))
+
+        # Reconnecting from that cursor replays nothing already delivered
+        response = self.poll(response['last_event_id'], timeout=0)
+        self.assertEqual(response['events'], [])
+
+    def waited(self, after, **params):
+        """Seconds the poll waited for new events, which never come"""
+        waits = []
+
+        async def wait_for(awaitable, timeout):
+            awaitable.close()
+            waits.append(timeout)
+            raise asyncio.TimeoutError
+
+        with mock.patch('notifications.stream.asyncio.wait_for', new=wait_for):
+            self.assertEqual(self.poll(after, **params)['events'], [])
+        return waits
+
+    def test_wait_under_wsgi_is_capped(self):
+        after = str(self.notify_offer().id)
+        self.assertEqual(self.waited(after), [5])
+        self.assertEqual(self.waited(after, timeout=2), [2])
+        with self.settings(NOTIFICATION_POLL_WSGI_TIMEOUT=0):
+            self.assertEqual(self.waited(after), [])
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_MAX_AGE=3600)
+class EmailOutboxTests(TestCase):
+    """Delivery, retries and expiry of notification emails"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        self.notification = Notification.objects.create(
+            user=self.user, notification_type=Notification.NEW_OFFER, title='New Offer', message='You got an offer',
+            data={'amount': '50.00'},
+        )
+        self.outbox = EmailOutbox(rate=0, connections=1)
+        self.addCleanup(self.outbox.close)
+
+    def run_batch(self, error=None):
+        if error is None:
+            return self.outbox.run_batch()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=error):
+            return self.outbox.run_batch()
+
+    def make_due(self):
+        Notification.objects.filter(id=self.notification.id).update(email_next_attempt_at=timezone.now())
+
+    def test_delivered_email_is_marked_sent(self):
+        self.assertEqual(self.run_batch()['sent'], 1)
+        self.assertEqual(mail.outbox[0].to, ['client@example.com'])
+        self.assertEqual(mail.outbox[0].subject, 'New Offer')
+        self.notification.refresh_from_db()
+        self.assertTrue(self.notification.email_sent)
+        self.assertIsNone(self.notification.email_claim)
+        self.assertFalse(self.run_batch())
+
+    def test_temporary_failure_is_retried_after_a_backoff(self):
+        before = timezone.now()
+        self.assertEqual(self.run_batch(smtplib.SMTPDataError(451, 'Try later'))['failed'], 1)
+        self.notification.refresh_from_db()
+        self.assertFalse(self.notification.email_sent)
+        self.assertEqual(self.notification.email_attempts, 1)
+        self.assertGreaterEqual(self.notification.email_next_attempt_at, before + timedelta(seconds=60))
+        self.assertIn('Try later', self.notification.email_error)
+
+        # Not due again until the backoff ends
+        self.assertFalse(self.run_batch())
+        self.make_due()
+        self.assertEqual(self.run_batch()['sent'], 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_gives_up_after_max_attempts(self):
+        for _ in range(3):
+            self.assertEqual(self.run_batch(smtplib.SMTPDataError(451, 'Try later'))['failed'], 1)
+            self.make_due()
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.email_attempts, 3)
+        self.assertFalse(self.run_batch())
+        self.assertEqual(mail.outbox, [])
+
+    def test_permanent_rejection_is_not_retried(self):
+        self.run_batch(smtplib.SMTPDataError(550, 'Mailbox unavailable'))
+        self.notification.refresh_from_db()
+        self.assertEqual(self.notification.email_attempts, 3)
+        self.assertIsNone(self.notification.email_next_attempt_at)
+        self.make_due()
+        self.assertFalse(self.run_batch())
+
+    def test_old_notifications_expire_instead_of_being_sent(self):
+        Notification.objects.filter(id=self.notification.id).update(created_at=timezone.now() - timedelta(hours=2))
+        self.assertFalse(self.run_batch())
+        self.notification.refresh_from_db()
+        self.assertFalse(self.notification.send_email)
+        self.assertEqual(self.notification.email_error, 'Expired before delivery')
+        self.assertEqual(mail.outbox, [])
+
+    def test_rendered_with_the_template_of_its_type(self):
+        EmailTemplate.objects.create(
+            name=Notification.NEW_OFFER, subject='Offer of {{ amount }}', variables=['amount'],
+            html_content='<p>Hi {{ user_name }}, {{ message }}</p>',
+        )
+        self.run_batch()
+        self.assertEqual(mail.outbox[0].subject, 'Offer of 50.00')
+        self.assertEqual(mail.outbox[0].body, 'Hi Client, You got an offer')
+
+    def test_template_with_undeclared_variables_fails_the_email(self):
+        EmailTemplate.objects.create(
+            name=Notification.NEW_OFFER, subject='Offer of {{ amount }}', html_content='{{ secret }}',
+            variables=['amount'],
+        )
+        self.assertEqual(self.run_batch()['failed'], 1)
+        self.notification.refresh_from_db()
+        self.assertIn('secret', self.notification.email_error)
+        self.assertEqual(mail.outbox, [])
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import stream, views
 
 app_name = 'notifications'
 
@@ -12,5 +12,7 @@ urlpatterns = [
     path('mark-all-read/', views.mark_all_read, name='mark-all-read'),
     path('preferences/', views.NotificationPreferencesView.as_view(), name='preferences'),
     path('unread-count/', views.unread_count, name='unread-count'),
+    path('stream/', stream.notification_stream, name='stream'),
+    path('poll/', stream.notification_poll, name='poll'),
     path('bulk-send/', views.send_bulk_notifications, name='bulk-send'),
 ]
@@ -5,6 +5,9 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.db.models import Q
+from common.pagination import KeysetPagination
+from common.queries import query_budget
+from .events import unread_count_changed
 from .models import Notification, NotificationPreference
 from .serializers import (
     NotificationSerializer, CreateNotificationSerializer,
@@ -17,10 +20,12 @@ class NotificationListView(generics.ListAPIView):
     """List notifications for the authenticated user"""
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 4
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Notification.objects.filter(user=user).order_by('-created_at')
+        queryset = Notification.objects.filter(user=user).select_related('user').order_by('-created_at')
         
         # Filter by read/unread status
         read_status = self.request.query_params.get('read')
@@ -42,6 +47,7 @@ class NotificationDetailView(generics.RetrieveAPIView):
     """Get notification details"""
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 4
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -53,6 +59,7 @@ class NotificationDetailView(generics.RetrieveAPIView):
             notification.is_read = True
             notification.read_at = timezone.now()
             notification.save()
+            unread_count_changed(request.user.id, -1)
         return super().retrieve(request, *args, **kwargs)
 
 
@@ -85,15 +92,17 @@ def mark_notifications(request):
         )
         
         if action == 'read':
-            notifications.update(
+            changed = notifications.filter(is_read=False).update(
                 is_read=True,
                 read_at=timezone.now()
             )
+            unread_count_changed(request.user.id, -changed)
         else:
-            notifications.update(
+            changed = notifications.filter(is_read=True).update(
                 is_read=False,
                 read_at=None
             )
+            unread_count_changed(request.user.id, changed)
         
         return Response(
             {"message": f"Notifications marked as {action}"},
@@ -107,13 +116,14 @@ def mark_notifications(request):
 @permission_classes([IsAuthenticated])
 def mark_all_read(request):
     """Mark all notifications as read for the user"""
-    Notification.objects.filter(
+    changed = Notification.objects.filter(
         user=request.user,
         is_read=False
     ).update(
         is_read=True,
         read_at=timezone.now()
     )
+    unread_count_changed(request.user.id, -changed)
     
     return Response(
         {"message": "All notifications marked as read"},
@@ -133,6 +143,7 @@ class NotificationPreferencesView(generics.RetrieveUpdateAPIView):
         return preferences
 
 
+@query_budget(3)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def unread_count(request):
@@ -159,6 +170,8 @@ def delete_notification(request, pk):
     )
     
     notification.delete()
+    if not notification.is_read:
+        unread_count_changed(request.user.id, -1)
     
     return Response(
         {"message": "Notification deleted successfully"},
@@ -0,0 +1,99 @@
+"""
+Accepting offers.
+
+:func:`accept_offer` closes the job, accepts the offer, rejects the job's
+other pending offers and creates the order in one short transaction. The
+job row is claimed first with a conditional UPDATE: its row lock makes
+concurrent acceptances for the same job wait, and once the winner commits
+they find the job closed and give up, so a job never gets two accepted
+offers or orders. Opening the transaction with a write also makes SQLite
+take its write lock up front, where waiting on it is safe.
+
+Everything else (notifying the freelancers, chat events, the search index)
+runs from :func:`offers.tasks.offer_accepted` after the commit.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+from orders.models import Order
+
+from .models import Offer
+from .ranking import invalidate_ranking
+from .tasks import offer_accepted
+
+# Jobs in these states take no more offers, see CreateOfferView
+CLOSED_STATUSES = (Job.CLOSED, Job.COMPLETED, Job.CANCELLED)
+
+
+class OfferNotAccepted(Exception):
+    """The offer can't be accepted; ``status_code`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def accept_offer(offer_id, user):
+    """Accept ``offer_id`` as ``user`` and return ``(offer, order)``
+
+    Raises :class:`OfferNotAccepted` when the offer doesn't exist, ``user``
+    doesn't own the job or the offer or job was decided already.
+    """
+    offer = (
+        Offer.objects.select_related('job')
+        .only('id', 'status', 'job_id', 'freelancer_id', 'chat_id', 'title', 'description',
+              'delivery_time', 'amount', 'job__id', 'job__client_id', 'job__title', 'job__status')
+        .filter(id=offer_id)
+        .first()
+    )
+    if offer is None:
+        raise OfferNotAccepted('Offer not found', 404)
+    job = offer.job
+    if job.client_id != user.pk:
+        raise OfferNotAccepted('Only job owner can accept offers', 403)
+    # Cheap early answers; the conditional updates below are what decide
+    if offer.status != Offer.PENDING:
+        raise OfferNotAccepted('Offer is no longer pending')
+    if job.status in CLOSED_STATUSES:
+        raise OfferNotAccepted('This job is no longer accepting offers')
+
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = Job.objects.filter(pk=job.pk).exclude(status__in=CLOSED_STATUSES).update(
+            status=Job.CLOSED, updated_at=now
+        )
+        if not claimed:
+            raise OfferNotAccepted('This job is no longer accepting offers')
+        if not Offer.objects.filter(pk=offer.pk, status=Offer.PENDING).update(status=Offer.ACCEPTED, updated_at=now):
+            # Withdrawn or rejected meanwhile: leaving the block undoes the job update
+            raise OfferNotAccepted('Offer is no longer pending')
+
+        rejected = list(
+            Offer.objects.filter(job_id=job.pk, status=Offer.PENDING)
+            .exclude(pk=offer.pk).values_list('id', flat=True)
+        )
+        if rejected:
+            Offer.objects.filter(id__in=rejected).update(status=Offer.REJECTED, updated_at=now)
+
+        delivery_date = now + timezone.timedelta(days=offer.delivery_time)
+        order = Order.objects.create(
+            job_id=job.pk,
+            client_id=job.client_id,
+            freelancer_id=offer.freelancer_id,
+            offer=offer,
+            status=Order.ACTIVE,
+            title=offer.title or f"Order for {job.title}",
+            description=offer.description,
+            delivery_time=offer.delivery_time,
+            amount=offer.amount,
+            delivery_date=delivery_date,
+            due_date=delivery_date,
+        )
+        offer_accepted.delay(str(offer.pk), str(order.pk), [str(pk) for pk in rejected])
+        transaction.on_commit(lambda: invalidate_ranking(job.pk))
+
+    offer.status, offer.updated_at = Offer.ACCEPTED, now
+    job.status = Job.CLOSED
+    return offer, order
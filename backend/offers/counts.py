@@ -0,0 +1,62 @@
+"""
+Denormalized ``Job.offers_count``: the offers made on a job, less the withdrawn ones.
+
+Creating an offer adds one and withdrawing or deleting it takes one off,
+with ``F()`` updates in the same transaction as the change, so concurrent
+offers never overwrite each other's counts and job lists read the count
+without touching ``offers``. Accepting or rejecting an offer doesn't change
+it. Rows written around the ORM (bulk loads, raw SQL) are brought back in
+line by :func:`reconcile_offer_counts`.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Count, F, Q
+
+from jobs.models import Job
+
+from .models import Offer
+
+# Jobs updated per UPDATE when reconciling
+RECONCILE_BATCH_SIZE = 1000
+
+
+def offer_added(job_id):
+    Job.objects.filter(pk=job_id).update(offers_count=F('offers_count') + 1)
+
+
+def offer_removed(job_id):
+    # Conditional so a count that drifted to zero can't go negative
+    Job.objects.filter(pk=job_id, offers_count__gt=0).update(offers_count=F('offers_count') - 1)
+
+
+def drifted_offer_counts():
+    """``(job_id, stored, actual)`` of the jobs whose count is wrong, in one grouped query"""
+    # values() first so only these two columns are grouped on
+    return (
+        Job.objects.order_by().values('id', 'offers_count')
+        .annotate(actual=Count('offers', filter=~Q(offers__status=Offer.WITHDRAWN)))
+        .exclude(offers_count=F('actual'))
+        .values_list('id', 'offers_count', 'actual')
+    )
+
+
+def reconcile_offer_counts(dry_run=False):
+    """Correct every drifted ``offers_count``; returns the ``(job_id, stored, actual)`` rows found
+
+    Corrections are applied as ``F()`` deltas rather than absolute values, so
+    offers created or withdrawn while this runs are still counted.
+    """
+    drifted = list(drifted_offer_counts())
+    if dry_run:
+        return drifted
+
+    by_delta = defaultdict(list)
+    for job_id, stored, actual in drifted:
+        by_delta[actual - stored].append(job_id)
+    for delta, job_ids in by_delta.items():
+        for start in range(0, len(job_ids), RECONCILE_BATCH_SIZE):
+            Job.objects.filter(id__in=job_ids[start:start + RECONCILE_BATCH_SIZE]).update(
+                offers_count=F('offers_count') + delta
+            )
+    return drifted
@@ -0,0 +1,177 @@
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from chat.models import Chat
+from jobs.models import Job
+from notifications.models import Notification
+from offers.acceptance import OfferNotAccepted, accept_offer
+from offers.models import Offer
+from orders.models import Order
+from users.models import User
+
+
+def _percentiles(latencies):
+    ordered = sorted(latencies)
+    cuts = statistics.quantiles(ordered, n=100, method='inclusive') if len(ordered) > 1 else ordered * 99
+    return {'p50': cuts[49] * 1000, 'p95': cuts[94] * 1000, 'max': ordered[-1] * 1000}
+
+
+class Command(BaseCommand):
+    help = (
+        'Race concurrent acceptances of the offers of each job in a fresh test '
+        'database and check that every job ends up with exactly one accepted '
+        'offer and one order, and that the requests that lose the race fail '
+        'fast. Each offer is raced by several threads, like a double click.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=20, help='Jobs raced one after another')
+        parser.add_argument('--offers', type=int, default=4, help='Pending offers per job')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent acceptances per job')
+        parser.add_argument('--max-p95-ms', type=float, default=1000,
+                            help='Fail when the p95 latency of all acceptances exceeds this')
+
+    def handle(self, *args, **options):
+        if options['offers'] < 1 or options['threads'] < 2:
+            raise CommandError('Use at least one offer and two threads')
+
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                # Connections to a shared in-memory database fail on each other's
+                # locks instead of waiting for them, so race on a file
+                connection.settings_dict.setdefault('TEST', {})['NAME'] = str(Path(directory) / 'race.sqlite3')
+            jobs, results, problems = self._run(options)
+
+        outcomes = Counter(outcome for race in results for outcome, _ in race)
+        self.stdout.write(
+            f"{len(jobs)} jobs x {options['threads']} concurrent acceptances of {options['offers']} offers: "
+            + ', '.join(f'{count} {outcome}' for outcome, count in sorted(outcomes.items()))
+        )
+        self.stdout.write(f"{'':<12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        latencies = {'all': [latency for race in results for _, latency in race]}
+        for outcome in outcomes:
+            latencies[outcome] = [latency for race in results for result, latency in race if result == outcome]
+        for name, values in latencies.items():
+            cuts = _percentiles(values)
+            self.stdout.write(f"{name:<12}{cuts['p50']:>10.1f}{cuts['p95']:>10.1f}{cuts['max']:>10.1f}")
+
+        if outcomes['accepted'] != len(jobs):
+            problems.append(f"{outcomes['accepted']} acceptances succeeded for {len(jobs)} jobs")
+        errors = [outcome for outcome in outcomes if outcome not in ('accepted', 'conflict')]
+        if errors:
+            problems.append(f"Unexpected outcomes: {', '.join(errors)}")
+        p95 = _percentiles(latencies['all'])['p95']
+        if p95 > options['max_p95_ms']:
+            problems.append(f"p95 latency {p95:.1f}ms is above {options['max_p95_ms']:.0f}ms")
+        if problems:
+            for problem in problems:
+                self.stderr.write(problem)
+            raise CommandError(f'{len(problems)} problem(s) found')
+        self.stdout.write(self.style.SUCCESS('Every job has exactly one accepted offer and one order'))
+
+    def _run(self, options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            # Follow-up work runs inline after the winner's commit, as in benchmark_api
+            with override_settings(BACKGROUND_TASKS_EAGER=True, CELERY_ENABLED=False, QUERY_BUDGET_ENABLED=False):
+                jobs = self._seed(options['jobs'], options['offers'])
+                results = [self._race(job, options['threads']) for job in jobs]
+                return jobs, results, self._check(jobs, options['offers'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def _seed(self, job_count, offer_count):
+        password = make_password(None)
+        client = User.objects.create(email='accept-bench-client@example.com', name='Bench Client',
+                                     role=User.CLIENT, password=password)
+        freelancers = User.objects.bulk_create([
+            User(email=f'accept-bench-{i}@example.com', name=f'Freelancer {i}', role=User.FREELANCER,
+                 password=password)
+            for i in range(offer_count)
+        ])
+        # Bulk created: no fan-out or search indexing, which aren't measured here
+        jobs = Job.objects.bulk_create([
+            Job(client=client, title=f'Acceptance race {i}', description='Benchmark',
+                assignment_type=Job.PROGRAMMING, subject='Benchmark',
+                deadline=timezone.now() + timedelta(days=7), budget_min=10, budget_max=100, status=Job.OPEN)
+            for i in range(job_count)
+        ])
+        chats = Chat.objects.bulk_create([
+            Chat(job=job, client=client, freelancer=freelancer) for job in jobs for freelancer in freelancers
+        ])
+        Offer.objects.bulk_create([
+            Offer(job=chat.job, freelancer=chat.freelancer, chat=chat, title='Offer', description='Benchmark',
+                  delivery_time=3, payment_type=Offer.FIXED, amount=50)
+            for chat in chats
+        ])
+        for job in jobs:
+            job.client = client
+            job.race_offers = list(Offer.objects.filter(job=job).values_list('id', flat=True))
+        return jobs
+
+    def _race(self, job, threads):
+        """``(outcome, seconds)`` of ``threads`` acceptances started together, spread over the offers"""
+        barrier = threading.Barrier(threads)
+        results = []
+        lock = threading.Lock()
+
+        def contender(index):
+            offer_id = job.race_offers[index % len(job.race_offers)]
+            try:
+                barrier.wait()
+                start = time.perf_counter()
+                try:
+                    accept_offer(offer_id, job.client)
+                    outcome = 'accepted'
+                except OfferNotAccepted:
+                    outcome = 'conflict'
+                except Exception as e:
+                    outcome = type(e).__name__
+                elapsed = time.perf_counter() - start
+                with lock:
+                    results.append((outcome, elapsed))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=contender, args=(index,)) for index in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return results
+
+    def _check(self, jobs, offer_count):
+        problems = []
+        accepted = Counter(Offer.objects.filter(status=Offer.ACCEPTED).values_list('job_id', flat=True))
+        pending = Counter(Offer.objects.filter(status=Offer.PENDING).values_list('job_id', flat=True))
+        orders = Counter(Order.objects.values_list('job_id', flat=True))
+        closed = set(Job.objects.filter(status=Job.CLOSED).values_list('id', flat=True))
+        for job in jobs:
+            if accepted[job.id] != 1 or orders[job.id] != 1 or pending[job.id] or job.id not in closed:
+                problems.append(
+                    f'{job.title}: {accepted[job.id]} accepted offers, {orders[job.id]} orders, '
+                    f'{pending[job.id]} still pending, job {"closed" if job.id in closed else "open"}'
+                )
+
+        notified = Counter(
+            Notification.objects.filter(job_id__in=[job.id for job in jobs])
+            .values_list('notification_type', flat=True)
+        )
+        expected = {Notification.OFFER_ACCEPTED: len(jobs), Notification.OFFER_REJECTED: len(jobs) * (offer_count - 1)}
+        for notification_type, count in expected.items():
+            if notified[notification_type] != count:
+                problems.append(f'{notified[notification_type]} {notification_type} notifications, expected {count}')
+        return problems
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from offers.counts import reconcile_offer_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute every job's offers_count from its offers and correct the ones that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report the drifted counts without fixing them')
+
+    def handle(self, *args, **options):
+        drifted = reconcile_offer_counts(dry_run=options['dry_run'])
+        if options['verbosity'] >= 2:
+            for job_id, stored, actual in drifted:
+                self.stdout.write(f'{job_id}: {stored} -> {actual}')
+        verb = 'Found' if options['dry_run'] else 'Corrected'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(drifted)} drifted offer counts'))
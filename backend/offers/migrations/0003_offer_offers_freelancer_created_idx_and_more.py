@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-17 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_initial'),
+        ('jobs', '0004_job_jobs_status_created_idx'),
+        ('offers', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['freelancer', '-created_at', '-id'], name='offers_freelancer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['job', '-created_at', '-id'], name='offers_job_created_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_message_chat_created_idx'),
+        ('jobs', '0006_job_skill_vectors'),
+        ('offers', '0003_offer_offers_freelancer_created_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='offer',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='offer',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'withdrawn'), _negated=True), fields=('job', 'freelancer'), name='offers_one_per_freelancer_job'),
+        ),
+    ]
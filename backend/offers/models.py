@@ -49,8 +49,19 @@ class Offer(BaseModel):
     
     class Meta:
         db_table = 'offers'
-        unique_together = ('job', 'freelancer')  # One offer per freelancer per job
+        constraints = [
+            # One offer per freelancer per job, but a withdrawn offer doesn't count
+            models.UniqueConstraint(
+                fields=['job', 'freelancer'],
+                condition=~models.Q(status='withdrawn'),
+                name='offers_one_per_freelancer_job',
+            ),
+        ]
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['freelancer', '-created_at', '-id'], name='offers_freelancer_created_idx'),
+            models.Index(fields=['job', '-created_at', '-id'], name='offers_job_created_idx'),
+        ]
         
     def __str__(self):
         return f"Offer by {self.freelancer.name} for {self.job.title}"
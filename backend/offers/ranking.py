@@ -0,0 +1,134 @@
+"""
+Ranking the offers on a job for its owner.
+
+Every offer that wasn't withdrawn gets four components between 0 and 1,
+combined with ``WEIGHTS`` into its ``score``:
+
+* ``price``: 1 at or below the job's ``budget_min``, falling linearly to 0 at
+  ``budget_max`` and beyond; hourly offers count their estimated total
+* ``delivery``: 1 for delivering at once, down to 0.5 for delivering right
+  at the job's deadline and 0 past it
+* ``rating``: the freelancer's profile rating out of 5
+* ``experience``: ``total_jobs_completed`` saturating towards 1, 0.5 at
+  ``EXPERIENCE_HALF`` jobs
+
+The job's budget and time left are bound as constants, so the database
+computes every score in the query that fetches the page, ordered by score.
+
+Pages are cached per job under a version token that is replaced whenever
+an offer on the job is created, changes status or is deleted (see
+:func:`invalidate_ranking`). Ratings and the time left change on their own,
+so entries also expire after ``OFFER_RANKING_CACHE_TIMEOUT`` seconds.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, DecimalField, F, FloatField, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Least
+from django.db.models.lookups import LessThanOrEqual
+from django.utils import timezone
+
+from .models import Offer
+
+WEIGHTS = {'price': 0.4, 'delivery': 0.25, 'rating': 0.25, 'experience': 0.1}
+EXPERIENCE_HALF = 10
+COMPONENTS = tuple(WEIGHTS)
+
+
+def _version_key(job_id):
+    return f'offers:ranking:version:{job_id}'
+
+
+def _get_version(job_id):
+    key = _version_key(job_id)
+    version = cache.get(key)
+    if version is None:
+        # A fresh token, so a version evicted from the cache never matches old pages
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_ranking(job_id):
+    """Drop the cached ranking pages of ``job_id``; call once the change is committed"""
+    cache.set(_version_key(job_id), uuid.uuid4().hex, None)
+
+
+def _float(expression):
+    return Cast(expression, FloatField())
+
+
+def _clamp(expression):
+    return Greatest(Least(expression, Value(1.0)), Value(0.0))
+
+
+def score_components(job, now=None):
+    """Annotation expressions of each component for the offers of ``job``"""
+    now = now or timezone.now()
+    total = Case(
+        When(payment_type=Offer.HOURLY, estimated_hours__isnull=False, then=F('amount') * F('estimated_hours')),
+        default=F('amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    budget_min, budget_max = float(job.budget_min), float(job.budget_max)
+    if budget_max > budget_min:
+        price = _clamp((Value(budget_max) - _float(total)) / Value(budget_max - budget_min))
+    else:
+        price = Case(When(LessThanOrEqual(_float(total), Value(budget_max)), then=Value(1.0)),
+                     default=Value(0.0), output_field=FloatField())
+
+    days_left = (job.deadline - now).total_seconds() / 86400
+    if days_left > 0:
+        delivery = Case(
+            When(delivery_time__lte=days_left,
+                 then=Value(1.0) - Value(0.5 / days_left) * _float(F('delivery_time'))),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    else:
+        delivery = Value(0.0, output_field=FloatField())
+
+    # Freelancers without a profile count as unrated and new
+    completed = Coalesce(_float(F('freelancer__freelancer_profile__total_jobs_completed')), Value(0.0))
+    return {
+        'price': price,
+        'delivery': delivery,
+        'rating': Coalesce(_float(F('freelancer__freelancer_profile__rating')), Value(0.0)) / Value(5.0),
+        'experience': completed / (completed + Value(float(EXPERIENCE_HALF))),
+    }
+
+
+def ranked_offers(job, now=None):
+    """Offers on ``job`` that weren't withdrawn, best first, annotated with ``score`` and ``score_<component>``"""
+    components = score_components(job, now)
+    annotations = {f'score_{name}': expression for name, expression in components.items()}
+    score = sum(
+        (Value(weight) * F(f'score_{name}') for name, weight in WEIGHTS.items()),
+        Value(0.0),
+    )
+    return (
+        Offer.objects.filter(job=job).exclude(status=Offer.WITHDRAWN)
+        .annotate(
+            **annotations,
+            freelancer_name=F('freelancer__name'),
+            freelancer_rating=F('freelancer__freelancer_profile__rating'),
+            freelancer_jobs_completed=F('freelancer__freelancer_profile__total_jobs_completed'),
+        )
+        .annotate(score=score)
+        .order_by('-score', 'created_at', 'id')
+    )
+
+
+def cached_page(job, page, page_size, build):
+    """The ``build()`` result of one ranking page of ``job``, from the cache when possible"""
+    timeout = getattr(settings, 'OFFER_RANKING_CACHE_TIMEOUT', 300)
+    if not timeout:
+        return build()
+    key = f'offers:ranking:{job.pk}:{_get_version(job.pk)}:{page}:{page_size}'
+    result = cache.get(key)
+    if result is None:
+        result = build()
+        cache.set(key, result, timeout)
+    return result
@@ -1,13 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from common.serializers import TimedModelSerializer
+from common.projections import ProjectedModelSerializer
 from .models import Offer
+from .ranking import COMPONENTS
 from users.serializers import UserProfileSerializer
 from jobs.serializers import JobListSerializer
 
 User = get_user_model()
 
 
-class OfferSerializer(serializers.ModelSerializer):
+class OfferSerializer(ProjectedModelSerializer):
     """Serializer for offers"""
     
     freelancer = UserProfileSerializer(read_only=True)
@@ -17,9 +20,19 @@ class OfferSerializer(serializers.ModelSerializer):
         model = Offer
         fields = '__all__'
         read_only_fields = ('id', 'freelancer', 'created_at', 'updated_at')
+        projections = {
+            'summary': {
+                'fields': ['id', 'title', 'amount', 'payment_type', 'delivery_time',
+                           'status', 'job', 'freelancer', 'created_at'],
+            },
+            'detail': {
+                'fields': '__all__',
+                'expand': ['job', 'freelancer'],
+            },
+        }
 
 
-class CreateOfferSerializer(serializers.ModelSerializer):
+class CreateOfferSerializer(TimedModelSerializer):
     """Serializer for creating offers"""
     
     job_id = serializers.UUIDField(write_only=True, required=False)
@@ -62,7 +75,7 @@ class CreateOfferSerializer(serializers.ModelSerializer):
         return value
 
 
-class UpdateOfferStatusSerializer(serializers.ModelSerializer):
+class UpdateOfferStatusSerializer(TimedModelSerializer):
     """Serializer for updating offer status"""
     
     class Meta:
@@ -73,3 +86,26 @@ class UpdateOfferStatusSerializer(serializers.ModelSerializer):
         if value not in dict(Offer.STATUS_CHOICES):
             raise serializers.ValidationError("Invalid status.")
         return value
+
+
+class RankedOfferSerializer(TimedModelSerializer):
+    """Offer with its ranking score, from ``offers.ranking.ranked_offers``"""
+    
+    freelancer_name = serializers.CharField(read_only=True)
+    freelancer_rating = serializers.DecimalField(max_digits=3, decimal_places=2, read_only=True)
+    freelancer_jobs_completed = serializers.IntegerField(read_only=True)
+    score = serializers.SerializerMethodField()
+    scores = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Offer
+        fields = ('id', 'title', 'amount', 'payment_type', 'estimated_hours', 'delivery_time', 'status',
+                  'created_at', 'freelancer', 'freelancer_name', 'freelancer_rating',
+                  'freelancer_jobs_completed', 'score', 'scores')
+        read_only_fields = fields
+    
+    def get_score(self, obj):
+        return round(obj.score, 4)
+    
+    def get_scores(self, obj):
+        return {name: round(getattr(obj, f'score_{name}'), 4) for name in COMPONENTS}
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .counts import offer_added, offer_removed
+from .models import Offer
+from .ranking import invalidate_ranking
+
+
+@receiver(post_save, sender=Offer)
+def count_created_offer(sender, instance, created, **kwargs):
+    """Add a new offer to its job's offers_count"""
+    if created and instance.status != Offer.WITHDRAWN:
+        offer_added(instance.job_id)
+
+
+@receiver(post_delete, sender=Offer)
+def uncount_deleted_offer(sender, instance, **kwargs):
+    """Withdrawn offers were taken off the count already"""
+    if instance.status != Offer.WITHDRAWN:
+        offer_removed(instance.job_id)
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def invalidate_job_ranking(sender, instance, **kwargs):
+    """Drop the job's cached offer ranking once the change is committed"""
+    transaction.on_commit(lambda: invalidate_ranking(instance.job_id))
@@ -0,0 +1,72 @@
+"""
+Background tasks for the offers app.
+"""
+
+import logging
+
+from chat import events as chat_events
+from common.tasks import task
+from jobs.search import get_search_backend
+from jobs.tasks import update_job_feeds
+from notifications.coalescing import notify
+from notifications.events import notifications_created
+from notifications.models import Notification
+
+from .models import Offer
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def offer_accepted(offer_id, order_id, rejected_ids):
+    """Follow-up of an acceptance (see ``offers.acceptance``): notify the freelancers and update the chats"""
+    offers = {
+        str(offer.pk): offer
+        for offer in Offer.objects.filter(id__in=[offer_id, *rejected_ids]).select_related('job', 'freelancer', 'chat')
+    }
+    accepted = offers.pop(offer_id, None)
+    if accepted is None:
+        return
+    job = accepted.job
+
+    try:
+        get_search_backend().remove(job)
+    except Exception:
+        logger.exception("Error removing job %s from search index", job.id)
+    # The job was closed with update(), which sends no post_save
+    update_job_feeds.delay(str(job.id), job.skills_required)
+
+    notify(
+        accepted.freelancer,
+        Notification.OFFER_ACCEPTED,
+        f"Offer Accepted: {job.title}",
+        f"Your offer for '{job.title}' was accepted. Your order is now active.",
+        priority=Notification.HIGH,
+        job_id=job.id,
+        order_id=order_id,
+        offer_id=accepted.id,
+        chat_id=accepted.chat_id,
+        data={'job_id': str(job.id), 'job_title': job.title, 'order_id': order_id, 'amount': str(accepted.amount)},
+    )
+    chat_events.offer_updated(accepted.chat, accepted)
+
+    # Only the freelancers whose offer this acceptance rejected
+    rejected = [offer for offer in offers.values() if offer.status == Offer.REJECTED]
+    # One insert however many offers the job had; bulk_create skips post_save,
+    # so publish to open streams here
+    notifications_created(Notification.objects.bulk_create([
+        Notification(
+            user_id=offer.freelancer_id,
+            notification_type=Notification.OFFER_REJECTED,
+            title=f"Offer Not Selected: {job.title}"[:200],
+            message=f"The client chose another offer for '{job.title}'.",
+            priority=Notification.MEDIUM,
+            job_id=job.id,
+            offer_id=offer.id,
+            chat_id=offer.chat_id,
+            data={'job_id': str(job.id), 'job_title': job.title},
+        )
+        for offer in rejected
+    ]))
+    for offer in rejected:
+        chat_events.offer_updated(offer.chat, offer)
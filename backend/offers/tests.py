@@ -1,3 +1,222 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from jobs.models import Job
+from orders.models import Order
+from users.models import User
+from . import acceptance
+from .counts import reconcile_offer_counts
+from .models import Offer
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class OfferTestCase(TestCase):
+
+    def setUp(self):
+        self.client_user = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        self.freelancer = User.objects.create_user('freelancer@example.com', 'pass', name='F', role=User.FREELANCER)
+        self.job = Job.objects.create(
+            client=self.client_user, title='Essay', description='Write', assignment_type=Job.ACADEMIC_WRITING,
+            subject='History', deadline=timezone.now() + timedelta(days=3),
+            budget_min=10, budget_max=50, status=Job.OPEN,
+        )
+
+    def api(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def make_offer(self, freelancer, amount='40.00'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api(freelancer).post('/api/offers/create/', {
+                'job_id': str(self.job.id), 'description': 'I can do it', 'delivery_time': 3, 'amount': amount,
+            })
+
+    def withdraw(self, offer_id, freelancer=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api(freelancer or self.freelancer).post(f'/api/offers/{offer_id}/withdraw/')
+
+    def accept(self, offer_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api(self.client_user).post(f'/api/offers/{offer_id}/accept/')
+
+    def offers_count(self):
+        self.job.refresh_from_db()
+        return self.job.offers_count
+
+
+class CreateOfferTests(OfferTestCase):
+
+    def test_one_offer_per_freelancer(self):
+        self.assertEqual(self.make_offer(self.freelancer).status_code, 201)
+        self.assertEqual(self.make_offer(self.freelancer).status_code, 400)
+
+    def test_offer_again_after_withdrawing(self):
+        self.make_offer(self.freelancer)
+        offer = Offer.objects.get(job=self.job, freelancer=self.freelancer)
+        self.assertEqual(self.withdraw(offer.id).status_code, 200)
+
+        self.assertEqual(self.make_offer(self.freelancer).status_code, 201)
+        self.assertEqual(
+            sorted(Offer.objects.filter(job=self.job).values_list('status', flat=True)),
+            [Offer.PENDING, Offer.WITHDRAWN],
+        )
+
+
+class AcceptOfferTests(OfferTestCase):
+    """A job ends up with exactly one accepted offer and one order
+
+    Races are replayed deterministically: the competing request runs after
+    accept_offer() has passed its early checks and before its transaction,
+    as if it committed in between.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user('other@example.com', 'pass', name='O', role=User.FREELANCER)
+        self.make_offer(self.freelancer)
+        self.make_offer(self.other)
+        self.offer = Offer.objects.get(freelancer=self.freelancer)
+        self.other_offer = Offer.objects.get(freelancer=self.other)
+
+    def accept_racing(self, offer_id, competitor):
+        real_now = timezone.now
+        raced = {}
+
+        def now():
+            # Only the first call races; the competitor may call this too
+            if not raced:
+                raced['started'] = True
+                raced['response'] = competitor()
+            return real_now()
+
+        with mock.patch.object(acceptance, 'timezone', wraps=timezone) as clock:
+            clock.now.side_effect = now
+            response = self.accept(offer_id)
+        return response, raced['response']
+
+    def assertStatuses(self, **expected):
+        statuses = dict(Offer.objects.values_list('freelancer__email', 'status'))
+        self.assertEqual(statuses, {f'{name}@example.com': status for name, status in expected.items()})
+
+    def test_accepting_closes_the_job(self):
+        self.assertEqual(self.accept(self.offer.id).status_code, 200)
+        self.assertEqual(self.accept(self.other_offer.id).status_code, 400)
+
+        self.assertStatuses(freelancer=Offer.ACCEPTED, other=Offer.REJECTED)
+        self.assertEqual(Order.objects.filter(job=self.job).count(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.CLOSED)
+
+    def test_concurrent_acceptances_make_one_order(self):
+        response, raced = self.accept_racing(self.offer.id, lambda: self.accept(self.other_offer.id))
+        self.assertEqual(raced.status_code, 200)
+        self.assertEqual(response.status_code, 400)
+
+        self.assertStatuses(freelancer=Offer.REJECTED, other=Offer.ACCEPTED)
+        self.assertEqual(list(Order.objects.filter(job=self.job).values_list('offer_id', flat=True)),
+                         [self.other_offer.id])
+
+    def test_withdraw_committed_first_wins_over_accept(self):
+        response, raced = self.accept_racing(self.offer.id, lambda: self.withdraw(self.offer.id))
+        self.assertEqual(raced.status_code, 200)
+        self.assertEqual(response.status_code, 400)
+
+        self.assertStatuses(freelancer=Offer.WITHDRAWN, other=Offer.PENDING)
+        self.assertFalse(Order.objects.filter(job=self.job).exists())
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, Job.OPEN)
+        self.assertEqual(self.job.offers_count, 1)
+
+    def test_accept_committed_first_wins_over_withdraw(self):
+        self.assertEqual(self.accept(self.offer.id).status_code, 200)
+        self.assertEqual(self.withdraw(self.offer.id).status_code, 400)
+
+        self.assertStatuses(freelancer=Offer.ACCEPTED, other=Offer.REJECTED)
+        self.assertEqual(Order.objects.filter(job=self.job).count(), 1)
+        self.assertEqual(self.offers_count(), 2)
+
+
+class OffersCountTests(OfferTestCase):
+    """Job.offers_count counts the offers of a job less the withdrawn ones"""
+
+    def test_count_follows_create_withdraw_and_delete(self):
+        other = User.objects.create_user('other@example.com', 'pass', name='O', role=User.FREELANCER)
+        self.make_offer(self.freelancer)
+        self.make_offer(other)
+        self.assertEqual(self.offers_count(), 2)
+
+        offer = Offer.objects.get(freelancer=self.freelancer)
+        self.withdraw(offer.id)
+        self.assertEqual(self.offers_count(), 1)
+        # Already taken off when withdrawn
+        offer.refresh_from_db()
+        offer.delete()
+        self.assertEqual(self.offers_count(), 1)
+
+        Offer.objects.get(freelancer=other).delete()
+        self.assertEqual(self.offers_count(), 0)
+
+        self.make_offer(self.freelancer)
+        self.assertEqual(self.offers_count(), 1)
+        self.assertEqual(list(reconcile_offer_counts(dry_run=True)), [])
+
+    def test_reconcile_corrects_drift(self):
+        self.make_offer(self.freelancer)
+        Job.objects.filter(pk=self.job.pk).update(offers_count=5)
+
+        self.assertEqual(reconcile_offer_counts(), [(self.job.id, 5, 1)])
+        self.assertEqual(self.offers_count(), 1)
+
+
+class RankedOffersTests(OfferTestCase):
+    """Ranking of a job's offers for its owner"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.offers = {}
+        for name, amount in (('mid', '30.00'), ('cheap', '10.00'), ('pricey', '50.00')):
+            freelancer = User.objects.create_user(f'{name}@example.com', 'pass', name=name, role=User.FREELANCER)
+            self.make_offer(freelancer, amount)
+            self.offers[name] = Offer.objects.get(job=self.job, freelancer=freelancer)
+
+    def ranked(self):
+        response = self.api(self.client_user).get(f'/api/offers/job/{self.job.id}/ranked/')
+        self.assertEqual(response.status_code, 200)
+        return [result['freelancer_name'] for result in response.json()['results']]
+
+    def test_cheaper_offers_rank_first_when_all_else_is_equal(self):
+        response = self.api(self.client_user).get(f'/api/offers/job/{self.job.id}/ranked/')
+        results = response.json()['results']
+        self.assertEqual([result['freelancer_name'] for result in results], ['cheap', 'mid', 'pricey'])
+        self.assertEqual([result['scores']['price'] for result in results], [1.0, 0.5, 0.0])
+        self.assertEqual(results[0]['score'], round(0.4 + 0.25 * results[0]['scores']['delivery'], 4))
+
+    def test_only_the_job_owner_sees_the_ranking(self):
+        response = self.api(self.freelancer).get(f'/api/offers/job/{self.job.id}/ranked/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_ranking_is_cached_until_an_offer_changes(self):
+        self.assertEqual(self.ranked(), ['cheap', 'mid', 'pricey'])
+
+        # Writes that skip the signals are not seen until the page expires
+        Offer.objects.filter(id=self.offers['pricey'].id).update(amount='20.00')
+        self.assertEqual(self.ranked(), ['cheap', 'mid', 'pricey'])
+
+        offer = self.offers['mid']
+        offer.amount = '45.00'
+        with self.captureOnCommitCallbacks(execute=True):
+            offer.save()
+        self.assertEqual(self.ranked(), ['cheap', 'pricey', 'mid'])
+
+    def test_withdrawn_offers_leave_the_ranking(self):
+        self.ranked()
+        freelancer = self.offers['cheap'].freelancer
+        self.assertEqual(self.withdraw(self.offers['cheap'].id, freelancer).status_code, 200)
+        self.assertEqual(self.ranked(), ['mid', 'pricey'])
@@ -9,5 +9,7 @@ urlpatterns = [
     path('create/', views.CreateOfferView.as_view(), name='create'),
     path('<uuid:offer_id>/accept/', views.accept_offer, name='accept'),
     path('<uuid:offer_id>/reject/', views.reject_offer, name='reject'),
+    path('<uuid:offer_id>/withdraw/', views.withdraw_offer, name='withdraw'),
     path('job/<uuid:job_id>/', views.job_offers, name='job-offers'),
+    path('job/<uuid:job_id>/ranked/', views.ranked_job_offers, name='job-offers-ranked'),
 ]
@@ -1,39 +1,60 @@
 from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.utils import timezone
+from common.pagination import KeysetPagination
+from common.queries import query_budget
+from common.projections import ProjectionMixin, projection_from_request, plan_queryset, resolve_projection
+from notifications.coalescing import notify
+from notifications.models import Notification
+from chat import events as chat_events
+from . import acceptance, ranking
+from .counts import offer_removed
 from .models import Offer
-from .serializers import OfferSerializer, CreateOfferSerializer, UpdateOfferStatusSerializer
+from .serializers import OfferSerializer, CreateOfferSerializer, UpdateOfferStatusSerializer, RankedOfferSerializer
 from jobs.models import Job
 
 User = get_user_model()
 
+# Fields of the accept_offer and withdraw_offer responses
+OFFER_STATUS_FIELDS = ['id', 'status', 'job', 'freelancer', 'chat', 'amount', 'updated_at']
+CREATED_ORDER_FIELDS = ['id', 'status', 'title', 'amount', 'delivery_date', 'due_date',
+                        'job', 'offer', 'client', 'freelancer', 'created_at']
+RANKED_OFFERS_MAX_PAGE_SIZE = 100
 
-class OfferListView(generics.ListAPIView):
+
+class OfferListView(ProjectionMixin, generics.ListAPIView):
     """List offers (filtered by user role)"""
     
     serializer_class = OfferSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 4
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
         if user.role == User.FREELANCER:
             # Freelancers see their own offers
-            return Offer.objects.filter(freelancer=user).select_related('job', 'freelancer')
+            return Offer.objects.filter(freelancer=user)
         elif user.role == User.CLIENT:
             # Clients see offers for their jobs
-            return Offer.objects.filter(job__client=user).select_related('job', 'freelancer')
+            return Offer.objects.filter(job__client=user)
         else:
             # Admin sees all offers
-            return Offer.objects.all().select_related('job', 'freelancer')
+            return Offer.objects.all()
 
 
-class OfferDetailView(generics.RetrieveAPIView):
+class OfferDetailView(ProjectionMixin, generics.RetrieveAPIView):
     """Get offer details"""
     
     serializer_class = OfferSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 6
     
     def get_queryset(self):
         user = self.request.user
@@ -87,15 +108,37 @@ class CreateOfferView(generics.CreateAPIView):
                 is_active=True
             )
         
-        # Check if freelancer already made an offer for this job
-        if Offer.objects.filter(job=job, freelancer=self.request.user).exists():
+        # Check if freelancer already made an offer for this job; after
+        # withdrawing one they may make another
+        if Offer.objects.filter(job=job, freelancer=self.request.user).exclude(status=Offer.WITHDRAWN).exists():
             from rest_framework import serializers as drf_serializers
             raise drf_serializers.ValidationError("You have already made an offer for this job.")
         
-        serializer.save(
-            freelancer=self.request.user,
-            job=job,
-            chat=chat
+        # Saved with the offers_count increment (see offers/counts.py)
+        with transaction.atomic():
+            offer = serializer.save(
+                freelancer=self.request.user,
+                job=job,
+                chat=chat
+            )
+        
+        # Coalesced per job, so a popular job doesn't flood the client
+        notify(
+            job.client,
+            Notification.NEW_OFFER,
+            f"New Offer: {job.title}",
+            f"{self.request.user.name} offered to do '{job.title}' for ${offer.amount} "
+            f"in {offer.delivery_time} days.",
+            summary=lambda count: f"{count} New Offers: {job.title}",
+            job_id=job.id,
+            offer_id=offer.id,
+            chat_id=chat.id,
+            data={
+                'job_id': str(job.id),
+                'job_title': job.title,
+                'freelancer_name': self.request.user.name,
+                'amount': str(offer.amount),
+            }
         )
 
 
@@ -103,8 +146,29 @@ class CreateOfferView(generics.CreateAPIView):
 @permission_classes([permissions.IsAuthenticated])
 def accept_offer(request, offer_id):
     """Accept an offer (client only) and create an order"""
-    from django.utils import timezone
-    from orders.models import Order
+    from orders.serializers import OrderSerializer
+    
+    try:
+        offer, order = acceptance.accept_offer(offer_id, request.user)
+    except acceptance.OfferNotAccepted as e:
+        return Response({'error': str(e)}, status=e.status_code)
+    
+    # Flat fields only: the client moves on to the order page, which loads the rest
+    return Response({
+        'message': 'Offer accepted successfully and order created',
+        'offer': OfferSerializer(
+            offer, projection=resolve_projection(OfferSerializer, fields=OFFER_STATUS_FIELDS)
+        ).data,
+        'order': OrderSerializer(
+            order, projection=resolve_projection(OrderSerializer, fields=CREATED_ORDER_FIELDS)
+        ).data,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def reject_offer(request, offer_id):
+    """Reject an offer (client only)"""
     
     try:
         offer = Offer.objects.get(id=offer_id)
@@ -117,7 +181,7 @@ def accept_offer(request, offer_id):
     # Check if user is the job owner
     if request.user != offer.job.client:
         return Response(
-            {'error': 'Only job owner can accept offers'}, 
+            {'error': 'Only job owner can reject offers'}, 
             status=status.HTTP_403_FORBIDDEN
         )
     
@@ -128,83 +192,63 @@ def accept_offer(request, offer_id):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Accept the offer
-    offer.status = Offer.ACCEPTED
+    # Reject the offer
+    offer.status = Offer.REJECTED
     offer.save()
     
-    # Close the job and reject other offers
-    job = offer.job
-    job.status = Job.CLOSED
-    job.save()
-    
-    # Reject all other pending offers for this job
-    Offer.objects.filter(
-        job=job,
-        status=Offer.PENDING
-    ).exclude(id=offer.id).update(status=Offer.REJECTED)
-    
-    # Auto-create order from accepted offer
-    delivery_date = timezone.now() + timezone.timedelta(days=offer.delivery_time)
-    order = Order.objects.create(
-        job=offer.job,
-        client=offer.job.client,
-        freelancer=offer.freelancer,
-        offer=offer,
-        status=Order.ACTIVE,
-        title=offer.title or f"Order for {offer.job.title}",
-        description=offer.description,
-        delivery_time=offer.delivery_time,
-        amount=offer.amount,
-        delivery_date=delivery_date,
-        due_date=delivery_date,
-    )
-    
-    from orders.serializers import OrderSerializer
-    
     return Response({
-        'message': 'Offer accepted successfully and order created',
-        'offer': OfferSerializer(offer, context={'request': request}).data,
-        'order': OrderSerializer(order, context={'request': request}).data
+        'message': 'Offer rejected successfully',
+        'offer': OfferSerializer(offer, context={'request': request}).data
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
-def reject_offer(request, offer_id):
-    """Reject an offer (client only)"""
+def withdraw_offer(request, offer_id):
+    """Withdraw a pending offer (freelancer only)"""
     
     try:
-        offer = Offer.objects.get(id=offer_id)
+        offer = Offer.objects.select_related('chat').get(id=offer_id)
     except Offer.DoesNotExist:
         return Response(
             {'error': 'Offer not found'}, 
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Check if user is the job owner
-    if request.user != offer.job.client:
+    # Check if user made the offer
+    if offer.freelancer_id != request.user.pk:
         return Response(
-            {'error': 'Only job owner can reject offers'}, 
+            {'error': 'Only the freelancer who made the offer can withdraw it'}, 
             status=status.HTTP_403_FORBIDDEN
         )
     
-    # Check if offer is still pending
-    if offer.status != Offer.PENDING:
+    # Conditional so an offer accepted meanwhile is never withdrawn
+    now = timezone.now()
+    with transaction.atomic():
+        withdrawn = Offer.objects.filter(pk=offer.pk, status=Offer.PENDING).update(
+            status=Offer.WITHDRAWN, updated_at=now
+        )
+        if withdrawn:
+            offer_removed(offer.job_id)
+            transaction.on_commit(lambda: ranking.invalidate_ranking(offer.job_id))
+    if not withdrawn:
         return Response(
             {'error': 'Offer is no longer pending'}, 
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Reject the offer
-    offer.status = Offer.REJECTED
-    offer.save()
+    offer.status, offer.updated_at = Offer.WITHDRAWN, now
+    chat_events.offer_updated(offer.chat, offer)
     
     return Response({
-        'message': 'Offer rejected successfully',
-        'offer': OfferSerializer(offer, context={'request': request}).data
+        'message': 'Offer withdrawn successfully',
+        'offer': OfferSerializer(
+            offer, projection=resolve_projection(OfferSerializer, fields=OFFER_STATUS_FIELDS)
+        ).data,
     }, status=status.HTTP_200_OK)
 
 
+@query_budget(6)
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def job_offers(request, job_id):
@@ -225,10 +269,71 @@ def job_offers(request, job_id):
             status=status.HTTP_403_FORBIDDEN
         )
     
-    offers = Offer.objects.filter(job=job).select_related('freelancer')
-    serializer = OfferSerializer(offers, many=True, context={'request': request})
+    projection = projection_from_request(OfferSerializer, request)
+    offers = Offer.objects.filter(job=job)
+    offers = plan_queryset(OfferSerializer(projection=projection), Offer).apply(offers)
+    serializer = OfferSerializer(offers, many=True, context={'request': request}, projection=projection)
     
     return Response({
         'job_title': job.title,
         'offers': serializer.data
     }, status=status.HTTP_200_OK)
+
+
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def ranked_job_offers(request, job_id):
+    """Offers on a job ranked by price, delivery time and the freelancer's record (job owner only)"""
+    
+    try:
+        job = Job.objects.get(id=job_id)
+    except Job.DoesNotExist:
+        return Response(
+            {'error': 'Job not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    # Check if user is the job owner
+    if job.client_id != request.user.pk:
+        return Response(
+            {'error': 'Only job owner can view offers'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        page = int(request.query_params.get('page', 1))
+        page_size = min(int(request.query_params.get('page_size', api_settings.PAGE_SIZE)),
+                        RANKED_OFFERS_MAX_PAGE_SIZE)
+    except ValueError:
+        page = page_size = 0
+    if page < 1 or page_size < 1:
+        return Response(
+            {'error': 'page and page_size must be positive integers'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    def build():
+        # One row past the page tells whether there is a next one, without a COUNT
+        start = (page - 1) * page_size
+        offers = list(ranking.ranked_offers(job)[start:start + page_size + 1])
+        return {
+            'results': list(RankedOfferSerializer(offers[:page_size], many=True).data),
+            'has_next': len(offers) > page_size,
+        }
+    
+    result = ranking.cached_page(job, page, page_size, build)
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = replace_query_param(url, 'page', page - 1) if page > 2 else remove_query_param(url, 'page')
+    
+    return Response({
+        'job_title': job.title,
+        # Maintained on the job (offers/counts.py): offers that weren't withdrawn
+        'count': job.offers_count,
+        'next': replace_query_param(url, 'page', page + 1) if result['has_next'] else None,
+        'previous': previous,
+        'weights': ranking.WEIGHTS,
+        'results': result['results'],
+    }, status=status.HTTP_200_OK)
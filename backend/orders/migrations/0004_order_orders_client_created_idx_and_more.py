@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-17 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_job_jobs_status_created_idx'),
+        ('offers', '0003_offer_offers_freelancer_created_idx_and_more'),
+        ('orders', '0003_order_client_feedback_order_client_rating_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['client', '-created_at', '-id'], name='orders_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['freelancer', '-created_at', '-id'], name='orders_freelancer_created_idx'),
+        ),
+    ]
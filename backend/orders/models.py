@@ -57,6 +57,10 @@ class Order(BaseModel):
     class Meta:
         db_table = 'orders'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['client', '-created_at', '-id'], name='orders_client_created_idx'),
+            models.Index(fields=['freelancer', '-created_at', '-id'], name='orders_freelancer_created_idx'),
+        ]
         
     def __str__(self):
         return f"Order: {self.title} - {self.freelancer.name}"
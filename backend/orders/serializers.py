@@ -1,12 +1,14 @@
 from rest_framework import serializers
 from django.utils import timezone
+from common.serializers import TimedModelSerializer, TimedSerializer
+from common.projections import ProjectedModelSerializer
 from .models import Order, OrderSubmission, OrderRevision
 from jobs.serializers import JobListSerializer
 from users.serializers import UserProfileSerializer
 from offers.serializers import OfferSerializer
 
 
-class OrderSubmissionSerializer(serializers.ModelSerializer):
+class OrderSubmissionSerializer(TimedModelSerializer):
     """Serializer for order submissions"""
     
     class Meta:
@@ -15,7 +17,7 @@ class OrderSubmissionSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class OrderRevisionSerializer(serializers.ModelSerializer):
+class OrderRevisionSerializer(TimedModelSerializer):
     """Serializer for order revisions"""
     
     class Meta:
@@ -24,7 +26,7 @@ class OrderRevisionSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(ProjectedModelSerializer):
     """Serializer for order listing and details"""
     
     job = JobListSerializer(read_only=True)
@@ -39,9 +41,19 @@ class OrderSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at', 'client', 
                           'freelancer', 'job', 'offer')
+        projections = {
+            'summary': {
+                'fields': ['id', 'title', 'status', 'amount', 'delivery_date', 'due_date',
+                           'job', 'client', 'freelancer', 'offer', 'created_at'],
+            },
+            'detail': {
+                'fields': '__all__',
+                'expand': ['job', 'client', 'freelancer', 'submissions', 'revisions'],
+            },
+        }
 
 
-class CreateOrderSerializer(serializers.ModelSerializer):
+class CreateOrderSerializer(TimedModelSerializer):
     """Serializer for creating orders"""
     
     class Meta:
@@ -78,7 +90,7 @@ class CreateOrderSerializer(serializers.ModelSerializer):
         return order
 
 
-class SubmitWorkSerializer(serializers.ModelSerializer):
+class SubmitWorkSerializer(TimedModelSerializer):
     """Serializer for work submission"""
     
     class Meta:
@@ -86,7 +98,7 @@ class SubmitWorkSerializer(serializers.ModelSerializer):
         fields = ['submission_text', 'attachment', 'notes']
 
 
-class RequestRevisionSerializer(serializers.Serializer):
+class RequestRevisionSerializer(TimedSerializer):
     """Serializer for requesting revisions"""
     
     revision_notes = serializers.CharField()
@@ -97,7 +109,7 @@ class RequestRevisionSerializer(serializers.Serializer):
         return value
 
 
-class ApproveOrderSerializer(serializers.Serializer):
+class ApproveOrderSerializer(TimedSerializer):
     """Serializer for order approval"""
     
     feedback = serializers.CharField(required=False, allow_blank=True)
@@ -1,6 +1,7 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import OrderSubmission
+from notifications.coalescing import notify
 from notifications.models import Notification
 
 
@@ -16,11 +17,11 @@ def notify_client_on_work_submission(sender, instance, created, **kwargs):
         freelancer = instance.freelancer
         
         # Notify the client about work submission
-        Notification.objects.create(
-            user=client,
-            notification_type=Notification.WORK_SUBMITTED,
-            title=f"Work Submitted: {order.job.title if order.job else 'Order'}",
-            message=f"{freelancer.name} has submitted work for your order. Please review it.",
+        notify(
+            client,
+            Notification.WORK_SUBMITTED,
+            f"Work Submitted: {order.job.title if order.job else 'Order'}",
+            f"{freelancer.name} has submitted work for your order. Please review it.",
             priority=Notification.HIGH,
             order_id=order.id,
             data={
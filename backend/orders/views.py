@@ -10,12 +10,16 @@ from .serializers import (
     RequestRevisionSerializer, ApproveOrderSerializer
 )
 from offers.models import Offer
+from common.pagination import KeysetPagination
+from common.projections import ProjectionMixin
 
 
-class OrderListView(generics.ListAPIView):
+class OrderListView(ProjectionMixin, generics.ListAPIView):
     """List orders for the authenticated user"""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 6
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -26,10 +30,11 @@ class OrderListView(generics.ListAPIView):
         return Order.objects.none()
 
 
-class OrderDetailView(generics.RetrieveAPIView):
+class OrderDetailView(ProjectionMixin, generics.RetrieveAPIView):
     """Get order details"""
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 6
     
     def get_queryset(self):
         user = self.request.user
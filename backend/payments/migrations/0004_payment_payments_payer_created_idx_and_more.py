@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-17 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_orders_client_created_idx_and_more'),
+        ('payments', '0003_rename_freelancer_payment_payee_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payer', '-created_at', '-id'], name='payments_payer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payee', '-created_at', '-id'], name='payments_payee_created_idx'),
+        ),
+    ]
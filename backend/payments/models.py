@@ -81,6 +81,10 @@ class Payment(BaseModel):
     class Meta:
         db_table = 'payments'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['payer', '-created_at', '-id'], name='payments_payer_created_idx'),
+            models.Index(fields=['payee', '-created_at', '-id'], name='payments_payee_created_idx'),
+        ]
         
     def __str__(self):
         return f"Payment #{self.id}: ${self.amount} - {self.status}"
@@ -1,11 +1,13 @@
 from rest_framework import serializers
 from django.utils import timezone
+from common.serializers import TimedModelSerializer, TimedSerializer
+from common.projections import ProjectedModelSerializer
 from .models import Payment, PaymentMethod, Transaction
 from orders.serializers import OrderSerializer
 from users.serializers import UserProfileSerializer
 
 
-class PaymentMethodSerializer(serializers.ModelSerializer):
+class PaymentMethodSerializer(TimedModelSerializer):
     """Serializer for payment methods"""
     
     class Meta:
@@ -18,7 +20,7 @@ class PaymentMethodSerializer(serializers.ModelSerializer):
         }
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(TimedModelSerializer):
     """Serializer for transactions"""
     
     class Meta:
@@ -27,7 +29,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at', 'updated_at', 'transaction_id')
 
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(ProjectedModelSerializer):
     """Serializer for payment listing and details"""
     
     order = OrderSerializer(read_only=True)
@@ -40,9 +42,19 @@ class PaymentSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at', 'payer', 'payee', 
                           'transaction_id', 'payment_date')
+        projections = {
+            'summary': {
+                'fields': ['id', 'amount', 'currency', 'payment_type', 'status',
+                           'order', 'payer', 'payee', 'payment_date', 'created_at'],
+            },
+            'detail': {
+                'fields': '__all__',
+                'expand': ['order', 'payer', 'payee', 'transactions'],
+            },
+        }
 
 
-class CreatePaymentSerializer(serializers.ModelSerializer):
+class CreatePaymentSerializer(TimedModelSerializer):
     """Serializer for creating payments"""
     
     payment_method_id = serializers.UUIDField()
@@ -100,14 +112,14 @@ class CreatePaymentSerializer(serializers.ModelSerializer):
         return payment
 
 
-class ProcessPaymentSerializer(serializers.Serializer):
+class ProcessPaymentSerializer(TimedSerializer):
     """Serializer for processing payments"""
     
     action = serializers.ChoiceField(choices=['release', 'refund'])
     notes = serializers.CharField(required=False, allow_blank=True)
 
 
-class AddPaymentMethodSerializer(serializers.ModelSerializer):
+class AddPaymentMethodSerializer(TimedModelSerializer):
     """Serializer for adding payment methods"""
     
     class Meta:
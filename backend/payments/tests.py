@@ -1,3 +1,103 @@
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from chat.models import Chat
+from jobs.models import Job
+from offers.models import Offer
+from orders.models import Order
+from users.models import User
+from .models import Payment, Transaction
+
+
+class PaymentHistoryTests(TestCase):
+    """Keyset-paginated, projected payment history"""
+
+    def setUp(self):
+        self.client_user = User.objects.create_user('client@example.com', 'pass', name='Client', role=User.CLIENT)
+        self.freelancer = User.objects.create_user('freelancer@example.com', 'pass', name='F', role=User.FREELANCER)
+        self.other = User.objects.create_user('other@example.com', 'pass', name='O', role=User.CLIENT)
+        job = Job.objects.create(
+            client=self.client_user, title='Essay', description='Write', assignment_type=Job.ACADEMIC_WRITING,
+            subject='History', deadline=timezone.now() + timedelta(days=3),
+            budget_min=10, budget_max=50, status=Job.OPEN,
+        )
+        chat = Chat.objects.create(job=job, client=self.client_user, freelancer=self.freelancer)
+        offer = Offer.objects.create(
+            job=job, freelancer=self.freelancer, chat=chat, title='Offer', description='I can do it',
+            delivery_time=3, payment_type=Offer.FIXED, amount=40,
+        )
+        self.order = Order.objects.create(
+            job=job, client=self.client_user, freelancer=self.freelancer, offer=offer,
+            title='Essay', description='Write', delivery_time=3, amount=40,
+        )
+        self.payments = [self.pay(self.client_user, self.freelancer) for _ in range(3)]
+        self.pay(self.other, self.freelancer)
+
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def pay(self, payer, payee):
+        payment = Payment.objects.create(
+            order=self.order, payer=payer, payee=payee, amount=40, freelancer_amount=36,
+            provider=Payment.STRIPE, transaction_id=f'pay_{Payment.objects.count()}',
+        )
+        Transaction.objects.create(
+            payment=payment, amount=40, transaction_type='payment', transaction_id=f'txn_{payment.transaction_id}',
+        )
+        return payment
+
+    def history(self, url='/api/payments/history/', **params):
+        response = self.api.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_newest_first_with_cursor_links(self):
+        page = self.history(page_size=2)
+        self.assertEqual(set(page), {'next', 'previous', 'results'})
+        self.assertIsNone(page['previous'])
+        ids = [result['id'] for result in page['results']]
+
+        page = self.history(page['next'])
+        self.assertIsNone(page['next'])
+        self.assertIsNotNone(page['previous'])
+        ids += [result['id'] for result in page['results']]
+        self.assertEqual(ids, [str(payment.id) for payment in reversed(self.payments)])
+
+    def test_approximate_count_on_request(self):
+        self.assertEqual(self.history(count='approx')['count'], 3)
+
+    def test_full_projection_by_default(self):
+        result = self.history()['results'][0]
+        self.assertEqual(result['order']['title'], 'Essay')
+        self.assertEqual(result['payer']['email'], 'client@example.com')
+        self.assertEqual(len(result['transactions']), 1)
+
+    def test_summary_projection_renders_relations_as_keys(self):
+        result = self.history(fields='summary')['results'][0]
+        self.assertEqual(set(result), {
+            'id', 'amount', 'currency', 'payment_type', 'status', 'order', 'payer', 'payee', 'payment_date',
+            'created_at',
+        })
+        self.assertEqual(result['order'], str(self.order.id))
+        self.assertEqual(result['payer'], str(self.client_user.id))
+
+    def test_dotted_fields_reach_into_relations(self):
+        result = self.history(fields='id,order.title')['results'][0]
+        self.assertEqual(result, {'id': str(self.payments[-1].id), 'order': {'title': 'Essay'}})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.api.get('/api/payments/history/', {'fields': 'id,card_number'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
 
-# Create your tests here.
+    def test_queries_do_not_grow_with_the_page(self):
+        with CaptureQueriesContext(connection) as small:
+            self.history(page_size=1)
+        with CaptureQueriesContext(connection) as large:
+            self.history(page_size=3)
+        self.assertEqual(len(large), len(small))
@@ -12,12 +12,17 @@ from .serializers import (
     AddPaymentMethodSerializer, PaymentMethodSerializer, TransactionSerializer
 )
 from orders.models import Order
+from common.pagination import KeysetPagination
+from common.queries import query_budget
+from common.projections import ProjectionMixin, projection_from_request, plan_queryset
 
 
-class PaymentListView(generics.ListAPIView):
+class PaymentListView(ProjectionMixin, generics.ListAPIView):
     """List payments for the authenticated user"""
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 6
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -27,10 +32,11 @@ class PaymentListView(generics.ListAPIView):
         ).order_by('-created_at')
 
 
-class PaymentDetailView(generics.RetrieveAPIView):
+class PaymentDetailView(ProjectionMixin, generics.RetrieveAPIView):
     """Get payment details"""
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 6
     
     def get_queryset(self):
         user = self.request.user
@@ -160,18 +166,22 @@ def remove_payment_method(request, method_id):
     )
 
 
+@query_budget(6)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def payment_history(request):
     """Get payment history for user"""
     user = request.user
+    projection = projection_from_request(PaymentSerializer, request)
     payments = Payment.objects.filter(
         Q(payer=user) | Q(payee=user)
     ).order_by('-created_at')
+    payments = plan_queryset(PaymentSerializer(projection=projection), Payment).apply(payments)
     
-    # Add pagination if needed
-    serializer = PaymentSerializer(payments, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    paginator = KeysetPagination()
+    page = paginator.paginate_queryset(payments, request)
+    serializer = PaymentSerializer(page, many=True, projection=projection)
+    return paginator.get_paginated_response(serializer.data)
 
 
 # Legacy views for backward compatibility
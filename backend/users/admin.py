@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, FreelancerProfile
+from .models import User, FreelancerProfile, Skill, FreelancerSkill
 
 
 @admin.register(User)
@@ -33,3 +33,18 @@ class FreelancerProfileAdmin(admin.ModelAdmin):
     list_filter = ('is_verified', 'experience_years')
     search_fields = ('user__name', 'user__email', 'bio')
     readonly_fields = ('rating', 'total_jobs_completed', 'created_at', 'updated_at')
+
+
+@admin.register(Skill)
+class SkillAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'created_at')
+    search_fields = ('name', 'slug')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(FreelancerSkill)
+class FreelancerSkillAdmin(admin.ModelAdmin):
+    list_display = ('skill', 'freelancer', 'hourly_rate', 'rating')
+    search_fields = ('skill__slug', 'freelancer__name', 'freelancer__email')
+    raw_id_fields = ('skill', 'freelancer')
+    readonly_fields = ('created_at', 'updated_at')
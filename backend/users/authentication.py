@@ -0,0 +1,116 @@
+"""
+JWT authentication backed by a user cache.
+
+simplejwt's ``JWTAuthentication`` loads the user row on every request, and
+views reading ``request.user.freelancer_profile`` load the profile too.
+:class:`CachedJWTAuthentication` keeps both in the cache for
+``AUTH_USER_CACHE_TIMEOUT`` seconds, so a warm request runs no
+authentication queries.
+
+The cache must be shared by every process serving requests (Redis at
+``CACHE_URL``; see ``CACHE_SHARED``). With a per-process cache, saving a
+user could only invalidate the copy of the worker that saved it, and the
+other workers would keep accepting a deactivated user or an old password
+until their copy expired, so without a shared cache the user is loaded
+from the database on every request instead.
+
+Cached users are keyed by user id and a version token. Saving or deleting a
+``User`` or its ``FreelancerProfile`` replaces the version once the
+transaction commits (see ``users/signals.py``), so the next request loads
+the fresh rows. A request that read the old rows before the commit stores
+them under the old version, where nobody looks any more. Changes made with
+``QuerySet.update()`` send no signals: call :func:`invalidate_cached_user`
+after them.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+User = get_user_model()
+
+
+def _version_key(user_id):
+    return f'users:auth:version:{user_id}'
+
+
+def _get_version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Fresh token rather than a counter: a version evicted from the
+        # cache can never come back and match an old entry
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_cached_user(user_id):
+    """Make the next request of ``user_id`` load the user from the database"""
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+
+
+def get_cached_user(user_id):
+    """User ``user_id`` with its freelancer profile, from the cache when possible; None if missing"""
+    timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300) if settings.CACHE_SHARED else 0
+    lookup = {api_settings.USER_ID_FIELD: user_id}
+    queryset = User.objects.select_related('freelancer_profile')
+    if not timeout:
+        return queryset.filter(**lookup).first()
+
+    key = f'users:auth:{user_id}:{_get_version(user_id)}'
+    user = cache.get(key)
+    if user is None:
+        user = queryset.filter(**lookup).first()
+        if user is not None:
+            cache.set(key, user, timeout)
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that reads the user from :func:`get_cached_user`"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        return user
+
+
+def get_user_for_token(token):
+    """Active user identified by a JWT access token, or None
+
+    For connections that can't send an ``Authorization`` header
+    (WebSockets, EventSource), which pass the token in the query string.
+    """
+    if not token:
+        return None
+    try:
+        payload = AccessToken(token)
+        user = get_cached_user(payload[api_settings.USER_ID_CLAIM])
+    except (TokenError, KeyError):
+        return None
+    if user is None or not user.is_active:
+        return None
+    return user
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from users.models import FreelancerProfile, FreelancerSkill
+from users.skills import sync_freelancer_skills
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the inverted skill index from freelancer profiles'
+
+    def handle(self, *args, **options):
+        FreelancerSkill.objects.all().delete()
+        
+        count = 0
+        for profile in FreelancerProfile.objects.only('user_id', 'skills', 'hourly_rate', 'rating').iterator(chunk_size=2000):
+            sync_freelancer_skills(profile)
+            count += 1
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} profiles ({FreelancerSkill.objects.count()} skill rows)'
+        ))
@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-17 09:30
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_skill_index(apps, schema_editor):
+    """Index the skills of existing freelancer profiles"""
+    from users.skills import normalize_skill
+    
+    FreelancerProfile = apps.get_model('users', 'FreelancerProfile')
+    Skill = apps.get_model('users', 'Skill')
+    FreelancerSkill = apps.get_model('users', 'FreelancerSkill')
+    
+    skills = {}
+    rows = []
+    for profile in FreelancerProfile.objects.all().iterator():
+        for name in profile.skills or []:
+            slug = normalize_skill(name)
+            if not slug:
+                continue
+            if slug not in skills:
+                skills[slug] = Skill.objects.create(slug=slug, name=str(name).strip()[:100])
+            rows.append(FreelancerSkill(
+                skill=skills[slug],
+                freelancer_id=profile.user_id,
+                hourly_rate=profile.hourly_rate,
+                rating=profile.rating,
+            ))
+    FreelancerSkill.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'db_table': 'skills',
+                'ordering': ['slug'],
+            },
+        ),
+        migrations.CreateModel(
+            name='FreelancerSkill',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('hourly_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('rating', models.DecimalField(decimal_places=2, default=0.0, max_digits=3)),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indexed_skills', to=settings.AUTH_USER_MODEL)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='freelancers', to='users.skill')),
+            ],
+            options={
+                'db_table': 'freelancer_skills',
+                'unique_together': {('skill', 'freelancer')},
+            },
+        ),
+        migrations.RunPython(build_skill_index, migrations.RunPython.noop),
+    ]
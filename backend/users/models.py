@@ -93,3 +93,38 @@ class FreelancerProfile(BaseModel):
         
     def __str__(self):
         return f"Freelancer Profile - {self.user.name}"
+
+
+class Skill(BaseModel):
+    """Normalized skill dictionary entry"""
+    
+    name = models.CharField(max_length=100)
+    slug = models.CharField(max_length=100, unique=True)  # see users.skills.normalize_skill
+    
+    class Meta:
+        db_table = 'skills'
+        ordering = ['slug']
+        
+    def __str__(self):
+        return self.name
+
+
+class FreelancerSkill(BaseModel):
+    """Inverted skill index: one row per (skill, freelancer)
+    
+    Maintained from ``FreelancerProfile.skills`` on profile save. ``hourly_rate``
+    and ``rating`` are copied from the profile so matching and ranking can be
+    done without joining the profile table.
+    """
+    
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='freelancers')
+    freelancer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='indexed_skills')
+    hourly_rate = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    
+    class Meta:
+        db_table = 'freelancer_skills'
+        unique_together = ('skill', 'freelancer')
+        
+    def __str__(self):
+        return f"{self.skill.slug} - {self.freelancer_id}"
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from common.serializers import TimedModelSerializer, TimedSerializer
 from .models import User, FreelancerProfile
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedModelSerializer):
     """Serializer for user registration"""
     
     password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -30,7 +31,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserLoginSerializer(serializers.Serializer):
+class UserLoginSerializer(TimedSerializer):
     """Serializer for user login"""
     
     email = serializers.EmailField()
@@ -54,7 +55,7 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('Must include email and password.')
 
 
-class FreelancerProfileSerializer(serializers.ModelSerializer):
+class FreelancerProfileSerializer(TimedModelSerializer):
     """Serializer for freelancer profile"""
     
     class Meta:
@@ -63,7 +64,7 @@ class FreelancerProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('user', 'rating', 'total_jobs_completed', 'is_verified')
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedModelSerializer):
     """Serializer for user profile"""
     
     freelancer_profile = FreelancerProfileSerializer(read_only=True)
@@ -75,7 +76,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'email', 'role', 'created_at', 'email_verified')
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(TimedModelSerializer):
     """Serializer for updating user profile"""
     
     class Meta:
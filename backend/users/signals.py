@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .authentication import invalidate_cached_user
+from .models import FreelancerProfile, FreelancerSkill, User
+from .skills import sync_freelancer_skills
+
+
+@receiver(post_save, sender=FreelancerProfile)
+def update_skill_index(sender, instance, **kwargs):
+    """Keep the inverted skill index in sync with the profile's skills"""
+    sync_freelancer_skills(instance)
+
+
+@receiver(post_delete, sender=FreelancerProfile)
+def remove_from_skill_index(sender, instance, **kwargs):
+    """Drop index rows of a deleted profile"""
+    FreelancerSkill.objects.filter(freelancer_id=instance.user_id).delete()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Drop the cached authenticated user once the change is committed"""
+    transaction.on_commit(lambda: invalidate_cached_user(instance.pk))
+
+
+@receiver(post_save, sender=FreelancerProfile)
+@receiver(post_delete, sender=FreelancerProfile)
+def invalidate_profile_user_cache(sender, instance, **kwargs):
+    """The cached user carries its profile, so profile changes drop it too"""
+    transaction.on_commit(lambda: invalidate_cached_user(instance.user_id))
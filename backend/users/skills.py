@@ -0,0 +1,77 @@
+"""
+Skill normalization and maintenance of the inverted skill index.
+"""
+
+import re
+
+from django.db import transaction
+
+from .models import Skill, FreelancerSkill
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_skill(name):
+    """Canonical form of a skill name: 'Django  REST ' -> 'django rest'"""
+    return _WHITESPACE.sub(' ', str(name)).strip().lower()[:100]
+
+
+def normalize_skills(names):
+    """Normalize a list of skill names, dropping blanks and duplicates"""
+    slugs = []
+    for name in names or []:
+        slug = normalize_skill(name)
+        if slug and slug not in slugs:
+            slugs.append(slug)
+    return slugs
+
+
+def get_or_create_skills(names):
+    """Return ``{slug: Skill}`` for ``names``, creating missing dictionary entries"""
+    display_names = {}
+    for name in names or []:
+        display_names.setdefault(normalize_skill(name), str(name).strip()[:100])
+    display_names.pop('', None)
+    
+    skills = {skill.slug: skill for skill in Skill.objects.filter(slug__in=display_names)}
+    missing = [slug for slug in display_names if slug not in skills]
+    if missing:
+        Skill.objects.bulk_create(
+            [Skill(slug=slug, name=display_names[slug]) for slug in missing],
+            ignore_conflicts=True,
+        )
+        skills.update({skill.slug: skill for skill in Skill.objects.filter(slug__in=missing)})
+    return skills
+
+
+def sync_freelancer_skills(profile):
+    """Bring the skill index rows of ``profile.user`` in line with the profile"""
+    skills = get_or_create_skills(profile.skills)
+    skill_ids = {skill.id for skill in skills.values()}
+    
+    with transaction.atomic():
+        index = FreelancerSkill.objects.filter(freelancer_id=profile.user_id)
+        index.exclude(skill_id__in=skill_ids).delete()
+        index.update(hourly_rate=profile.hourly_rate, rating=profile.rating)
+        
+        existing = set(index.values_list('skill_id', flat=True))
+        FreelancerSkill.objects.bulk_create([
+            FreelancerSkill(
+                skill_id=skill_id,
+                freelancer_id=profile.user_id,
+                hourly_rate=profile.hourly_rate,
+                rating=profile.rating,
+            )
+            for skill_id in skill_ids - existing
+        ], ignore_conflicts=True)
+
+
+def freelancers_with_skills(names):
+    """Ids of freelancers having any of ``names``, resolved from the index in id order"""
+    return (
+        FreelancerSkill.objects
+        .filter(skill__slug__in=normalize_skills(names))
+        .order_by('freelancer_id')
+        .values_list('freelancer_id', flat=True)
+        .distinct()
+    )
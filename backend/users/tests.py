@@ -1,3 +1,62 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .authentication import get_cached_user
+from .models import FreelancerProfile, FreelancerSkill, Skill, User
+from .skills import freelancers_with_skills
+
+
+class CachedUserTests(TestCase):
+    """The user cache behind JWT authentication"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('freelancer@example.com', 'pass', name='F', role=User.FREELANCER)
+
+    @override_settings(CACHE_SHARED=True)
+    def test_cached_with_a_shared_cache(self):
+        get_cached_user(self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cached_user(self.user.id), self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertFalse(get_cached_user(self.user.id).is_active)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_loaded_every_time_without_a_shared_cache(self):
+        get_cached_user(self.user.id)
+        with self.assertNumQueries(1):
+            get_cached_user(self.user.id)
+
+
+class SkillIndexTests(TestCase):
+    """The inverted skill index follows freelancer profiles"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('freelancer@example.com', 'pass', name='F', role=User.FREELANCER)
+        self.profile = FreelancerProfile.objects.create(
+            user=self.user, skills=['Python', ' django  REST', 'python'], hourly_rate=20, rating=4,
+        )
+
+    def indexed(self):
+        return sorted(
+            FreelancerSkill.objects.filter(freelancer=self.user).values_list('skill__slug', 'hourly_rate', 'rating')
+        )
+
+    def test_profile_skills_are_indexed_once_normalized(self):
+        self.assertEqual(self.indexed(), [('django rest', 20, 4), ('python', 20, 4)])
+        self.assertEqual(Skill.objects.get(slug='django rest').name, 'django  REST')
+        self.assertEqual(list(freelancers_with_skills(['PYTHON'])), [self.user.id])
+
+    def test_saving_the_profile_updates_the_index(self):
+        self.profile.skills = ['Python', 'Go']
+        self.profile.hourly_rate = 35
+        self.profile.save()
+        self.assertEqual(self.indexed(), [('go', 35, 4), ('python', 35, 4)])
+        self.assertEqual(list(freelancers_with_skills(['django rest'])), [])
+        # Dictionary entries outlive the freelancers that had them
+        self.assertTrue(Skill.objects.filter(slug='django rest').exists())
+
+    def test_deleting_the_profile_empties_its_index(self):
+        self.profile.delete()
+        self.assertEqual(self.indexed(), [])
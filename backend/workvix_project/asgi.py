@@ -2,6 +2,11 @@
 ASGI config for workvix_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections are routed by path to the
+handlers in ``websocket_routes`` (see ``common.websocket``). Serve it with
+any ASGI server, e.g.::
+
+    gunicorn workvix_project.asgi:application -k uvicorn.workers.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -13,4 +18,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'workvix_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up since the handlers use the ORM
+from chat.consumers import chat_socket  # noqa: E402
+from common.websocket import ProtocolRouter  # noqa: E402
+
+websocket_routes = {
+    '/ws/chat/': chat_socket,
+}
+
+application = ProtocolRouter(django_application, websocket_routes)
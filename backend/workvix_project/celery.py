@@ -0,0 +1,18 @@
+"""
+Celery application for workvix_project.
+
+Only used when ``CELERY_ENABLED`` is set; otherwise background tasks run
+in-process (see ``common.tasks``). Start a worker with::
+
+    celery -A workvix_project worker -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'workvix_project.settings')
+
+app = Celery('workvix_project')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
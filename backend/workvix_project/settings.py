@@ -53,8 +53,10 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'common.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'common.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -134,13 +136,13 @@ AUTH_PASSWORD_VALIDATORS = [
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'common.renderers.TimedJSONRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -150,6 +152,29 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache lifetime of the optional ?count=approx total on keyset-paginated lists
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Query budgets (common/queries.py): requests over their view's query_budget
+# or repeating a SELECT this many times from one place are logged to
+# workvix.queries; strict mode raises instead and is meant for tests
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=True, cast=bool)
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = config('QUERY_BUDGET_N_PLUS_ONE_THRESHOLD', default=5, cast=int)
+# Walking the stack to attribute each query to its serializer field or line
+# of code costs on every query, so it is only done in DEBUG and strict mode
+QUERY_BUDGET_CAPTURE_ORIGIN = config(
+    'QUERY_BUDGET_CAPTURE_ORIGIN', default=DEBUG or QUERY_BUDGET_STRICT, cast=bool
+)
+
+# Request metrics (common/metrics.py), kept per process and served at
+# /api/metrics/ (Prometheus) and /api/metrics/summary/ to staff users or with
+# "Authorization: Bearer <METRICS_TOKEN>" for scrapers
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_SAMPLE_SIZE = config('METRICS_SAMPLE_SIZE', default=1000, cast=int)
+METRICS_SUMMARY_WINDOW = config('METRICS_SUMMARY_WINDOW', default=300, cast=int)
+
 # JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -246,6 +271,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'workvix.queries': {
+            'handlers': ['file', 'console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
@@ -256,14 +286,111 @@ EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
-
-# Cache Configuration (Redis for production)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=30, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='WorkVix <no-reply@workvix.com>')
+
+# Notification email outbox (notifications/outbox.py), drained by
+# ``manage.py send_notification_emails``. The rate is messages per second per
+# worker (0 for no limit); a claimed batch is held for the lease in seconds;
+# notifications older than the max age in seconds are no longer emailed
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=100, cast=int)
+EMAIL_OUTBOX_CONNECTIONS = config('EMAIL_OUTBOX_CONNECTIONS', default=2, cast=int)
+EMAIL_OUTBOX_RATE = config('EMAIL_OUTBOX_RATE', default=20, cast=float)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_LEASE = config('EMAIL_OUTBOX_LEASE', default=300, cast=int)
+EMAIL_OUTBOX_MAX_AGE = config('EMAIL_OUTBOX_MAX_AGE', default=2 * 86400, cast=int)
+EMAIL_OUTBOX_POLL_INTERVAL = config('EMAIL_OUTBOX_POLL_INTERVAL', default=5, cast=float)
+# Messages sent over one connection before it is replaced
+EMAIL_CONNECTION_MAX_MESSAGES = config('EMAIL_CONNECTION_MAX_MESSAGES', default=500, cast=int)
+
+# Bursts of offers on a job or messages in a chat are merged into one
+# notification for this many seconds, and emailed once at the end (0 disables;
+# see notifications/coalescing.py). Daily digests are sent at this UTC hour.
+NOTIFICATION_COALESCE_WINDOW = config('NOTIFICATION_COALESCE_WINDOW', default=300, cast=int)
+NOTIFICATION_DIGEST_HOUR = config('NOTIFICATION_DIGEST_HOUR', default=8, cast=int)
+
+# Job search: dotted path to a jobs.search.JobSearchBackend; chosen from the
+# database vendor when empty
+JOB_SEARCH_BACKEND = config('JOB_SEARCH_BACKEND', default='')
+JOB_SEARCH_MAX_RESULTS = config('JOB_SEARCH_MAX_RESULTS', default=500, cast=int)
+JOB_SEARCH_CACHE_TIMEOUT = config('JOB_SEARCH_CACHE_TIMEOUT', default=60, cast=int)
+
+# Job board facet counts (jobs/facets.py) are cached per normalized filter set
+# for this many seconds (0 disables the cache)
+JOB_FACETS_CACHE_TIMEOUT = config('JOB_FACETS_CACHE_TIMEOUT', default=60, cast=int)
+
+# Job view counting: views are deduplicated per viewer within the window and
+# written in bulk from a per-process buffer (see jobs/view_counter.py)
+JOB_VIEW_DEDUP_WINDOW = config('JOB_VIEW_DEDUP_WINDOW', default=1800, cast=int)
+JOB_VIEW_FLUSH_INTERVAL = config('JOB_VIEW_FLUSH_INTERVAL', default=10, cast=int)
+JOB_VIEW_FLUSH_THRESHOLD = config('JOB_VIEW_FLUSH_THRESHOLD', default=500, cast=int)
+# Unique viewers are estimated from HyperLogLog sketches (jobs/view_sketches.py);
+# raw job_views rows are optional and pruned after the retention period
+JOB_VIEWS_RECORD_RAW = config('JOB_VIEWS_RECORD_RAW', default=True, cast=bool)
+JOB_VIEWS_RETENTION_DAYS = config('JOB_VIEWS_RETENTION_DAYS', default=90, cast=int)
+
+# Ranked offers of a job (offers/ranking.py): pages are cached until an offer
+# on the job changes, and at most this many seconds (0 disables the cache)
+OFFER_RANKING_CACHE_TIMEOUT = config('OFFER_RANKING_CACHE_TIMEOUT', default=300, cast=int)
+
+# Recommended jobs of freelancers (jobs/recommendations.py): the top JOB_FEED_SIZE
+# jobs are cached per freelancer, patched as jobs change and rebuilt after
+# JOB_FEED_CACHE_TIMEOUT seconds or a profile change. Only cached with a shared
+# cache (CACHE_SHARED); otherwise built on every request
+JOB_FEED_SIZE = config('JOB_FEED_SIZE', default=50, cast=int)
+JOB_FEED_CACHE_TIMEOUT = config('JOB_FEED_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Chat: number of recent messages embedded in the chat detail response; older
+# ones come from the paginated /api/chat/<id>/messages/ endpoint
+CHAT_DETAIL_MESSAGE_LIMIT = config('CHAT_DETAIL_MESSAGE_LIMIT', default=50, cast=int)
+
+# Real-time events (WebSocket delivery, see common/events.py). The in-memory
+# layer only reaches clients connected to the same process; use
+# common.events.RedisEventLayer when running several workers or nodes.
+EVENT_LAYER = config('EVENT_LAYER', default='common.events.InMemoryEventLayer')
+EVENT_LAYER_URL = config('EVENT_LAYER_URL', default='')
+
+# Notification push (notifications/stream.py): SSE heartbeat and lifetime in
+# seconds, client reconnect delay in ms, and the long-poll timeout in seconds.
+# Both must stay below the server's worker timeout (gunicorn --timeout 120).
+NOTIFICATION_STREAM_HEARTBEAT = config('NOTIFICATION_STREAM_HEARTBEAT', default=15, cast=int)
+NOTIFICATION_STREAM_MAX_AGE = config('NOTIFICATION_STREAM_MAX_AGE', default=90, cast=int)
+NOTIFICATION_STREAM_RETRY = config('NOTIFICATION_STREAM_RETRY', default=3000, cast=int)
+NOTIFICATION_POLL_TIMEOUT = config('NOTIFICATION_POLL_TIMEOUT', default=25, cast=int)
+NOTIFICATION_REPLAY_LIMIT = config('NOTIFICATION_REPLAY_LIMIT', default=100, cast=int)
+
+# Under WSGI a waiting long-poll holds one of the few gunicorn sync workers
+# (start.sh runs 4), so a handful of idle clients would starve every other
+# request. There the poll waits at most this many seconds, by default none,
+# which makes it a plain poll; serve workvix_project.asgi for real long-polls.
+NOTIFICATION_POLL_WSGI_TIMEOUT = config('NOTIFICATION_POLL_WSGI_TIMEOUT', default=0, cast=int)
+
+# Cache Configuration: Redis at CACHE_URL (redis://host:6379/1) for production,
+# otherwise a local memory cache per process
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
+    }
+# Whether every web and task worker sees the same default cache. Caches kept
+# correct by invalidation (the user cache below, the job feeds) stay off
+# without it, since one worker can't invalidate another's local memory
+CACHE_SHARED = config('CACHE_SHARED', default=bool(CACHE_URL), cast=bool)
+
+# Authenticated users (with their freelancer profile) are cached per user for
+# this many seconds and dropped on save (users/authentication.py); 0 disables.
+# Only used with a shared cache (CACHE_SHARED)
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
 
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379')
@@ -272,3 +399,12 @@ CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Send background tasks to the Celery broker; when disabled they run on an
+# in-process thread pool (see common/tasks.py)
+CELERY_ENABLED = config('CELERY_ENABLED', default=False, cast=bool)
+BACKGROUND_TASKS_EAGER = config('BACKGROUND_TASKS_EAGER', default=False, cast=bool)
+BACKGROUND_TASKS_WORKERS = config('BACKGROUND_TASKS_WORKERS', default=2, cast=int)
+
+# New-job notification fan-out
+NOTIFICATION_FANOUT_BATCH_SIZE = config('NOTIFICATION_FANOUT_BATCH_SIZE', default=1000, cast=int)
+NOTIFICATION_FANOUT_MAX_ATTEMPTS = config('NOTIFICATION_FANOUT_MAX_ATTEMPTS', default=5, cast=int)
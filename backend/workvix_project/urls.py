@@ -31,6 +31,7 @@ urlpatterns = [
     path('api/orders/', include('orders.urls')),
     path('api/payments/', include('payments.urls')),
     path('api/notifications/', include('notifications.urls')),
+    path('api/metrics/', include('common.urls')),
     
     # JWT token refresh
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
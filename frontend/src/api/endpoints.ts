@@ -58,6 +58,8 @@ export const jobAPI = {
   getAllJobs: (filters?: any) => api.get('/jobs/', { params: filters }),
   getJobsByCategory: (category: string) =>
     api.get('/jobs/category/', { params: { category } }),
+  getJobFacets: (filters?: any) => api.get('/jobs/facets/', { params: filters }),
+  getRecommendedJobs: (limit?: number) => api.get('/jobs/recommended/', { params: { limit } }),
 };
 
 // Order/Bid Endpoints
@@ -97,7 +99,9 @@ export const offerAPI = {
     api.post('/offers/create/', payload),
   acceptOffer: (offerId: string) => api.post(`/offers/${offerId}/accept/`, {}),
   rejectOffer: (offerId: string) => api.post(`/offers/${offerId}/reject/`, {}),
+  withdrawOffer: (offerId: string) => api.post(`/offers/${offerId}/withdraw/`, {}),
   jobOffers: (jobId: string) => api.get(`/offers/job/${jobId}/`),
+  rankedJobOffers: (jobId: string, page = 1) => api.get(`/offers/job/${jobId}/ranked/`, { params: { page } }),
 };
 
 // Payment Endpoints